@@ -38,19 +38,47 @@ except PackageNotFoundError:
     __version__ = "0.0.0"
 
 __all__ = [
+    "cache",
     "definitions",
+    "fingerprint",
     "nodes",
     "parser",
+    "query",
+    "revisions",
+    "serialize",
     "smart_list",
     "string_mixin",
     "utils",
     "wikicode",
     "parse",
+    "iterparse",
+    "strip",
+    "diff",
+    "ParseCache",
+    "RevisionParser",
 ]
 
-from . import definitions, nodes, parser, smart_list, string_mixin, utils, wikicode
+from . import (
+    cache,
+    definitions,
+    fingerprint,
+    nodes,
+    parser,
+    query,
+    revisions,
+    serialize,
+    smart_list,
+    string_mixin,
+    utils,
+    wikicode,
+)
 
 parse = utils.parse_anything
+iterparse = utils.iterparse
+strip = utils.strip
+diff = revisions.diff
+ParseCache = cache.ParseCache
+RevisionParser = parser.RevisionParser
 
 del PackageNotFoundError
 del version
@@ -0,0 +1,197 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :class:`ParseCache`, which saves parsed trees so that the
+same text doesn't have to be parsed more than once.
+"""
+
+from __future__ import annotations
+
+__all__ = ["ParseCache"]
+
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from .parser import Parser
+from .parser import features as _features
+from .serialize import FORMAT_VERSION, loads
+
+if TYPE_CHECKING:
+    from .wikicode import Wikicode
+
+
+class ParseCache:
+    """A cache of parsed wikicode, keyed on a hash of the text and options.
+
+    Pass an instance to :func:`mwparserfromhell.parse` with ``cache=cache``,
+    or call :meth:`parse` directly. Trees are kept in the format written by
+    :meth:`.Wikicode.dumps`, and every lookup loads a new tree from it, so
+    changes made to a tree after it was returned never affect the cache.
+
+    Up to *maxsize* bytes of serialized trees are kept in memory, and the
+    least recently used ones are dropped first. If *directory* is given, trees
+    are also saved there as files, so that they can be shared between
+    processes and kept between runs. Nothing is ever removed from the
+    directory by the cache itself.
+
+    The number of lookups that were and weren't found in the cache are counted
+    by :attr:`hits` and :attr:`misses`. Instances can be shared between
+    threads.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 64 * 1024 * 1024,
+        directory: str | os.PathLike[str] | None = None,
+    ):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"ParseCache(maxsize={self.maxsize!r}, directory={self.directory!r})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(
+        text: str | bytes | bytearray | memoryview | mmap.mmap,
+        context: int,
+        skip_style_tags: bool,
+        features: int,
+    ) -> str:
+        """Return the cache key for *text* parsed with the given options."""
+        if isinstance(text, str):
+            text = text.encode("utf8", "surrogatepass")
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(
+            f"{FORMAT_VERSION}:{context}:{int(skip_style_tags)}:{features}:".encode()
+        )
+        digest.update(text)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Return the path of the file in :attr:`directory` for *key*."""
+        assert self.directory is not None
+        return os.path.join(self.directory, key[:2], key[2:] + ".mwph")
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Store *data* in memory under *key*, evicting old entries to fit."""
+        if len(data) > self.maxsize:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.maxsize:
+                self._size -= len(self._entries.popitem(last=False)[1])
+
+    def _lookup(self, key: str) -> Wikicode | None:
+        """Return the tree stored under *key*, or ``None`` if there isn't one."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is not None:
+            return loads(data)
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as fp:
+                data = fp.read()
+            code = loads(data)
+        except (OSError, ValueError):
+            # Missing files and ones from other versions of the library are
+            # both just misses; the file will be replaced after parsing.
+            return None
+        self._remember(key, data)
+        return code
+
+    def _save(self, key: str, data: bytes) -> None:
+        """Write *data* to the file for *key*, replacing it atomically."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def parse(
+        self,
+        text: str | bytes | bytearray | memoryview | mmap.mmap,
+        context: int = 0,
+        *,
+        skip_style_tags: bool = False,
+        features: int | None = None,
+        parallel: int | None = None,
+    ) -> Wikicode:
+        """Return a :class:`.Wikicode` for *text*, parsing it only if needed.
+
+        The arguments are the same as for :meth:`.Parser.parse`. *parallel*
+        only applies when *text* isn't found in the cache and has to be parsed;
+        it isn't part of the cache key, since it never changes the result.
+        """
+        if features is None:
+            features = _features.ALL
+        key = self._key(text, context, skip_style_tags, features)
+        code = self._lookup(key)
+        if code is not None:
+            with self._lock:
+                self.hits += 1
+            return code
+
+        with self._lock:
+            self.misses += 1
+        code = Parser().parse(
+            text, context, skip_style_tags, features, parallel=parallel
+        )
+        data = code.dumps()
+        self._remember(key, data)
+        if self.directory is not None:
+            self._save(key, data)
+        return code
+
+    def clear(self) -> None:
+        """Remove every tree from the in-memory cache.
+
+        Files in :attr:`directory` are left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
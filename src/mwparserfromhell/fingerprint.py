@@ -0,0 +1,335 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module computes fingerprints of parsed wikicode, which are available as
+:meth:`.Node.fingerprint` and :meth:`.Wikicode.fingerprint`.
+
+A fingerprint is a 16-byte hash built from the type of a node, the text it
+writes between its children (see :meth:`.Node.__render__`), and the
+fingerprints of those children, so two objects have the same fingerprint
+when they are the same kind of tree with the same text. Unlike :func:`hash`,
+it is the same in every process and between runs.
+
+Each fingerprint is cached on the object it belongs to, which also remembers
+the object holding it (using the same links as :meth:`.Wikicode.track_parents`,
+set as fingerprints are computed). Every change to a tree made through the
+library (setting a node's attributes, editing a list of nodes, or adding and
+removing parameters and attributes) calls :func:`touched`, which follows these
+links up from the changed object, making the cached fingerprints of it and of
+everything around it out of date. Other trees, and other parts of the same
+tree, keep theirs. Lists that can be edited directly, like
+:attr:`.Template.params` and :attr:`.Tag.attributes`, are :class:`WatchedList`
+objects (and lists of nodes are :class:`.SmartList` objects), which remember
+the object holding them once they are part of a cached fingerprint, and do the
+same. Objects that have never been fingerprinted, like those still being built
+by the parser, can be changed freely. Edits to a plain ``list``, like the list
+of nodes of a :class:`.Wikicode` object built from one, can't be noticed, so
+fingerprints of objects containing one are never cached.
+
+An object is expected to be in one place at a time; if a cached one turns up
+somewhere new, the fingerprints around its old place are made out of date.
+Nothing is shared between trees, so threads working on different trees don't
+affect each other.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "WatchedList",
+    "code_fingerprint",
+    "node_fingerprint",
+    "touched",
+    "watch",
+]
+
+from functools import cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Any, SupportsIndex, cast
+
+if TYPE_CHECKING:
+    from .nodes import Node, Text
+    from .smart_list import SmartList
+    from .wikicode import Wikicode
+
+_PREFIXES: dict[type, bytes] = {}
+
+# Stored on objects that are part of something cached without having a cached
+# fingerprint of their own, like Text nodes, whose text goes straight into that
+# of the Wikicode object holding them; it tells touched() to look further up:
+_WATCHED = b""
+
+
+class WatchedList(list):
+    """A ``list`` that calls :func:`touched` when it is edited, once watched.
+
+    Lists inside nodes that can be edited directly use this, so that doing so
+    makes cached fingerprints out of date like any other change to a tree. It
+    is otherwise a normal ``list``; slicing it returns a plain ``list``.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, iterable: Any = ()) -> None:
+        super().__init__(iterable)
+        # The object holding us, once we are part of a cached fingerprint:
+        self._owner: Node | Wikicode | None = None
+
+    def __reduce_ex__(self, protocol: Any) -> tuple:
+        # Copies aren't part of any cached fingerprint:
+        return (type(self), (), None, iter(self))
+
+    def __setitem__(self, key, item):
+        touched(self._owner)
+        super().__setitem__(key, item)
+
+    def __delitem__(self, key):
+        touched(self._owner)
+        super().__delitem__(key)
+
+    def __iadd__(self, other):
+        touched(self._owner)
+        return super().__iadd__(other)
+
+    def __imul__(self, other):
+        touched(self._owner)
+        return super().__imul__(other)
+
+    def append(self, item):
+        touched(self._owner)
+        super().append(item)
+
+    def clear(self):
+        touched(self._owner)
+        super().clear()
+
+    def extend(self, item):
+        touched(self._owner)
+        super().extend(item)
+
+    def insert(self, index, item):
+        touched(self._owner)
+        super().insert(index, item)
+
+    def pop(self, index: SupportsIndex = -1):
+        touched(self._owner)
+        return super().pop(index)
+
+    def remove(self, item):
+        touched(self._owner)
+        super().remove(item)
+
+    def reverse(self):
+        touched(self._owner)
+        super().reverse()
+
+    def sort(self, *, key=None, reverse=False):
+        touched(self._owner)
+        super().sort(key=key, reverse=reverse)
+
+
+def touched(obj: Node | Wikicode | None) -> None:
+    """Make the cached fingerprints of *obj* and everything around it out of date.
+
+    This follows the links from *obj* to the objects holding it, up to the top
+    of the tree, so only fingerprints that were built from *obj* are lost.
+    Other data cached on :class:`.Wikicode` objects by :func:`watch` callers
+    is cleared along the way. An object that was never part of a cached
+    fingerprint has nothing around it to clear, so changing it costs nothing.
+    """
+    # pylint: disable=protected-access
+    if obj is None or obj._fingerprint is None:
+        return
+    Wikicode = _code_type()  # pylint: disable=invalid-name
+    while obj is not None and obj._fingerprint is not None:
+        obj._fingerprint = _WATCHED
+        if isinstance(obj, Wikicode):
+            obj._kinds = None
+            obj = obj._parent_node
+        else:
+            obj = cast("Node", obj)._parent_code
+
+
+def watch(obj: Node | Wikicode, parent: Wikicode | None = None) -> bool:
+    """Make :func:`touched` notice changes to *obj* from now on.
+
+    Changes inside a node should make data cached on the :class:`.Wikicode`
+    objects around it out of date, so a node is linked to *parent*, the object
+    holding it, and the :class:`.Wikicode` objects inside it are linked to it.
+    Return ``False`` if *obj* holds a plain ``list``, whose edits can't be
+    noticed, so nothing computed from *obj* should be cached.
+    """
+    # pylint: disable=protected-access
+    if obj._fingerprint is None:
+        obj._fingerprint = _WATCHED
+    if not isinstance(obj, _code_type()):
+        node = cast("Node", obj)
+        if parent is not None and node._parent_code is not parent:
+            _link_node(node, parent)
+        for child in node.__children__():
+            if child._parent_node is not node:
+                _link_code(child, node)
+    return _watch_lists(obj)
+
+
+def _link_node(node: Node, code: Wikicode) -> None:
+    """Remember that *node* is in *code*.
+
+    If *node* was somewhere else before, what was cached there is made out of
+    date, since it may still count *node*.
+    """
+    # pylint: disable=protected-access
+    if node._parent_code is not None:
+        touched(node._parent_code)
+    node._parent_code = code
+
+
+def _link_code(code: Wikicode, node: Node) -> None:
+    """Remember that *code* is in *node*, like :func:`_link_node`."""
+    # pylint: disable=protected-access
+    if code._parent_node is not None:
+        touched(code._parent_node)
+    code._parent_node = node
+
+
+def _watch_lists(obj: Node | Wikicode) -> bool:
+    """Make edits to the lists held by *obj* call :func:`touched` with it.
+
+    These are the attributes named by its ``_lists``. Return ``False`` if one
+    of them is a plain ``list``, which can't.
+    """
+    watchable = True
+    for name in obj._lists:  # pylint: disable=protected-access
+        value = getattr(obj, name)
+        if type(value) is WatchedList or type(value) is _smart_list_type():
+            owner = value._owner  # pylint: disable=protected-access
+            if owner is not obj:
+                if owner is not None:
+                    touched(owner)
+                value._owner = obj  # pylint: disable=protected-access
+        else:
+            watchable = False
+    return watchable
+
+
+@cache
+def _code_type() -> type[Wikicode]:
+    """Return :class:`.Wikicode`, which imports this module itself."""
+    # pylint: disable=cyclic-import,import-outside-toplevel
+    from .wikicode import Wikicode
+
+    return Wikicode
+
+
+@cache
+def _text_type() -> type[Text]:
+    """Return :class:`.Text`, which can't be imported until nodes are loaded."""
+    # pylint: disable=cyclic-import,import-outside-toplevel
+    from .nodes.text import Text
+
+    return Text
+
+
+@cache
+def _smart_list_type() -> type[SmartList]:
+    """Return :class:`.SmartList`, which imports this module itself."""
+    # pylint: disable=cyclic-import,import-outside-toplevel
+    from .smart_list import SmartList
+
+    return SmartList
+
+
+def code_fingerprint(code: Wikicode) -> bytes:
+    """Return the fingerprint of the :class:`.Wikicode` object *code*."""
+    # pylint: disable=protected-access
+    cached = code._fingerprint
+    if cached:
+        return cached
+    Text = _text_type()  # pylint: disable=invalid-name
+
+    # Text nodes are by far the most common, so rather than hashing each one
+    # separately, their text goes straight into ours. Any other node that
+    # couldn't be cached means we can't be either:
+    cacheable = True
+    data = bytearray(b"Wikicode\0")
+    for node in code.nodes:
+        if node._parent_code is not code:
+            _link_node(node, code)
+        if type(node) is Text:
+            data += _encode(node.value)
+            if node._fingerprint is None:
+                node._fingerprint = _WATCHED
+        else:
+            data += node_fingerprint(node)
+            if not node._fingerprint:
+                cacheable = False
+    digest = blake2b(data, digest_size=16).digest()
+    if _watch_lists(code) and cacheable:
+        code._fingerprint = digest
+    return digest
+
+
+def _encode(text: str) -> bytes:
+    """Encode a run of text between children as part of a fingerprint."""
+    data = text.encode("utf8", "surrogatepass")
+    return b"t%d:" % len(data) + data
+
+
+def node_fingerprint(node: Node) -> bytes:
+    """Return the fingerprint of the :class:`.Node` *node*."""
+    # pylint: disable=protected-access
+    cached = node._fingerprint
+    if cached:
+        return cached
+    cls = type(node)
+    prefix = _PREFIXES.get(cls)
+    if prefix is None:
+        prefix = _PREFIXES[cls] = f"{cls.__module__}.{cls.__qualname__}\0".encode()
+
+    # Text is written as str objects and children as themselves, to be replaced
+    # by their fingerprints; any that couldn't be cached means we can't be:
+    parts: list[Any] = []
+    append = parts.append
+    node.__render__(append, append)
+    cacheable = True
+    if len(parts) == 1 and type(parts[0]) is str:  # Most nodes have no children
+        data = prefix + _encode(parts[0])
+    else:
+        chunks = [prefix]
+        text: list[str] = []
+        for part in parts:
+            if isinstance(part, str):
+                text.append(part)
+            else:
+                if text:
+                    chunks.append(_encode("".join(text)))
+                    text.clear()
+                if part._parent_node is not node:
+                    _link_code(part, node)
+                chunks.append(b"c" + code_fingerprint(part))
+                if not part._fingerprint:
+                    cacheable = False
+        if text:
+            chunks.append(_encode("".join(text)))
+        data = b"".join(chunks)
+    digest = blake2b(data, digest_size=16).digest()
+    if _watch_lists(node) and cacheable:
+        node._fingerprint = digest
+    return digest
@@ -23,6 +23,7 @@ from __future__ import annotations
 from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import node_fingerprint
 from ..string_mixin import StringMixIn
 
 if TYPE_CHECKING:
@@ -31,31 +32,118 @@ if TYPE_CHECKING:
 __all__ = ["Node"]
 
 
+def render_to(obj: Any, write: Callable[[str], None]) -> None:
+    """Pass the text of *obj*, anything with ``__render__()``, to *write*.
+
+    The tree is walked once, and each piece of text is written as it is
+    reached, without building strings for any of the levels in between.
+    """
+
+    def get(code: Wikicode) -> None:
+        for node in code.nodes:
+            node.__render__(write, get)
+
+    obj.__render__(write, get)
+
+
+def render(obj: Any) -> str:
+    """Return the text of *obj*, anything with ``__render__()``.
+
+    Every piece of the text is collected into a single list which is joined at
+    the end, instead of each level of the tree building its own string out of
+    its children's.
+    """
+    parts: list[str] = []
+    render_to(obj, parts.append)
+    return "".join(parts)
+
+
 class Node(StringMixIn):
     """Represents the base Node type, demonstrating the methods to override.
 
     :meth:`__str__` must be overridden. It should return a ``str``
-    representation of the node. If the node contains :class:`.Wikicode`
-    objects inside of it, :meth:`__children__` should be a generator that
-    iterates over them. If the node is printable (shown when the page is
-    rendered), :meth:`__strip__` should return its printable version,
-    stripping out any formatting marks. It does not have to return a string,
-    but something that can be converted to a string with ``str()``. Finally,
-    :meth:`__showtree__` can be overridden to build a nice tree representation
-    of the node, if desired, for :meth:`~.Wikicode.get_tree`.
+    representation of the node. :meth:`__render__` should produce the same
+    text, but by passing literal text to *write* and child :class:`.Wikicode`
+    objects to *get* in order; it only has to be overridden by nodes with
+    children, which can then build :meth:`__str__` with :func:`render`. If the
+    node contains :class:`.Wikicode` objects inside of it,
+    :meth:`__children__` should be a generator that iterates over them. If the
+    node is printable (shown when the page is rendered), :meth:`__strip__`
+    should return its printable version, stripping out any formatting marks.
+    It does not have to return a string, but something that can be converted
+    to a string with ``str()``. :meth:`__strip_into__` does the same for
+    :meth:`.Wikicode.strip_code`, but appends the non-empty pieces of the text
+    to *out* and passes child :class:`.Wikicode` objects to *strip*, which
+    strips them into *out* too; it only has to be overridden to make stripping
+    faster. Finally, :meth:`__showtree__` can be overridden to build a nice
+    tree representation of the node, if desired, for
+    :meth:`~.Wikicode.get_tree`.
     """
 
+    # Where the node is, once Wikicode.track_parents() has been called or it
+    # is part of a cached fingerprint:
+    _parent_code: Wikicode | None = None
+    _parent_index = 0
+    # The value of fingerprint(), once it is cached; see .fingerprint:
+    _fingerprint: bytes | None = None
+    # Attributes holding lists that can be edited directly; see .fingerprint:
+    _lists: tuple[str, ...] = ()
+
     def __str__(self) -> str:
         raise NotImplementedError()
 
+    def __getstate__(self) -> dict[str, Any]:
+        # Don't drag the rest of the tree along when copying or pickling:
+        state = self.__dict__.copy()
+        state.pop("_parent_code", None)
+        state.pop("_parent_index", None)
+        state.pop("_fingerprint", None)
+        return state
+
     def __children__(self) -> Generator[Wikicode, None, None]:
         return
         # pylint: disable=unreachable
         yield  # pragma: no cover (this is a generator that yields nothing)
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write(str(self))
+
     def __strip__(self, **kwargs: Any) -> str | None:
         return None
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        stripped = self.__strip__(**kwargs)
+        if stripped:
+            out.append(str(stripped))
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Subclasses that change how they are stripped must be stripped that
+        # way, even if a parent class has a faster __strip_into__():
+        if "__strip__" in vars(cls) and "__strip_into__" not in vars(cls):
+            cls.__strip_into__ = Node.__strip_into__
+        # Likewise, subclasses that change how they are rendered by overriding
+        # __str__() must be rendered that way inside of a tree:
+        if "__str__" in vars(cls) and "__render__" not in vars(cls):
+            cls.__render__ = Node.__render__
+
+    def fingerprint(self) -> bytes:
+        """Return a 16-byte hash of this node's type, text, and structure.
+
+        Two nodes have the same fingerprint if they are the same type of node
+        with the same text and children, and the value is stable between
+        runs. It is cached until the tree is changed, so calling this again is
+        cheap; see :mod:`.fingerprint` for details.
+        """
+        return node_fingerprint(self)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
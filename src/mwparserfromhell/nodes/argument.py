@@ -23,8 +23,9 @@ from __future__ import annotations
 from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 
 if TYPE_CHECKING:
     from ..wikicode import Wikicode
@@ -41,21 +42,37 @@ class Argument(Node):
         self.default = default
 
     def __str__(self) -> str:
-        start = "{{{" + str(self.name)
-        if self.default is not None:
-            return start + "|" + str(self.default) + "}}}"
-        return start + "}}}"
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode, None, None]:
         yield self.name
         if self.default is not None:
             yield self.default
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write("{{{")
+        get(self.name)
+        if self.default is not None:
+            write("|")
+            get(self.default)
+        write("}}}")
+
     def __strip__(self, **kwargs: Any) -> str | None:
         if self.default is not None:
             return self.default.strip_code(**kwargs)
         return None
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        if self.default is not None:
+            strip(self.default)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -77,6 +94,7 @@ class Argument(Node):
 
     @name.setter
     def name(self, value: Any) -> None:
+        touched(self)
         self._name = parse_anything(value)
 
     @property
@@ -92,6 +110,7 @@ class Argument(Node):
 
     @default.setter
     def default(self, default: Any) -> None:
+        touched(self)
         if default is None:
             self._default = None
         else:
@@ -22,6 +22,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ._base import Node
 
 if TYPE_CHECKING:
@@ -47,4 +48,5 @@ class Comment(Node):
 
     @contents.setter
     def contents(self, value: Any) -> None:
+        touched(self)
         self._contents = str(value)
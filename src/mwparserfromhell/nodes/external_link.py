@@ -23,8 +23,9 @@ from __future__ import annotations
 from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 
 if TYPE_CHECKING:
     from ..wikicode import Wikicode
@@ -49,19 +50,27 @@ class ExternalLink(Node):
         self.suppress_space = suppress_space
 
     def __str__(self) -> str:
-        if self.brackets:
-            if self.title is not None:
-                if self.suppress_space is True:
-                    return "[" + str(self.url) + str(self.title) + "]"
-                return "[" + str(self.url) + " " + str(self.title) + "]"
-            return "[" + str(self.url) + "]"
-        return str(self.url)
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode, None, None]:
         yield self.url
         if self.title is not None:
             yield self.title
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        if self.brackets:
+            write("[")
+            get(self.url)
+            if self.title is not None:
+                if self.suppress_space is not True:
+                    write(" ")
+                get(self.title)
+            write("]")
+        else:
+            get(self.url)
+
     def __strip__(self, **kwargs: Any) -> str | None:
         if self.brackets:
             if self.title:
@@ -69,6 +78,18 @@ class ExternalLink(Node):
             return None
         return self.url.strip_code(**kwargs)
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        if self.brackets:
+            if self.title is not None:
+                strip(self.title)
+        else:
+            strip(self.url)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -90,6 +111,7 @@ class ExternalLink(Node):
 
     @url.setter
     def url(self, value: Any) -> None:
+        touched(self)
         # pylint: disable=import-outside-toplevel
         from ..parser import contexts
 
@@ -102,6 +124,7 @@ class ExternalLink(Node):
 
     @title.setter
     def title(self, value: Any) -> None:
+        touched(self)
         self._title = None if value is None else parse_anything(value)
 
     @property
@@ -111,4 +134,5 @@ class ExternalLink(Node):
 
     @brackets.setter
     def brackets(self, value: bool) -> None:
+        touched(self)
         self._brackets = bool(value)
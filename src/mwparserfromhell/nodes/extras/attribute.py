@@ -20,10 +20,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
+from ...fingerprint import touched
 from ...string_mixin import StringMixIn
 from ...utils import parse_anything
+from .._base import render
 
 if TYPE_CHECKING:
     from ...wikicode import Wikicode
@@ -63,13 +66,22 @@ class Attribute(StringMixIn):
         self.pad_after_eq = pad_after_eq
 
     def __str__(self) -> str:
-        result = self.pad_first + str(self.name) + self.pad_before_eq
+        return render(self)
+
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write(self.pad_first)
+        get(self.name)
+        write(self.pad_before_eq)
         if self.value is not None:
-            result += "=" + self.pad_after_eq
+            write("=" + self.pad_after_eq)
             if self.quotes:
-                return result + self.quotes + str(self.value) + self.quotes
-            return result + str(self.value)
-        return result
+                write(self.quotes)
+                get(self.value)
+                write(self.quotes)
+            else:
+                get(self.value)
 
     @staticmethod
     def _value_needs_quotes(value: Wikicode | None) -> str | None:
@@ -110,6 +122,7 @@ class Attribute(StringMixIn):
 
     @name.setter
     def name(self, value: Any) -> None:
+        touched(getattr(self, "_name", None))
         self._name = parse_anything(value)
 
     @property
@@ -119,6 +132,7 @@ class Attribute(StringMixIn):
 
     @value.setter
     def value(self, newval: Any) -> None:
+        touched(getattr(self, "_name", None))
         if newval is None:
             self._value = None
         else:
@@ -135,6 +149,7 @@ class Attribute(StringMixIn):
 
     @quotes.setter
     def quotes(self, value: Any) -> None:
+        touched(getattr(self, "_name", None))
         value = self.coerce_quotes(value)
         if not value and self._value_needs_quotes(self.value):
             raise ValueError("attribute value requires quotes")
@@ -147,6 +162,7 @@ class Attribute(StringMixIn):
 
     @pad_first.setter
     def pad_first(self, value: str) -> None:
+        touched(getattr(self, "_name", None))
         self._set_padding("_pad_first", value)
 
     @property
@@ -156,6 +172,7 @@ class Attribute(StringMixIn):
 
     @pad_before_eq.setter
     def pad_before_eq(self, value: str) -> None:
+        touched(getattr(self, "_name", None))
         self._set_padding("_pad_before_eq", value)
 
     @property
@@ -165,4 +182,5 @@ class Attribute(StringMixIn):
 
     @pad_after_eq.setter
     def pad_after_eq(self, value: str) -> None:
+        touched(getattr(self, "_name", None))
         self._set_padding("_pad_after_eq", value)
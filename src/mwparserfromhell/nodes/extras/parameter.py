@@ -21,10 +21,13 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
+from ...fingerprint import touched
 from ...string_mixin import StringMixIn
 from ...utils import parse_anything
+from .._base import render
 
 if TYPE_CHECKING:
     from ...wikicode import Wikicode
@@ -48,9 +51,15 @@ class Parameter(StringMixIn):
         self.showkey = showkey
 
     def __str__(self) -> str:
+        return render(self)
+
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
         if self.showkey:
-            return str(self.name) + "=" + str(self.value)
-        return str(self.value)
+            get(self.name)
+            write("=")
+        get(self.value)
 
     @staticmethod
     def can_hide_key(key: Any) -> re.Match | None:
@@ -64,6 +73,7 @@ class Parameter(StringMixIn):
 
     @name.setter
     def name(self, newval: Any) -> None:
+        touched(getattr(self, "_value", None))
         self._name = parse_anything(newval)
 
     @property
@@ -73,6 +83,7 @@ class Parameter(StringMixIn):
 
     @value.setter
     def value(self, newval: Any) -> None:
+        touched(getattr(self, "_value", None))
         self._value = parse_anything(newval)
 
     @property
@@ -82,6 +93,7 @@ class Parameter(StringMixIn):
 
     @showkey.setter
     def showkey(self, newval: Any) -> None:
+        touched(getattr(self, "_value", None))
         newval = bool(newval)
         if not newval and not self.can_hide_key(self.name):
             raise ValueError(f"parameter key {self.name!r} cannot be hidden")
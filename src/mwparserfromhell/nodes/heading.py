@@ -23,8 +23,9 @@ from __future__ import annotations
 from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 
 if TYPE_CHECKING:
     from ..wikicode import Wikicode
@@ -39,14 +40,29 @@ class Heading(Node):
         self.level = level
 
     def __str__(self) -> str:
-        return ("=" * self.level) + str(self.title) + ("=" * self.level)
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode, None, None]:
         yield self.title
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write("=" * self.level)
+        get(self.title)
+        write("=" * self.level)
+
     def __strip__(self, **kwargs: Any) -> str | None:
         return self.title.strip_code(**kwargs)
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        strip(self.title)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -64,6 +80,7 @@ class Heading(Node):
 
     @title.setter
     def title(self, value: Any) -> None:
+        touched(self)
         self._title = parse_anything(value)
 
     @property
@@ -73,6 +90,7 @@ class Heading(Node):
 
     @level.setter
     def level(self, value: int) -> None:
+        touched(self)
         value = int(value)
         if value < 1 or value > 6:
             raise ValueError(value)
@@ -21,10 +21,15 @@
 from __future__ import annotations
 
 import html.entities as htmlentities
-from typing import Any
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ._base import Node
 
+if TYPE_CHECKING:
+    from ..wikicode import Wikicode
+
 __all__ = ["HTMLEntity"]
 
 
@@ -70,6 +75,14 @@ class HTMLEntity(Node):
             return self.normalize()
         return str(self)
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        out.append(self.normalize() if kwargs.get("normalize") else str(self))
+
     @property
     def value(self) -> str:
         """The string value of the HTML entity."""
@@ -77,6 +90,7 @@ class HTMLEntity(Node):
 
     @value.setter
     def value(self, newval: Any) -> None:
+        touched(self)
         newval = str(newval)
         try:
             int(newval)
@@ -116,6 +130,7 @@ class HTMLEntity(Node):
 
     @named.setter
     def named(self, newval: bool) -> None:
+        touched(self)
         newval = bool(newval)
         if newval and self.value not in htmlentities.entitydefs:
             raise ValueError(f"entity value {self.value!r} is not a valid name")
@@ -136,6 +151,7 @@ class HTMLEntity(Node):
 
     @hexadecimal.setter
     def hexadecimal(self, newval: bool) -> None:
+        touched(self)
         newval = bool(newval)
         if newval and self.named:
             raise ValueError("a named entity cannot be hexadecimal")
@@ -153,6 +169,7 @@ class HTMLEntity(Node):
 
     @hex_char.setter
     def hex_char(self, newval: str) -> None:
+        touched(self)
         newval = str(newval)
         if newval not in ("x", "X"):
             raise ValueError(newval)
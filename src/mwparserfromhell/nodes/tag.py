@@ -24,8 +24,9 @@ from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
 from ..definitions import is_visible
+from ..fingerprint import WatchedList, touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 from .extras import Attribute
 
 if TYPE_CHECKING:
@@ -37,6 +38,8 @@ __all__ = ["Tag"]
 class Tag(Node):
     """Represents an HTML-style tag in wikicode, like ``<ref>``."""
 
+    _lists = ("_attrs",)
+
     def __init__(
         self,
         tag: Any,
@@ -57,7 +60,7 @@ class Tag(Node):
 
         self.tag = tag
         self.contents = contents
-        self._attrs = attrs if attrs else []
+        self._attrs = attrs or WatchedList()
         self._closing_wiki_markup = None
         self.wiki_markup = wiki_markup
         self.self_closing = self_closing
@@ -71,34 +74,7 @@ class Tag(Node):
             self.closing_wiki_markup = closing_wiki_markup
 
     def __str__(self) -> str:
-        if self.wiki_markup:
-            if self.attributes:
-                attrs = "".join([str(attr) for attr in self.attributes])
-            else:
-                attrs = ""
-            padding = self.padding or ""
-            separator = self.wiki_style_separator or ""
-            if self.self_closing:
-                return self.wiki_markup + attrs + padding + separator
-            close = self.closing_wiki_markup or ""
-            return (
-                self.wiki_markup
-                + attrs
-                + padding
-                + separator
-                + str(self.contents)
-                + close
-            )
-
-        result = ("</" if self.invalid else "<") + str(self.tag)
-        if self.attributes:
-            result += "".join([str(attr) for attr in self.attributes])
-        if self.self_closing:
-            result += self.padding + (">" if self.implicit else "/>")
-        else:
-            result += self.padding + ">" + str(self.contents)
-            result += "</" + str(self.closing_tag) + ">"
-        return result
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode, None, None]:
         if not self.wiki_markup:
@@ -112,11 +88,47 @@ class Tag(Node):
             if not self.wiki_markup and self.closing_tag:
                 yield self.closing_tag
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        if self.wiki_markup:
+            write(self.wiki_markup)
+            for attr in self.attributes:
+                attr.__render__(write, get)
+            write((self.padding or "") + (self.wiki_style_separator or ""))
+            if not self.self_closing:
+                get(self.contents)
+                write(self.closing_wiki_markup or "")
+            return
+
+        write("</" if self.invalid else "<")
+        get(self.tag)
+        for attr in self.attributes:
+            attr.__render__(write, get)
+        if self.self_closing:
+            write(self.padding + (">" if self.implicit else "/>"))
+        else:
+            write(self.padding + ">")
+            get(self.contents)
+            write("</")
+            get(self.closing_tag)
+            write(">")
+
     def __strip__(self, **kwargs: Any) -> str | None:
         if self.contents and is_visible(str(self.tag)):
             return self.contents.strip_code(**kwargs)
         return None
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        # Checking for nodes instead of truth avoids rendering the contents:
+        if self.contents.nodes and is_visible(str(self.tag)):
+            strip(self.contents)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -148,6 +160,7 @@ class Tag(Node):
 
     @tag.setter
     def tag(self, value: Any) -> None:
+        touched(self)
         self._tag = self._closing_tag = parse_anything(value)
 
     @property
@@ -157,6 +170,7 @@ class Tag(Node):
 
     @contents.setter
     def contents(self, value: Any) -> None:
+        touched(self)
         self._contents = parse_anything(value)
 
     @property
@@ -179,6 +193,7 @@ class Tag(Node):
 
     @wiki_markup.setter
     def wiki_markup(self, value: str | None) -> None:
+        touched(self)
         self._wiki_markup = str(value) if value else None
         if not value or not self.closing_wiki_markup:
             self._closing_wiki_markup = self._wiki_markup
@@ -190,6 +205,7 @@ class Tag(Node):
 
     @self_closing.setter
     def self_closing(self, value: bool) -> None:
+        touched(self)
         self._self_closing = bool(value)
 
     @property
@@ -205,6 +221,7 @@ class Tag(Node):
 
     @invalid.setter
     def invalid(self, value: bool) -> None:
+        touched(self)
         self._invalid = bool(value)
 
     @property
@@ -219,6 +236,7 @@ class Tag(Node):
 
     @implicit.setter
     def implicit(self, value: bool) -> None:
+        touched(self)
         self._implicit = bool(value)
 
     @property
@@ -228,6 +246,7 @@ class Tag(Node):
 
     @padding.setter
     def padding(self, value: str | None) -> None:
+        touched(self)
         if not value:
             self._padding = ""
         else:
@@ -247,6 +266,7 @@ class Tag(Node):
 
     @closing_tag.setter
     def closing_tag(self, value: Any) -> None:
+        touched(self)
         self._closing_tag = parse_anything(value)
 
     @property
@@ -259,6 +279,7 @@ class Tag(Node):
 
     @wiki_style_separator.setter
     def wiki_style_separator(self, value: str | None) -> None:
+        touched(self)
         self._wiki_style_separator = str(value) if value else None
 
     @property
@@ -276,6 +297,7 @@ class Tag(Node):
 
     @closing_wiki_markup.setter
     def closing_wiki_markup(self, value: str | None) -> None:
+        touched(self)
         self._closing_wiki_markup = str(value) if value else None
 
     def has(self, name: str | Attribute | Wikicode) -> bool:
@@ -331,6 +353,7 @@ class Tag(Node):
         attr.pad_before_eq = pad_before_eq
         attr.pad_after_eq = pad_after_eq
         self.attributes.append(attr)
+        touched(self)
         return attr
 
     def remove(self, name: str) -> None:
@@ -343,3 +366,4 @@ class Tag(Node):
             raise ValueError(name)
         for attr in attrs:
             self.attributes.remove(attr)
+        touched(self)
@@ -30,8 +30,9 @@ from typing import (
     overload,
 )
 
+from ..fingerprint import WatchedList, touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 from .extras import Parameter
 from .html_entity import HTMLEntity
 from .text import Text
@@ -50,16 +51,15 @@ T = TypeVar("T")
 class Template(Node):
     """Represents a template in wikicode, like ``{{foo}}``."""
 
+    _lists = ("_params",)
+
     def __init__(self, name: Any, params: list[Parameter] | None = None):
         super().__init__()
         self.name = name
-        self._params: list[Parameter] = params or []
+        self._params: list[Parameter] = params or WatchedList()
 
     def __str__(self) -> str:
-        if self.params:
-            params = "|".join([str(param) for param in self.params])
-            return "{{" + str(self.name) + "|" + params + "}}"
-        return "{{" + str(self.name) + "}}"
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode]:
         yield self.name
@@ -68,12 +68,40 @@ class Template(Node):
                 yield param.name
             yield param.value
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write("{{")
+        get(self.name)
+        for param in self.params:
+            write("|")
+            param.__render__(write, get)
+        write("}}")
+
     def __strip__(self, **kwargs: Any) -> str | None:
         if kwargs.get("keep_template_params"):
             parts = [param.value.strip_code(**kwargs) for param in self.params]
             return " ".join(part for part in parts if part)
         return None
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        if not kwargs.get("keep_template_params"):
+            return
+        start = len(out)
+        for param in self.params:
+            # Separate each parameter from the last one, unless it is empty:
+            if len(out) > start:
+                out.append(" ")
+            end = len(out)
+            strip(param.value)
+            if len(out) == end and end > start:
+                out.pop()
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -186,6 +214,7 @@ class Template(Node):
                 else:
                     self._fix_dependendent_params(i)
                     self.params.pop(i)
+                    touched(self)
                 return
         raise ValueError(needle)
 
@@ -209,6 +238,7 @@ class Template(Node):
 
     @name.setter
     def name(self, value: Any) -> None:
+        touched(self)
         self._name = parse_anything(value)
 
     @property
@@ -361,6 +391,7 @@ class Template(Node):
             self.params.insert(self.params.index(after) + 1, param)
         else:
             self.params.append(param)
+        touched(self)
         return param
 
     def update(self, params: Mapping[Any, Any], **kwargs: Any) -> None:
@@ -423,6 +454,7 @@ class Template(Node):
             raise ValueError(name)
         for i in reversed(to_remove):
             self.params.pop(i)
+        touched(self)
 
     def __delitem__(self, param: Parameter | str) -> None:
         return self.remove(param)
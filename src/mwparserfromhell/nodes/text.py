@@ -23,6 +23,7 @@ from __future__ import annotations
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ._base import Node
 
 if TYPE_CHECKING:
@@ -41,9 +42,24 @@ class Text(Node):
     def __str__(self) -> str:
         return self.value
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write(self.value)
+
     def __strip__(self, **kwargs: Any) -> str:
         return str(self)
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        value = self.value
+        if value:
+            out.append(value)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -59,4 +75,5 @@ class Text(Node):
 
     @value.setter
     def value(self, newval: Any) -> None:
+        touched(self)
         self._value = str(newval)
@@ -23,8 +23,9 @@ from __future__ import annotations
 from collections.abc import Callable, Generator
 from typing import TYPE_CHECKING, Any
 
+from ..fingerprint import touched
 from ..utils import parse_anything
-from ._base import Node
+from ._base import Node, render
 
 if TYPE_CHECKING:
     from ..wikicode import Wikicode
@@ -41,20 +42,36 @@ class Wikilink(Node):
         self.text = text
 
     def __str__(self) -> str:
-        if self.text is not None:
-            return "[[" + str(self.title) + "|" + str(self.text) + "]]"
-        return "[[" + str(self.title) + "]]"
+        return render(self)
 
     def __children__(self) -> Generator[Wikicode, None, None]:
         yield self.title
         if self.text is not None:
             yield self.text
 
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        write("[[")
+        get(self.title)
+        if self.text is not None:
+            write("|")
+            get(self.text)
+        write("]]")
+
     def __strip__(self, **kwargs: Any) -> str | None:
         if self.text is not None:
             return self.text.strip_code(**kwargs)
         return self.title.strip_code(**kwargs)
 
+    def __strip_into__(
+        self,
+        out: list[str],
+        strip: Callable[[Wikicode], None],
+        kwargs: dict[str, Any],
+    ) -> None:
+        strip(self.title if self.text is None else self.text)
+
     def __showtree__(
         self,
         write: Callable[[str], None],
@@ -76,6 +93,7 @@ class Wikilink(Node):
 
     @title.setter
     def title(self, value: Any) -> None:
+        touched(self)
         self._title = parse_anything(value)
 
     @property
@@ -85,6 +103,7 @@ class Wikilink(Node):
 
     @text.setter
     def text(self, value: Any) -> None:
+        touched(self)
         if value is None:
             self._text = None
         else:
@@ -26,8 +26,21 @@ together into one interface.
 
 from __future__ import annotations
 
+import codecs
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from ..nodes import Text
+from ..serialize import loads
+from ..smart_list import SmartList
+from ..wikicode import Wikicode
+from . import features
 from .builder import Builder
 from .errors import ParserError
+from .events import _iterbatches, iterevents
+from .incremental import IncrementalTokenizer, _join_text
+from .plaintext import strip_tokens
 
 try:
     from ._tokenizer import CTokenizer
@@ -37,7 +50,65 @@ except ImportError:
     CTokenizer = None
     use_c = False
 
-__all__ = ["use_c", "Parser", "ParserError"]
+__all__ = [
+    "use_c",
+    "Parser",
+    "ParserError",
+    "IncrementalTokenizer",
+    "RevisionParser",
+    "features",
+]
+
+# Lines that look like section headings, where a parallel parse may split:
+_SECTION = re.compile(r"^==.*==[ \t]*$", re.MULTILINE)
+# Pages are not split into chunks smaller than this, in characters:
+_MIN_CHUNK_SIZE = 16384
+# Runs of blank lines and line breaks before headings, where RevisionParser
+# splits pages into chunks:
+_BOUNDARY = re.compile(r"\n(?:\n+|(?===))")
+# Size of the pieces that iterparse() tokenizes text in, in characters or bytes:
+_PIECE_SIZE = 65536
+
+
+def _concat(codes):
+    """Join the trees of consecutive chunks of a page into a single tree."""
+    nodes = []
+    for code in codes:
+        first = code.nodes[0] if code.nodes else None
+        if nodes and isinstance(nodes[-1], Text) and isinstance(first, Text):
+            # A serial parse would have kept these as one text node:
+            nodes[-1] = Text(nodes[-1].value + first.value)
+            nodes.extend(code.nodes[1:])
+        else:
+            nodes.extend(code.nodes)
+    return Wikicode(SmartList(nodes))
+
+
+def _gil_enabled():
+    """Return whether the GIL is enabled, keeping threads from parsing at once.
+
+    This is always the case except on free-threaded builds of Python.
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+def _tokenize_pieces(text, skip_style_tags, features):
+    """Yield lists of tokens for *text*, tokenizing it a piece at a time.
+
+    Bytes-like objects are decoded from UTF-8 as they are read.
+    """
+    tokenizer = IncrementalTokenizer(skip_style_tags, features)
+    if isinstance(text, str):
+        for start in range(0, len(text), _PIECE_SIZE):
+            yield tokenizer.feed(text[start : start + _PIECE_SIZE])
+    else:
+        decoder = codecs.getincrementaldecoder("utf8")()
+        with memoryview(text) as buffer, buffer.cast("B") as view:
+            for start in range(0, view.nbytes, _PIECE_SIZE):
+                yield tokenizer.feed(decoder.decode(view[start : start + _PIECE_SIZE]))
+        yield tokenizer.feed(decoder.decode(b"", True))
+    yield tokenizer.close()
 
 
 class Parser:
@@ -65,9 +136,20 @@ class Parser:
             self._tokenizer = Tokenizer()
         self._builder = Builder()
 
-    def parse(self, text, context=0, skip_style_tags=False):
+    def parse(
+        self,
+        text,
+        context=0,
+        skip_style_tags=False,
+        features=features.ALL,
+        parallel=None,
+    ):
         """Parse *text*, returning a :class:`.Wikicode` object tree.
 
+        *text* is usually a string, but may also be a bytes-like object
+        holding UTF-8, such as ``bytes`` or an ``mmap``. The C tokenizer reads
+        these in place without decoding the whole input first.
+
         If given, *context* will be passed as a starting context to the parser.
         This is helpful when this function is used inside node attribute
         setters. For example, :class:`.ExternalLink`\\ 's
@@ -78,9 +160,231 @@ class Parser:
         If *skip_style_tags* is ``True``, then ``''`` and ``'''`` will not be
         parsed, but instead will be treated as plain text.
 
+        *features* limits parsing to part of the wikicode syntax. It is a
+        bitmask of the flags in :mod:`.features`, defaulting to
+        :const:`features.ALL <.features.ALL>`; markup belonging to a disabled
+        feature is never attempted and ends up in the tree as plain text.
+
+        If *parallel* is an integer greater than one, large pages are split at
+        section headings into chunks that are parsed by that many threads at
+        once. Every chunk is checked to end where nothing after it could
+        change how it parses; if one doesn't, the page is parsed again all at
+        once, so the result is always the same as a serial parse. Threads can
+        only parse at the same time without the GIL, so this requires a
+        free-threaded build of Python (3.13t or later) with the GIL disabled,
+        and is ignored otherwise. It is also ignored together with *context*.
+
         If there is an internal error while parsing, :exc:`.ParserError` will
         be raised.
         """
-        tokens = self._tokenizer.tokenize(text, context, skip_style_tags)
-        code = self._builder.build(tokens)
+        if parallel and parallel > 1 and not context and not _gil_enabled():
+            code = self._parse_parallel(text, parallel, skip_style_tags, features)
+            if code is not None:
+                return code
+        tokens = self._tokenizer.tokenize(text, context, skip_style_tags, features)
+        return self._builder.build(tokens)
+
+    def _parse_chunk(self, chunk, final, skip_style_tags, features):
+        """Parse one chunk of a page for :meth:`_parse_parallel`.
+
+        Return ``None`` if *chunk* isn't *final* and the page can't be safely
+        split after it.
+        """
+        if final:
+            tokens = self._tokenizer.tokenize(chunk, 0, skip_style_tags, features)
+        else:
+            # The extra newline lets the tokenizer see whether the chunk's own
+            # last line ended outside of everything:
+            tokens, length = self._tokenizer.tokenize_partial(
+                chunk + "\n", skip_style_tags, features
+            )
+            if length != len(chunk):
+                return None
+            tokens = _join_text(tokens, [])
+        return self._builder.build(tokens)
+
+    def _parse_parallel(self, text, workers, skip_style_tags, features):
+        """Parse *text* in chunks using a pool of *workers* threads.
+
+        Return ``None`` if *text* is too small to split, or if it can't be
+        split safely.
+        """
+        if not isinstance(text, str):
+            text = str(text, "utf8")
+        size = max(len(text) // (workers * 2), _MIN_CHUNK_SIZE)
+        starts = [0]
+        for match in _SECTION.finditer(text, size):
+            if match.start() - starts[-1] >= size:
+                starts.append(match.start())
+        if len(starts) == 1:
+            return None
+
+        ends = starts[1:] + [len(text)]
+        chunks = [text[start:end] for start, end in zip(starts, ends)]
+        finals = [False] * (len(chunks) - 1) + [True]
+        with ThreadPoolExecutor(workers) as pool:
+            codes = list(
+                pool.map(
+                    lambda chunk, final: Parser()._parse_chunk(
+                        chunk, final, skip_style_tags, features
+                    ),
+                    chunks,
+                    finals,
+                )
+            )
+        if any(code is None for code in codes):
+            return None
+        return _concat(codes)
+
+    def iterparse(self, text, context=0, skip_style_tags=False, features=features.ALL):
+        """Parse *text*, returning an iterator over parsing events.
+
+        This skips the :class:`.Builder` entirely, so no :class:`.Wikicode`
+        or :class:`.Node` objects are created. Instead, ``("start", name)``,
+        ``("text", value)``, and ``("end", name)`` tuples are yielded as
+        described in :mod:`.events`. Arguments are the same as for
+        :meth:`parse`.
+
+        The text is tokenized a piece at a time with an
+        :class:`.IncrementalTokenizer` as the events are consumed, so the
+        tokens of the whole text never exist at once, and bytes-like input is
+        decoded a piece at a time too. Tokenizing with a *context* can't be
+        done in pieces, so then the whole text is tokenized up front.
+        """
+        if context:
+            tokens = self._tokenizer.tokenize(text, context, skip_style_tags, features)
+            return iterevents(tokens)
+        return _iterbatches(_tokenize_pieces(text, skip_style_tags, features))
+
+    def strip(
+        self,
+        text,
+        context=0,
+        skip_style_tags=False,
+        features=features.ALL,
+        *,
+        normalize=True,
+        collapse=True,
+        keep_template_params=False,
+    ):
+        """Parse *text*, returning its printable text as a string.
+
+        The result is the same as that of calling :meth:`.Wikicode.strip_code`
+        on the tree from :meth:`parse`, but the :class:`.Builder` is skipped,
+        and the text is stripped straight from the tokens, which is several
+        times faster. *normalize*, *collapse*, and *keep_template_params* are
+        passed to :meth:`~.Wikicode.strip_code`; the other arguments are the
+        same as for :meth:`parse`.
+        """
+        tokens = self._tokenizer.tokenize(text, context, skip_style_tags, features)
+        return strip_tokens(tokens, normalize, collapse, keep_template_params)
+
+
+class RevisionParser:
+    """Parses successive revisions of a page, reusing the parts that didn't
+    change.
+
+    Each page passed to :meth:`parse` is split into chunks at blank lines and
+    before section headings. As with :meth:`Parser.parse(parallel=...)
+    <.Parser.parse>`, a chunk is only parsed on its own if it ends outside of
+    everything; if it doesn't, it is extended over the following chunks until
+    it does. The trees of the chunks of the last revision are kept, keyed on
+    their text, and any chunk of the next revision with the same text reuses
+    its tree instead of being tokenized again. The result is always the same as
+    parsing the whole revision with :meth:`Parser.parse`.
+
+    By default, kept chunks are stored in the format written by
+    :func:`.serialize.dumps` and loaded into new nodes when reused, so every
+    tree returned is independent of the others. If *share* is ``True``, the
+    nodes themselves are reused instead, which is faster and keeps their
+    cached :meth:`fingerprints <.Node.fingerprint>`, making :func:`.diff` of
+    consecutive revisions cheap; but then no tree returned may be modified,
+    since that would also change the others.
+
+    *skip_style_tags* and *features* are the same as for :meth:`Parser.parse`.
+    The numbers of chunks that were reused and that had to be parsed are
+    counted by :attr:`reused` and :attr:`parsed`.
+    """
+
+    def __init__(self, skip_style_tags=False, features=features.ALL, share=False):
+        self.skip_style_tags = skip_style_tags
+        self.features = features
+        self.share = share
+        self.reused = 0
+        self.parsed = 0
+        self._parser = Parser()
+        # (text, whether it ends the page) -> None if the text can't be parsed
+        # on its own, or else a list of its trees if sharing and a serialized
+        # tree if not:
+        self._chunks = {}
+
+    def _chunk(self, key, chunks, pool):
+        """Return the tree of the chunk *key*, or ``None`` if it can't be
+        parsed without what comes after it.
+
+        *chunks* holds what is kept of the chunks of the revision being
+        parsed, and *pool* the trees of the last revision that haven't been
+        reused yet, if sharing.
+        """
+        if chunks.get(key, ()) is None or self._chunks.get(key, ()) is None:
+            chunks[key] = None
+            return None
+        if self.share:
+            if key not in pool:
+                pool[key] = list(self._chunks.get(key, ()))
+            # A tree can't contain the same node twice, so each kept tree of a
+            # repeated chunk is only reused once:
+            if pool[key]:
+                code = pool[key].pop()
+                chunks.setdefault(key, []).append(code)
+                self.reused += 1
+                return code
+        else:
+            data = chunks.get(key) or self._chunks.get(key)
+            if data is not None:
+                chunks[key] = data
+                self.reused += 1
+                return loads(data)
+
+        code = self._parser._parse_chunk(
+            key[0], key[1], self.skip_style_tags, self.features
+        )
+        if code is None:
+            chunks[key] = None
+        else:
+            self.parsed += 1
+            if self.share:
+                chunks.setdefault(key, []).append(code)
+            else:
+                chunks[key] = code.dumps()
         return code
+
+    def parse(self, text):
+        """Parse *text*, the next revision of the page, returning a
+        :class:`.Wikicode` object tree.
+
+        *text* may be a string or a bytes-like object holding UTF-8.
+        """
+        if not isinstance(text, str):
+            text = str(text, "utf8")
+        ends = [match.end() for match in _BOUNDARY.finditer(text)]
+        ends.append(len(text))
+        chunks, pool, codes = {}, {}, []
+        start = index = 0
+        while start < len(text):
+            end = ends[index]
+            code = self._chunk((text[start:end], end == len(text)), chunks, pool)
+            while code is None:
+                # Grow the chunk to at least twice its size, so that a page
+                # that can't be split doesn't take quadratic time:
+                while ends[index] < len(text) and ends[index] - start < 2 * (
+                    end - start
+                ):
+                    index += 1
+                end = ends[index]
+                code = self._chunk((text[start:end], end == len(text)), chunks, pool)
+            codes.append(code)
+            start = end
+            index += 1
+        self._chunks = chunks
+        return _concat(codes)
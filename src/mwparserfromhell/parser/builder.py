@@ -20,6 +20,9 @@
 
 from __future__ import annotations
 
+import threading
+
+from ..fingerprint import WatchedList
 from ..nodes import (
     Argument,
     Comment,
@@ -41,6 +44,12 @@ __all__ = ["Builder"]
 
 _HANDLERS = {tokens.Text: lambda self, token: Text(token.text)}
 
+# Shared copies of short names, like "cite web" or "url"; see _intern_name():
+_NAMES: dict[str, str] = {}
+_NAMES_LOCK = threading.Lock()
+_MAX_NAME_LENGTH = 32
+_MAX_NAMES = 65536
+
 
 def _add_handler(token_type):
     """Create a decorator that adds a handler function to the lookup table."""
@@ -53,6 +62,25 @@ def _add_handler(token_type):
     return decorator
 
 
+def _intern_name(name):
+    """Return a shared copy of *name* if it is short enough to be one.
+
+    The same template, parameter, tag, and attribute names appear over and
+    over, so this saves a lot of memory when many trees are kept around. Once
+    the table is full, the oldest names are evicted to make room for new ones,
+    so that names common on later pages can still be shared.
+    """
+    if len(name) > _MAX_NAME_LENGTH:
+        return name
+    shared = _NAMES.get(name)
+    if shared is None:
+        with _NAMES_LOCK:
+            while len(_NAMES) >= _MAX_NAMES:
+                del _NAMES[next(iter(_NAMES))]
+            shared = _NAMES.setdefault(name, name)
+    return shared
+
+
 class Builder:
     """Builds a tree of nodes out of a sequence of tokens.
 
@@ -77,6 +105,19 @@ class Builder:
         """
         return Wikicode(SmartList(self._stacks.pop()))
 
+    def _pop_name(self):
+        """Pop the current node list off of the stack as a name.
+
+        This is like :meth:`_pop`, but text in the name is interned. The nodes
+        are new, so this skips :attr:`.Text.value`, which would check whether
+        there are cached fingerprints to invalidate.
+        """
+        nodes = self._stacks.pop()
+        for node in nodes:
+            if type(node) is Text:
+                node._value = _intern_name(node._value)
+        return Wikicode(SmartList(nodes))
+
     def _write(self, item):
         """Append a node to the current node list."""
         self._stacks[-1].append(item)
@@ -92,7 +133,7 @@ class Builder:
         while self._tokens:
             token = self._tokens.pop()
             if isinstance(token, tokens.TemplateParamEquals):
-                key = self._pop()
+                key = self._pop_name()
                 showkey = True
                 self._push()
             elif isinstance(
@@ -101,7 +142,7 @@ class Builder:
                 self._tokens.append(token)
                 value = self._pop()
                 if key is None:
-                    key = Wikicode(SmartList([Text(str(default))]))
+                    key = Wikicode(SmartList([Text(_intern_name(str(default)))]))
                 return Parameter(key, value, showkey)
             else:
                 self._write(self._handle_token(token))
@@ -111,21 +152,21 @@ class Builder:
     def _handle_template(self, token):
         """Handle a case where a template is at the head of the tokens."""
         name = None
-        params = []
+        params: list[Parameter] = WatchedList()
         default = 1
         self._push()
         while self._tokens:
             token = self._tokens.pop()
             if isinstance(token, tokens.TemplateParamSeparator):
                 if not params:
-                    name = self._pop()
+                    name = self._pop_name()
                 param = self._handle_parameter(default)
                 params.append(param)
                 if not param.showkey:
                     default += 1
             elif isinstance(token, tokens.TemplateClose):
                 if not params:
-                    name = self._pop()
+                    name = self._pop_name()
                 assert name is not None
                 return Template(name, params)
             else:
@@ -245,7 +286,7 @@ class Builder:
         while self._tokens:
             token = self._tokens.pop()
             if isinstance(token, tokens.TagAttrEquals):
-                name = self._pop()
+                name = self._pop_name()
                 self._push()
             elif isinstance(token, tokens.TagAttrQuote):
                 quotes = token.char
@@ -257,7 +298,7 @@ class Builder:
                 if name:
                     value = self._pop()
                 else:
-                    name, value = self._pop(), None
+                    name, value = self._pop_name(), None
                 return Attribute(
                     name,
                     value,
@@ -276,7 +317,7 @@ class Builder:
         close_tokens = (tokens.TagCloseSelfclose, tokens.TagCloseClose)
         tag = None
         padding = None
-        implicit, attrs, contents, closing_tag = False, [], None, None
+        implicit, attrs, contents, closing_tag = False, WatchedList(), None, None
         wiki_markup, invalid = token.wiki_markup, token.invalid or False
         wiki_style_separator, closing_wiki_markup = None, wiki_markup
         self._push()
@@ -287,7 +328,7 @@ class Builder:
             elif isinstance(token, tokens.TagCloseOpen):
                 wiki_style_separator = token.wiki_markup
                 padding = token.padding or ""
-                tag = self._pop()
+                tag = self._pop_name()
                 self._push()
             elif isinstance(token, tokens.TagOpenClose):
                 closing_wiki_markup = token.wiki_markup
@@ -296,13 +337,13 @@ class Builder:
             elif isinstance(token, close_tokens):
                 if isinstance(token, tokens.TagCloseSelfclose):
                     closing_wiki_markup = token.wiki_markup
-                    tag = self._pop()
+                    tag = self._pop_name()
                     self_closing = True
                     padding = token.padding or ""
                     implicit = token.implicit or False
                 else:
                     self_closing = False
-                    closing_tag = self._pop()
+                    closing_tag = self._pop_name()
                 assert tag is not None
                 assert padding is not None
                 return Tag(
@@ -59,12 +59,60 @@ SOFTWARE.
     } while (0)
 #define RESET_ROUTE() self->route_state = 0
 
-/* Shared globals */
+/* Module state */
 
-extern char **entitydefs;
+/*
+    Everything the tokenizer needs from Python is loaded into this struct when
+    the module is imported. Each interpreter that imports the module gets its
+    own copy, so none of it is shared between interpreters.
+*/
 
-extern PyObject *NOARGS;
-extern PyObject *definitions;
+#define TOKEN_TYPES(X)                                                                 \
+    X(Text)                                                                            \
+    X(TemplateOpen)                                                                    \
+    X(TemplateParamSeparator)                                                          \
+    X(TemplateParamEquals)                                                             \
+    X(TemplateClose)                                                                   \
+    X(ArgumentOpen)                                                                    \
+    X(ArgumentSeparator)                                                               \
+    X(ArgumentClose)                                                                   \
+    X(WikilinkOpen)                                                                    \
+    X(WikilinkSeparator)                                                               \
+    X(WikilinkClose)                                                                   \
+    X(ExternalLinkOpen)                                                                \
+    X(ExternalLinkSeparator)                                                           \
+    X(ExternalLinkClose)                                                               \
+    X(HTMLEntityStart)                                                                 \
+    X(HTMLEntityNumeric)                                                               \
+    X(HTMLEntityHex)                                                                   \
+    X(HTMLEntityEnd)                                                                   \
+    X(HeadingStart)                                                                    \
+    X(HeadingEnd)                                                                      \
+    X(CommentStart)                                                                    \
+    X(CommentEnd)                                                                      \
+    X(TagOpenOpen)                                                                     \
+    X(TagAttrStart)                                                                    \
+    X(TagAttrEquals)                                                                   \
+    X(TagAttrQuote)                                                                    \
+    X(TagCloseOpen)                                                                    \
+    X(TagCloseSelfclose)                                                               \
+    X(TagOpenClose)                                                                    \
+    X(TagCloseClose)
+
+typedef struct {
+    PyObject *tokenizer_type; /* the CTokenizer class */
+    PyObject *parser_error;   /* mwparserfromhell.parser.ParserError */
+    PyObject *noargs;         /* an empty tuple */
+    PyObject *span_kinds;     /* maps token types to their indices in __all__ */
+    PyObject *entity_names;   /* bytes objects that entitydefs points into */
+    char **entitydefs;        /* sorted names of valid HTML entities */
+    size_t num_entitydefs;
+#define DECLARE_TOKEN_TYPE(name) PyObject *token_##name;
+    TOKEN_TYPES(DECLARE_TOKEN_TYPE)
+#undef DECLARE_TOKEN_TYPE
+} ModuleState;
+
+#define NOARGS (self->state->noargs)
 
 /* Structs */
 
@@ -83,6 +131,7 @@ typedef struct {
 
 struct Stack {
     PyObject *stack;
+    PyObject *head; /* tokens emitted first, in reverse order; may be NULL */
     uint64_t context;
     Textbuffer *textbuffer;
     StackIdent ident;
@@ -91,12 +140,20 @@ struct Stack {
 typedef struct Stack Stack;
 
 typedef struct {
-    PyObject *object;  /* base PyUnicodeObject object */
-    Py_ssize_t length; /* length of object, in code points */
-    int kind;          /* object's kind value */
-    void *data;        /* object's raw unicode buffer */
+    PyObject *object;         /* base PyUnicodeObject or buffer object */
+    Py_ssize_t length;        /* length of object, in code points */
+    int kind;                 /* object's kind value, or 0 for UTF-8 */
+    void *data;               /* object's raw unicode buffer */
+    Py_UCS4 maxchar;          /* bound on the largest code point in data */
+    Py_buffer buffer;         /* buffer view of object, if UTF-8 */
+    Py_ssize_t size;          /* length of data, in bytes, if UTF-8 */
+    Py_ssize_t ascii;         /* length of data's ASCII prefix, if UTF-8 */
+    Py_ssize_t cursor_index;  /* code point index of the last UTF-8 read */
+    Py_ssize_t cursor_offset; /* byte offset of the last UTF-8 read */
 } TokenizerInput;
 
+#define UTF8_KIND 0
+
 typedef struct avl_tree_node avl_tree;
 
 typedef struct {
@@ -106,6 +163,7 @@ typedef struct {
 
 typedef struct {
     PyObject_HEAD
+    ModuleState *state;     /* state of the module that made this tokenizer */
     TokenizerInput text;    /* text to tokenize */
     Stack *topstack;        /* topmost stack */
     Py_ssize_t head;        /* current position in text */
@@ -115,4 +173,11 @@ typedef struct {
     uint64_t route_context; /* context when the last BadRoute was triggered */
     avl_tree *bad_routes;   /* stack idents for routes known to fail */
     int skip_style_tags;    /* temp fix for the sometimes broken tag parser */
+    int features;           /* syntax features to recognize */
+    int partial;            /* whether to track which tokens are final */
+    int spans;              /* whether to make span records, not tokens */
+    int hit_end;            /* whether we have read past the end of the text */
+    Py_ssize_t safe_head;   /* length of the text covered by final tokens */
+    Py_ssize_t safe_tokens; /* number of final tokens */
+    PyThread_type_lock lock; /* held while tokenizing */
 } Tokenizer;
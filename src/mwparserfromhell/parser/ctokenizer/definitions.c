@@ -27,129 +27,161 @@ SOFTWARE.
     See the Python version for data sources.
 */
 
-// clang-format off
-static const char *URI_SCHEMES[] = {
-    "bitcoin",
-    "ftp",
-    "ftps",
-    "geo",
-    "git",
-    "gopher",
-    "http",
-    "https",
-    "irc",
-    "ircs",
-    "magnet",
-    "mailto",
-    "mms",
-    "news",
-    "nntp",
-    "redis",
-    "sftp",
-    "sip",
-    "sips",
-    "sms",
-    "ssh",
-    "svn",
-    "tel",
-    "telnet",
-    "urn",
-    "worldwind",
-    "xmpp",
-    NULL,
-};
+#define DEF_URI_SCHEME                    0x01
+#define DEF_URI_SCHEME_AUTHORITY_OPTIONAL 0x02
+#define DEF_PARSER_BLACKLIST              0x04
+#define DEF_SINGLE                        0x08
+#define DEF_SINGLE_ONLY                   0x10
 
-static const char *URI_SCHEMES_AUTHORITY_OPTIONAL[] = {
-    "bitcoin",
-    "geo",
-    "magnet",
-    "mailto",
-    "news",
-    "sip",
-    "sips",
-    "sms",
-    "tel",
-    "urn",
-    "xmpp",
-    NULL,
-};
+typedef struct {
+    const char *name;
+    int flags;
+} Definition;
 
-static const char *PARSER_BLACKLIST[] = {
-    "categorytree",
-    "ce",
-    "chem",
-    "gallery",
-    "graph",
-    "hiero",
-    "imagemap",
-    "inputbox",
-    "math",
-    "nowiki",
-    "pre",
-    "score",
-    "section",
-    "source",
-    "syntaxhighlight",
-    "templatedata",
-    "timeline",
-    NULL,
+/*
+    All known tag names and URI schemes, with the classes they belong to. This
+    table must be kept sorted by name so that it can be binary searched.
+*/
+// clang-format off
+static const Definition DEFINITIONS[] = {
+    {"bitcoin",         DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"br",              DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"categorytree",    DEF_PARSER_BLACKLIST},
+    {"ce",              DEF_PARSER_BLACKLIST},
+    {"chem",            DEF_PARSER_BLACKLIST},
+    {"dd",              DEF_SINGLE},
+    {"dt",              DEF_SINGLE},
+    {"ftp",             DEF_URI_SCHEME},
+    {"ftps",            DEF_URI_SCHEME},
+    {"gallery",         DEF_PARSER_BLACKLIST},
+    {"geo",             DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"git",             DEF_URI_SCHEME},
+    {"gopher",          DEF_URI_SCHEME},
+    {"graph",           DEF_PARSER_BLACKLIST},
+    {"hiero",           DEF_PARSER_BLACKLIST},
+    {"hr",              DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"http",            DEF_URI_SCHEME},
+    {"https",           DEF_URI_SCHEME},
+    {"imagemap",        DEF_PARSER_BLACKLIST},
+    {"img",             DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"inputbox",        DEF_PARSER_BLACKLIST},
+    {"irc",             DEF_URI_SCHEME},
+    {"ircs",            DEF_URI_SCHEME},
+    {"li",              DEF_SINGLE},
+    {"link",            DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"magnet",          DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"mailto",          DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"math",            DEF_PARSER_BLACKLIST},
+    {"meta",            DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"mms",             DEF_URI_SCHEME},
+    {"news",            DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"nntp",            DEF_URI_SCHEME},
+    {"nowiki",          DEF_PARSER_BLACKLIST},
+    {"pre",             DEF_PARSER_BLACKLIST},
+    {"redis",           DEF_URI_SCHEME},
+    {"score",           DEF_PARSER_BLACKLIST},
+    {"section",         DEF_PARSER_BLACKLIST},
+    {"sftp",            DEF_URI_SCHEME},
+    {"sip",             DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"sips",            DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"sms",             DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"source",          DEF_PARSER_BLACKLIST},
+    {"ssh",             DEF_URI_SCHEME},
+    {"svn",             DEF_URI_SCHEME},
+    {"syntaxhighlight", DEF_PARSER_BLACKLIST},
+    {"td",              DEF_SINGLE},
+    {"tel",             DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"telnet",          DEF_URI_SCHEME},
+    {"templatedata",    DEF_PARSER_BLACKLIST},
+    {"th",              DEF_SINGLE},
+    {"timeline",        DEF_PARSER_BLACKLIST},
+    {"tr",              DEF_SINGLE},
+    {"urn",             DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
+    {"wbr",             DEF_SINGLE | DEF_SINGLE_ONLY},
+    {"worldwind",       DEF_URI_SCHEME},
+    {"xmpp",            DEF_URI_SCHEME | DEF_URI_SCHEME_AUTHORITY_OPTIONAL},
 };
 // clang-format on
 
-static const char *SINGLE[] = {
-    "br", "wbr", "hr", "meta", "link", "img", "li", "dt", "dd", "th", "td", "tr", NULL};
-
-static const char *SINGLE_ONLY[] = {"br", "wbr", "hr", "meta", "link", "img", NULL};
+#define NUM_DEFINITIONS (sizeof(DEFINITIONS) / sizeof(Definition))
 
 /*
-    Convert a PyUnicodeObject to a lowercase ASCII char* array and store it in
-    the second argument. The caller must free the return value when finished.
-    If the return value is NULL, the conversion failed and *string is not set.
+    Return the lowercase ASCII form of a codepoint, or 0 if it has none. This
+    matches what str.lower() followed by an ASCII encode would accept.
 */
-static PyObject *
-unicode_to_lcase_ascii(PyObject *input, const char **string)
+static Py_UCS4
+lcase_ascii(Py_UCS4 code)
 {
-    PyObject *lower = PyObject_CallMethod(input, "lower", NULL), *bytes;
-
-    if (!lower) {
-        return NULL;
+    if (code < 128) {
+        return Py_UNICODE_TOLOWER(code);
     }
-    bytes = PyUnicode_AsASCIIString(lower);
-    Py_DECREF(lower);
-    if (!bytes) {
-        if (PyErr_Occurred() && PyErr_ExceptionMatches(PyExc_UnicodeEncodeError)) {
-            PyErr_Clear();
-        }
-        return NULL;
+    // U+0130 is the only codepoint whose full lowercase mapping is more than
+    // one character; str.lower() gives "i\u0307", which is not ASCII.
+    if (code == 0x130) {
+        return 0;
     }
-    *string = PyBytes_AS_STRING(bytes);
-    return bytes;
+    code = Py_UNICODE_TOLOWER(code);
+    return code < 128 ? code : 0;
 }
 
 /*
-    Return whether a PyUnicodeObject is in a list of lowercase ASCII strings.
+    Compare a raw Unicode buffer against a lowercase ASCII string, ignoring the
+    case of the buffer. Returns <0, 0, or >0 in the manner of strcmp().
 */
 static int
-unicode_in_string_list(PyObject *input, const char **list)
+compare_ucs(int kind, const void *data, Py_ssize_t length, const char *string)
 {
-    const char *string;
-    PyObject *temp = unicode_to_lcase_ascii(input, &string);
-    int retval = 0;
+    Py_ssize_t i;
+    Py_UCS4 code;
 
-    if (!temp) {
-        return 0;
+    for (i = 0; i < length; i++) {
+        if (!string[i]) {
+            return 1;
+        }
+        code = lcase_ascii(PyUnicode_READ(kind, data, i));
+        if (!code) {
+            return 1;
+        }
+        if (code != (Py_UCS4) string[i]) {
+            return code < (Py_UCS4) string[i] ? -1 : 1;
+        }
     }
+    return string[i] ? -1 : 0;
+}
 
-    while (*list) {
-        if (!strcmp(*(list++), string)) {
-            retval = 1;
-            goto end;
+/*
+    Return the class flags of the name stored in a raw Unicode buffer, or 0 if
+    the name is not known. No Python objects are created.
+*/
+static int
+lookup_definition(int kind, const void *data, Py_ssize_t length)
+{
+    size_t lo = 0, hi = NUM_DEFINITIONS, mid;
+    int cmp;
+
+    while (lo < hi) {
+        mid = lo + (hi - lo) / 2;
+        cmp = compare_ucs(kind, data, length, DEFINITIONS[mid].name);
+        if (cmp == 0) {
+            return DEFINITIONS[mid].flags;
+        }
+        if (cmp < 0) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
         }
     }
+    return 0;
+}
 
-end:
-    Py_DECREF(temp);
-    return retval;
+/*
+    Return the class flags of the name in a PyUnicodeObject.
+*/
+static int
+lookup_unicode(PyObject *input)
+{
+    return lookup_definition(
+        PyUnicode_KIND(input), PyUnicode_DATA(input), PyUnicode_GET_LENGTH(input));
 }
 
 /*
@@ -158,7 +190,7 @@ end:
 int
 is_parsable(PyObject *tag)
 {
-    return !unicode_in_string_list(tag, PARSER_BLACKLIST);
+    return !(lookup_unicode(tag) & DEF_PARSER_BLACKLIST);
 }
 
 /*
@@ -167,7 +199,7 @@ is_parsable(PyObject *tag)
 int
 is_single(PyObject *tag)
 {
-    return unicode_in_string_list(tag, SINGLE);
+    return !!(lookup_unicode(tag) & DEF_SINGLE);
 }
 
 /*
@@ -176,18 +208,51 @@ is_single(PyObject *tag)
 int
 is_single_only(PyObject *tag)
 {
-    return unicode_in_string_list(tag, SINGLE_ONLY);
+    return !!(lookup_unicode(tag) & DEF_SINGLE_ONLY);
 }
 
 /*
-    Return whether the given scheme is valid for external links.
+    Return whether the scheme in the given textbuffer is valid for external
+    links.
 */
 int
-is_scheme(PyObject *scheme, int slashes)
+is_scheme(Textbuffer *scheme, int slashes)
 {
+    int flags = lookup_definition(scheme->kind, scheme->data, scheme->length);
+
     if (slashes) {
-        return unicode_in_string_list(scheme, URI_SCHEMES);
-    } else {
-        return unicode_in_string_list(scheme, URI_SCHEMES_AUTHORITY_OPTIONAL);
+        return !!(flags & DEF_URI_SCHEME);
     }
+    return !!(flags & DEF_URI_SCHEME_AUTHORITY_OPTIONAL);
+}
+
+/*
+    Compare two entity names for qsort() and bsearch().
+*/
+static int
+compare_entities(const void *a, const void *b)
+{
+    return strcmp(*(const char **) a, *(const char **) b);
+}
+
+/*
+    Sort the given array of entity names so that is_entity() can search it.
+*/
+void
+sort_entities(char **defs, size_t count)
+{
+    qsort(defs, count, sizeof(char *), compare_entities);
+}
+
+/*
+    Return whether the given name is a known HTML entity.
+*/
+int
+is_entity(ModuleState *state, const char *name)
+{
+    return bsearch(&name,
+                   state->entitydefs,
+                   state->num_entitydefs,
+                   sizeof(char *),
+                   compare_entities) != NULL;
 }
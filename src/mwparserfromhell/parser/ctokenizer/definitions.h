@@ -31,7 +31,9 @@ SOFTWARE.
 int is_parsable(PyObject *);
 int is_single(PyObject *);
 int is_single_only(PyObject *);
-int is_scheme(PyObject *, int);
+int is_scheme(Textbuffer *, int);
+int is_entity(ModuleState *, const char *);
+void sort_entities(char **, size_t);
 
 /* Macros */
 
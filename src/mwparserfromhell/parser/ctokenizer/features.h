@@ -0,0 +1,34 @@
+/*
+Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+*/
+#pragma once
+
+/* Syntax features; see mwparserfromhell/parser/features.py */
+
+#define FT_EXT_LINKS 0x01
+#define FT_TAGS      0x02
+#define FT_TABLES    0x04
+#define FT_ENTITIES  0x08
+#define FT_HEADINGS  0x10
+#define FT_LISTS     0x20
+
+#define FT_ALL                                                                         \
+    (FT_EXT_LINKS | FT_TAGS | FT_TABLES | FT_ENTITIES | FT_HEADINGS | FT_LISTS)
@@ -0,0 +1,387 @@
+/*
+Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+*/
+
+#define TOKEN_STATE state
+
+#include "spans.h"
+#include "tok_support.h"
+#include "tokens.h"
+
+/*
+    This file should be kept up to date with _build_spans() in
+    mwparserfromhell/parser/tokenizer.py.
+*/
+
+/* Sections of a tag, used to tell whether its name is part of the source. */
+
+#define TAG_NAME       0
+#define TAG_ATTRS      1
+#define TAG_BODY       2
+#define TAG_CLOSE      3
+
+#define INITIAL_FRAMES 16
+
+typedef struct {
+    PyObject *type;         /* type of the token that opened this node */
+    Py_ssize_t width;       /* width of the opening markup */
+    Py_ssize_t wiki_markup; /* length of a tag's wiki markup, or 0 */
+    int section;            /* which part of a tag we are in */
+    Py_ssize_t pending;     /* width of attribute text that has no token */
+    Py_ssize_t after_eq;    /* length of the attribute's pad_after_eq */
+} SpanFrame;
+
+typedef struct {
+    long long *data;
+    Py_ssize_t length;
+} SpanArray;
+
+/*
+    Load the kind of each token type from the given tokens module into the
+    given module state: the index of the type's name in __all__.
+*/
+int
+load_span_kinds(ModuleState *state, PyObject *module)
+{
+    PyObject *span_kinds;
+    PyObject *names, *type, *kind;
+    Py_ssize_t i, size;
+
+    names = PyObject_GetAttrString(module, "__all__");
+    if (!names) {
+        return -1;
+    }
+    span_kinds = state->span_kinds = PyDict_New();
+    if (!span_kinds) {
+        Py_DECREF(names);
+        return -1;
+    }
+    size = PyList_GET_SIZE(names);
+    for (i = 0; i < size; i++) {
+        type = PyObject_GetAttr(module, PyList_GET_ITEM(names, i));
+        if (!type) {
+            Py_DECREF(names);
+            return -1;
+        }
+        kind = PyLong_FromSsize_t(i);
+        if (!kind || PyDict_SetItem(span_kinds, type, kind)) {
+            Py_XDECREF(kind);
+            Py_DECREF(type);
+            Py_DECREF(names);
+            return -1;
+        }
+        Py_DECREF(kind);
+        Py_DECREF(type);
+    }
+    Py_DECREF(names);
+    return 0;
+}
+
+/*
+    Return the length of a token's string attribute, or 0 if it is missing.
+    Tokens may also be the span records made by Tokenizer_new_token().
+*/
+static Py_ssize_t
+attr_length(PyObject *token, const char *attr)
+{
+    PyObject *value = token_attr(token, attr);
+
+    if (!value || !PyUnicode_Check(value)) {
+        return 0;
+    }
+    return PyUnicode_GET_LENGTH(value);
+}
+
+/*
+    Return whether a token's attribute is truthy, or -1 on error.
+*/
+static int
+attr_true(PyObject *token, const char *attr)
+{
+    PyObject *value = token_attr(token, attr);
+
+    return value ? PyObject_IsTrue(value) : 0;
+}
+
+/*
+    Return whether a token's attribute is set to something other than None.
+*/
+static int
+attr_present(PyObject *token, const char *attr)
+{
+    PyObject *value = token_attr(token, attr);
+
+    return value && value != Py_None;
+}
+
+/*
+    Return the fixed width of a token type, or -1 if its width is variable.
+*/
+static Py_ssize_t
+fixed_width(ModuleState *state, PyObject *type)
+{
+    if (type == TemplateOpen || type == TemplateClose || type == WikilinkOpen ||
+        type == WikilinkClose) {
+        return 2;
+    }
+    if (type == TemplateParamSeparator || type == TemplateParamEquals ||
+        type == ArgumentSeparator || type == WikilinkSeparator ||
+        type == HTMLEntityStart || type == HTMLEntityNumeric || type == HTMLEntityEnd) {
+        return 1;
+    }
+    if (type == ArgumentOpen || type == ArgumentClose || type == CommentEnd) {
+        return 3;
+    }
+    if (type == CommentStart) {
+        return 4;
+    }
+    return -1;
+}
+
+static int
+is_opener(ModuleState *state, PyObject *type)
+{
+    return (type == TemplateOpen || type == ArgumentOpen || type == WikilinkOpen ||
+            type == ExternalLinkOpen || type == HTMLEntityStart ||
+            type == HeadingStart || type == CommentStart || type == TagOpenOpen);
+}
+
+static int
+is_closer(ModuleState *state, PyObject *type)
+{
+    return (type == TemplateClose || type == ArgumentClose || type == WikilinkClose ||
+            type == ExternalLinkClose || type == HTMLEntityEnd || type == HeadingEnd ||
+            type == CommentEnd || type == TagCloseSelfclose || type == TagCloseClose);
+}
+
+/*
+    Work out how much of the source text a token covers. Returns -1 on error.
+*/
+static Py_ssize_t
+token_width(ModuleState *state, PyObject *token, PyObject *type, SpanFrame *frame)
+{
+    SpanFrame *tag = (frame && frame->type == TagOpenOpen) ? frame : NULL;
+    Py_ssize_t width = fixed_width(state, type);
+    int truth;
+
+    if (width >= 0) {
+        return width;
+    }
+    if (type == Text) {
+        // Tag names aren't written out for wiki-markup tags
+        if (tag && tag->wiki_markup &&
+            (tag->section == TAG_NAME || tag->section == TAG_CLOSE)) {
+            return 0;
+        }
+        return attr_length(token, "text");
+    }
+    if (type == ExternalLinkOpen) {
+        return attr_true(token, "brackets");
+    }
+    if (type == ExternalLinkSeparator) {
+        return token_attr(token, "suppress_space") == Py_True ? 0 : 1;
+    }
+    if (type == ExternalLinkClose || type == HeadingEnd) {
+        return frame->width;
+    }
+    if (type == HTMLEntityHex) {
+        return attr_length(token, "char");
+    }
+    if (type == HeadingStart) {
+        PyObject *level = token_attr(token, "level");
+        return level ? PyLong_AsSsize_t(level) : 0;
+    }
+    if (type == TagOpenOpen) {
+        width = attr_length(token, "wiki_markup");
+        if (width) {
+            return width;
+        }
+        truth = attr_true(token, "invalid");
+        return truth < 0 ? -1 : truth + 1;
+    }
+    if (!tag) {
+        goto unexpected;
+    }
+    if (type == TagAttrStart) {
+        width = tag->pending + attr_length(token, "pad_first");
+        tag->section = TAG_ATTRS;
+        tag->pending = attr_length(token, "pad_before_eq");
+        tag->after_eq = attr_length(token, "pad_after_eq");
+        return width;
+    }
+    if (type == TagAttrEquals) {
+        width = tag->pending + 1 + tag->after_eq;
+        tag->pending = 0;
+        return width;
+    }
+    if (type == TagAttrQuote) {
+        return tag->pending = attr_length(token, "char");
+    }
+    if (type == TagCloseOpen) {
+        width = tag->pending + attr_length(token, "padding");
+        width += tag->wiki_markup ? attr_length(token, "wiki_markup") : 1;
+        tag->section = TAG_BODY;
+        tag->pending = 0;
+        return width;
+    }
+    if (type == TagCloseSelfclose) {
+        width = tag->pending + attr_length(token, "padding");
+        if (!tag->wiki_markup) {
+            truth = attr_true(token, "implicit");
+            if (truth < 0) {
+                return -1;
+            }
+            width += truth ? 1 : 2;
+        }
+        return width;
+    }
+    if (type == TagOpenClose) {
+        tag->section = TAG_CLOSE;
+        if (!tag->wiki_markup) {
+            return 2;
+        }
+        if (!attr_present(token, "wiki_markup")) {
+            return tag->wiki_markup;
+        }
+        return attr_length(token, "wiki_markup");
+    }
+    if (type == TagCloseClose) {
+        return tag->wiki_markup ? 0 : 1;
+    }
+
+unexpected:
+    PyErr_Format(state->parser_error,
+                 "cannot find the span of unexpected %s",
+                 ((PyTypeObject *) type)->tp_name);
+    return -1;
+}
+
+/*
+    Convert an array of integers into an array.array object.
+*/
+static PyObject *
+make_array(PyObject *arraymod, SpanArray *array)
+{
+    return PyObject_CallMethod(arraymod,
+                               "array",
+                               "sy#",
+                               "q",
+                               (const char *) array->data,
+                               array->length * (Py_ssize_t) sizeof(long long));
+}
+
+/*
+    Return the kinds, spans, and depths of a list of tokens or span records as
+    a tuple of four array.array objects. This mirrors _build_spans() in the
+    Python tokenizer.
+*/
+PyObject *
+build_spans(ModuleState *state, PyObject *tokenlist)
+{
+    Py_ssize_t size = PyList_GET_SIZE(tokenlist), i, head = 0, width;
+    Py_ssize_t nframes = 0, maxframes = INITIAL_FRAMES, depth = 0, level;
+    SpanFrame *frames, *frame, *newframes;
+    SpanArray arrays[4];
+    PyObject *token, *type, *kind, *arraymod, *result = NULL, *items[4] = {0};
+    int j;
+
+    arraymod = PyImport_ImportModule("array");
+    if (!arraymod) {
+        return NULL;
+    }
+    frames = malloc(maxframes * sizeof(SpanFrame));
+    for (j = 0; j < 4; j++) {
+        arrays[j].data = malloc((size ? size : 1) * sizeof(long long));
+        arrays[j].length = 0;
+    }
+    if (!frames || !arrays[0].data || !arrays[1].data || !arrays[2].data ||
+        !arrays[3].data) {
+        PyErr_NoMemory();
+        goto end;
+    }
+
+    for (i = 0; i < size; i++) {
+        token = PyList_GET_ITEM(tokenlist, i);
+        type = token_type(token);
+        frame = nframes ? &frames[nframes - 1] : NULL;
+        level = (type == Text) ? depth : depth - 1;
+
+        if ((!frame && (type == ExternalLinkClose || type == HeadingEnd)) ||
+            (width = token_width(state, token, type, frame)) < 0) {
+            if (!PyErr_Occurred()) {
+                PyErr_SetString(state->parser_error, "malformed token list");
+            }
+            goto end;
+        }
+
+        if (is_opener(state, type)) {
+            if (nframes == maxframes) {
+                maxframes *= 2;
+                newframes = realloc(frames, maxframes * sizeof(SpanFrame));
+                if (!newframes) {
+                    PyErr_NoMemory();
+                    goto end;
+                }
+                frames = newframes;
+            }
+            frame = &frames[nframes++];
+            frame->type = type;
+            frame->width = width;
+            frame->wiki_markup =
+                type == TagOpenOpen ? attr_length(token, "wiki_markup") : 0;
+            frame->section = TAG_NAME;
+            frame->pending = frame->after_eq = 0;
+            level = depth++;
+        } else if (is_closer(state, type)) {
+            if (!nframes) {
+                PyErr_SetString(state->parser_error, "malformed token list");
+                goto end;
+            }
+            nframes--;
+            level = --depth;
+        }
+
+        kind = PyDict_GetItem(state->span_kinds, type);
+        arrays[0].data[i] = kind ? PyLong_AsLongLong(kind) : -1;
+        arrays[1].data[i] = head;
+        head += width;
+        arrays[2].data[i] = head;
+        arrays[3].data[i] = level;
+    }
+
+    for (j = 0; j < 4; j++) {
+        arrays[j].length = size;
+        items[j] = make_array(arraymod, &arrays[j]);
+        if (!items[j]) {
+            goto end;
+        }
+    }
+    result = PyTuple_Pack(4, items[0], items[1], items[2], items[3]);
+
+end:
+    for (j = 0; j < 4; j++) {
+        Py_XDECREF(items[j]);
+        free(arrays[j].data);
+    }
+    free(frames);
+    Py_DECREF(arraymod);
+    return result;
+}
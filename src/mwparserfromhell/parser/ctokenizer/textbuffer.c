@@ -84,9 +84,7 @@ Textbuffer *
 Textbuffer_new(TokenizerInput *text)
 {
     Textbuffer *self = malloc(sizeof(Textbuffer));
-    Py_UCS4 maxchar = 0;
-
-    maxchar = PyUnicode_MAX_CHAR_VALUE(text->object);
+    Py_UCS4 maxchar = text->maxchar;
 
     if (!self) {
         goto fail_nomem;
@@ -23,6 +23,7 @@ SOFTWARE.
 #include "tok_parse.h"
 #include "contexts.h"
 #include "definitions.h"
+#include "features.h"
 #include "tag_data.h"
 #include "tok_support.h"
 #include "tokens.h"
@@ -80,29 +81,116 @@ heading_level_from_context(uint64_t n)
 }
 
 /*
-    Sanitize the name of a tag so it can be compared with others for equality.
+    Return a borrowed reference to an attribute of a token, like "text", or NULL
+    with an exception set if the attribute is missing.
 */
 static PyObject *
-strip_tag_name(PyObject *token, int take_attr)
+get_token_attr(PyObject *token, const char *attr)
 {
-    PyObject *text, *rstripped, *lowered;
+    PyObject *value = token_attr(token, attr);
 
-    if (take_attr) {
-        text = PyObject_GetAttrString(token, "text");
-        if (!text) {
-            return NULL;
+    if (!value) {
+        PyErr_SetString(PyExc_KeyError, attr);
+    }
+    return value;
+}
+
+/*
+    Return the length of a tag name without its trailing whitespace.
+*/
+static Py_ssize_t
+rstripped_length(int kind, const void *data, Py_ssize_t length)
+{
+    while (length > 0 && Py_UNICODE_ISSPACE(PyUnicode_READ(kind, data, length - 1))) {
+        length--;
+    }
+    return length;
+}
+
+/*
+    Compare two tag names the slow way, with str.lower(). This is only needed
+    for non-ASCII names, whose full case mappings we don't replicate in C.
+*/
+static int
+compare_tag_names_unicode(int kind1,
+                          const void *data1,
+                          Py_ssize_t len1,
+                          int kind2,
+                          const void *data2,
+                          Py_ssize_t len2)
+{
+    PyObject *name1, *name2, *lower1 = NULL, *lower2 = NULL;
+    int retval = -1;
+
+    name1 = PyUnicode_FromKindAndData(kind1, data1, len1);
+    name2 = PyUnicode_FromKindAndData(kind2, data2, len2);
+    if (name1 && name2) {
+        lower1 = PyObject_CallMethod(name1, "lower", NULL);
+        lower2 = PyObject_CallMethod(name2, "lower", NULL);
+        if (lower1 && lower2) {
+            retval = PyUnicode_Compare(lower1, lower2) == 0;
+            if (retval == 0 && PyErr_Occurred()) {
+                retval = -1;
+            }
+        }
+    }
+    Py_XDECREF(name1);
+    Py_XDECREF(name2);
+    Py_XDECREF(lower1);
+    Py_XDECREF(lower2);
+    return retval;
+}
+
+/*
+    Compare two tag names for equality, ignoring trailing whitespace and case.
+    Returns 1 if they are equal, 0 if not, and -1 on error.
+*/
+static int
+compare_tag_names(int kind1,
+                  const void *data1,
+                  Py_ssize_t len1,
+                  int kind2,
+                  const void *data2,
+                  Py_ssize_t len2)
+{
+    Py_ssize_t i;
+    Py_UCS4 c1, c2;
+    int equal;
+
+    len1 = rstripped_length(kind1, data1, len1);
+    len2 = rstripped_length(kind2, data2, len2);
+    equal = len1 == len2;
+    for (i = 0; i < len1 || i < len2; i++) {
+        c1 = i < len1 ? PyUnicode_READ(kind1, data1, i) : 0;
+        c2 = i < len2 ? PyUnicode_READ(kind2, data2, i) : 0;
+        if (c1 >= 128 || c2 >= 128) {
+            return compare_tag_names_unicode(kind1, data1, len1, kind2, data2, len2);
+        }
+        if (equal && Py_TOLOWER(c1) != Py_TOLOWER(c2)) {
+            equal = 0;
         }
-        rstripped = PyObject_CallMethod(text, "rstrip", NULL);
-        Py_DECREF(text);
-    } else {
-        rstripped = PyObject_CallMethod(token, "rstrip", NULL);
     }
-    if (!rstripped) {
-        return NULL;
+    return equal;
+}
+
+/*
+    Compare the given tag name with the one in the Text token at index 1 of
+    the current stack (the name of the open tag).
+*/
+static int
+Tokenizer_tag_name_matches(Tokenizer *self, int kind, const void *data, Py_ssize_t len)
+{
+    PyObject *open = get_token_attr(PyList_GET_ITEM(self->topstack->stack, 1), "text");
+
+    if (!open) {
+        return -1;
     }
-    lowered = PyObject_CallMethod(rstripped, "lower", NULL);
-    Py_DECREF(rstripped);
-    return lowered;
+    return compare_tag_names(PyUnicode_KIND(open),
+                             PyUnicode_DATA(open),
+                             PyUnicode_GET_LENGTH(open),
+                             kind,
+                             data,
+                             len);
 }
 
 /*
@@ -387,7 +475,12 @@ Tokenizer_parse_wikilink(Tokenizer *self)
     reset = self->head + 1;
     self->head += 2;
     // If the wikilink looks like an external link, parse it as such:
-    extlink = Tokenizer_really_parse_external_link(self, 1, NULL);
+    if (self->features & FT_EXT_LINKS) {
+        extlink = Tokenizer_really_parse_external_link(self, 1, NULL);
+    } else {
+        extlink = NULL;
+        FAIL_ROUTE(0);
+    }
     if (BAD_ROUTE) {
         RESET_ROUTE();
         self->head = reset + 1;
@@ -489,7 +582,6 @@ Tokenizer_parse_bracketed_uri_scheme(Tokenizer *self)
 {
     static const char *valid = URISCHEME;
     Textbuffer *buffer;
-    PyObject *scheme;
     Py_UCS4 this;
     int slashes, i;
 
@@ -546,17 +638,12 @@ Tokenizer_parse_bracketed_uri_scheme(Tokenizer *self)
             }
             self->head += 2;
         }
-        scheme = Textbuffer_render(buffer);
-        Textbuffer_dealloc(buffer);
-        if (!scheme) {
-            return -1;
-        }
-        if (!is_scheme(scheme, slashes)) {
-            Py_DECREF(scheme);
+        if (!is_scheme(buffer, slashes)) {
+            Textbuffer_dealloc(buffer);
             Tokenizer_fail_route(self);
             return 0;
         }
-        Py_DECREF(scheme);
+        Textbuffer_dealloc(buffer);
     }
     return 0;
 }
@@ -569,7 +656,6 @@ Tokenizer_parse_free_uri_scheme(Tokenizer *self)
 {
     static const char *valid = URISCHEME;
     Textbuffer *scheme_buffer = Textbuffer_new(&self->text);
-    PyObject *scheme;
     Py_UCS4 ch;
     Py_ssize_t i;
     int slashes, j;
@@ -597,19 +683,12 @@ Tokenizer_parse_free_uri_scheme(Tokenizer *self)
         Textbuffer_write(scheme_buffer, ch);
     }
     Textbuffer_reverse(scheme_buffer);
-    scheme = Textbuffer_render(scheme_buffer);
-    if (!scheme) {
-        Textbuffer_dealloc(scheme_buffer);
-        return -1;
-    }
     slashes = (Tokenizer_read(self, 0) == '/' && Tokenizer_read(self, 1) == '/');
-    if (!is_scheme(scheme, slashes)) {
-        Py_DECREF(scheme);
+    if (!is_scheme(scheme_buffer, slashes)) {
         Textbuffer_dealloc(scheme_buffer);
         FAIL_ROUTE(0);
         return 0;
     }
-    Py_DECREF(scheme);
     new_context = self->topstack->context | LC_EXT_LINK_URI;
     if (Tokenizer_check_route(self, new_context) < 0) {
         Textbuffer_dealloc(scheme_buffer);
@@ -783,21 +862,20 @@ Tokenizer_really_parse_external_link(Tokenizer *self, int brackets, Textbuffer *
 static int
 Tokenizer_remove_uri_scheme_from_textbuffer(Tokenizer *self, PyObject *link)
 {
-    PyObject *text = PyObject_GetAttrString(PyList_GET_ITEM(link, 0), "text"), *split,
-             *scheme;
+    PyObject *text = get_token_attr(PyList_GET_ITEM(link, 0), "text");
     Py_ssize_t length;
 
     if (!text) {
         return -1;
     }
-    split = PyObject_CallMethod(text, "split", "si", ":", 1);
-    Py_DECREF(text);
-    if (!split) {
+    length = PyUnicode_GET_LENGTH(text);
+    length = PyUnicode_FindChar(text, ':', 0, length, 1);
+    if (length == -2) {
         return -1;
     }
-    scheme = PyList_GET_ITEM(split, 0);
-    length = PyUnicode_GET_LENGTH(scheme);
-    Py_DECREF(split);
+    if (length == -1) {
+        length = PyUnicode_GET_LENGTH(text);
+    }
     self->topstack->textbuffer->length -= length;
     return 0;
 }
@@ -820,7 +898,8 @@ Tokenizer_parse_external_link(Tokenizer *self, int brackets)
     PyObject *link, *kwargs;
     Textbuffer *extra;
 
-    if (self->topstack->context & AGG_NO_EXT_LINKS || !(Tokenizer_CAN_RECURSE(self))) {
+    if (self->topstack->context & AGG_NO_EXT_LINKS ||
+        !(self->features & FT_EXT_LINKS) || !(Tokenizer_CAN_RECURSE(self))) {
         NOT_A_LINK;
     }
     extra = Textbuffer_new(&self->text);
@@ -1026,7 +1105,7 @@ Tokenizer_really_parse_entity(Tokenizer *self)
     PyObject *kwargs, *charobj, *textobj;
     Py_UCS4 this;
     int numeric, hexadecimal, i, j, zeroes, test;
-    char *valid, *text, *buffer, *def;
+    char *valid, *text, *buffer;
 
 #define FAIL_ROUTE_AND_EXIT()                                                          \
     do {                                                                               \
@@ -1084,7 +1163,7 @@ Tokenizer_really_parse_entity(Tokenizer *self)
     } else {
         valid = ALPHANUM;
     }
-    text = calloc(MAX_ENTITY_SIZE, sizeof(char));
+    text = calloc(MAX_ENTITY_SIZE + 1, sizeof(char));
     if (!text) {
         PyErr_NoMemory();
         return -1;
@@ -1130,16 +1209,8 @@ Tokenizer_really_parse_entity(Tokenizer *self)
             FAIL_ROUTE_AND_EXIT();
         }
     } else {
-        i = 0;
-        while (1) {
-            def = entitydefs[i];
-            if (!def) { // We've reached the end of the defs without finding it
-                FAIL_ROUTE_AND_EXIT();
-            }
-            if (strcmp(text, def) == 0) {
-                break;
-            }
-            i++;
+        if (!is_entity(self->state, text)) {
+            FAIL_ROUTE_AND_EXIT();
         }
     }
     if (zeroes) {
@@ -1187,6 +1258,9 @@ Tokenizer_parse_entity(Tokenizer *self)
     Py_ssize_t reset = self->head;
     PyObject *tokenlist;
 
+    if (!(self->features & FT_ENTITIES)) {
+        return Tokenizer_emit_char(self, Tokenizer_read(self, 0));
+    }
     if (Tokenizer_check_route(self, LC_HTML_ENTITY) < 0) {
         goto on_bad_route;
     }
@@ -1386,7 +1460,7 @@ Tokenizer_handle_tag_text(Tokenizer *self, Py_UCS4 text)
         return Tokenizer_parse_template_or_argument(self);
     } else if (text == next && next == '[') {
         return Tokenizer_parse_wikilink(self);
-    } else if (text == '<') {
+    } else if (text == '<' && self->features & FT_TAGS) {
         return Tokenizer_parse_tag(self);
     }
     return Tokenizer_emit_char(self, text);
@@ -1529,7 +1603,7 @@ Tokenizer_handle_tag_open_close(Tokenizer *self)
 static PyObject *
 Tokenizer_handle_tag_close_close(Tokenizer *self)
 {
-    PyObject *closing, *first, *so, *sc;
+    PyObject *closing, *first, *text;
     int valid = 1;
 
     closing = Tokenizer_pop(self);
@@ -1540,31 +1614,19 @@ Tokenizer_handle_tag_close_close(Tokenizer *self)
         valid = 0;
     } else {
         first = PyList_GET_ITEM(closing, 0);
-        switch (PyObject_IsInstance(first, Text)) {
-        case 0:
+        if (token_type(first) != Text) {
             valid = 0;
-            break;
-        case 1: {
-            so = strip_tag_name(first, 1);
-            sc = strip_tag_name(PyList_GET_ITEM(self->topstack->stack, 1), 1);
-            if (so && sc) {
-                if (PyUnicode_Compare(so, sc)) {
-                    valid = 0;
-                }
-                Py_DECREF(so);
-                Py_DECREF(sc);
-                break;
+        } else {
+            text = get_token_attr(first, "text");
+            valid = text ? Tokenizer_tag_name_matches(self,
+                                                      PyUnicode_KIND(text),
+                                                      PyUnicode_DATA(text),
+                                                      PyUnicode_GET_LENGTH(text))
+                         : -1;
+            if (valid < 0) {
+                Py_DECREF(closing);
+                return NULL;
             }
-            Py_XDECREF(so);
-            Py_XDECREF(sc);
-            // One of `so` or `sc` failed to allocate so we clean up the
-            // closing tag and propagate the error by returning NULL.
-            Py_DECREF(closing);
-            return NULL;
-        }
-        case -1:
-            Py_DECREF(closing);
-            return NULL;
         }
     }
     if (!valid) {
@@ -1589,10 +1651,9 @@ static PyObject *
 Tokenizer_handle_blacklisted_tag(Tokenizer *self)
 {
     Textbuffer *buffer;
-    PyObject *buf_tmp, *end_tag, *start_tag;
     Py_UCS4 this, next;
     Py_ssize_t reset;
-    int cmp;
+    int match;
 
     while (1) {
         this = Tokenizer_read(self, 0);
@@ -1608,24 +1669,13 @@ Tokenizer_handle_blacklisted_tag(Tokenizer *self)
             }
             while ((this = Tokenizer_read(self, 0)), 1) {
                 if (this == '>') {
-                    buf_tmp = Textbuffer_render(buffer);
-                    if (!buf_tmp) {
-                        return NULL;
-                    }
-                    end_tag = strip_tag_name(buf_tmp, 0);
-                    Py_DECREF(buf_tmp);
-                    if (!end_tag) {
-                        return NULL;
-                    }
-                    start_tag =
-                        strip_tag_name(PyList_GET_ITEM(self->topstack->stack, 1), 1);
-                    if (!start_tag) {
+                    match = Tokenizer_tag_name_matches(
+                        self, buffer->kind, buffer->data, buffer->length);
+                    if (match < 0) {
+                        Textbuffer_dealloc(buffer);
                         return NULL;
                     }
-                    cmp = PyUnicode_Compare(start_tag, end_tag);
-                    Py_DECREF(end_tag);
-                    Py_DECREF(start_tag);
-                    if (cmp) {
+                    if (!match) {
                         goto no_matching_end;
                     }
                     if (Tokenizer_emit(self, TagOpenClose)) {
@@ -1668,25 +1718,28 @@ Tokenizer_handle_blacklisted_tag(Tokenizer *self)
 static PyObject *
 Tokenizer_handle_single_only_tag_end(Tokenizer *self)
 {
-    PyObject *top, *padding, *kwargs;
+    PyObject *stack = self->topstack->stack, *top, *padding, *kwargs;
+    Py_ssize_t size = PyList_GET_SIZE(stack);
 
-    top = PyObject_CallMethod(self->topstack->stack, "pop", NULL);
-    if (!top) {
+    top = PyList_GET_ITEM(stack, size - 1);
+    Py_INCREF(top);
+    if (PyList_SetSlice(stack, size - 1, size, NULL)) {
+        Py_DECREF(top);
         return NULL;
     }
-    padding = PyObject_GetAttrString(top, "padding");
-    Py_DECREF(top);
+    padding = get_token_attr(top, "padding");
     if (!padding) {
+        Py_DECREF(top);
         return NULL;
     }
     kwargs = PyDict_New();
     if (!kwargs) {
-        Py_DECREF(padding);
+        Py_DECREF(top);
         return NULL;
     }
     PyDict_SetItemString(kwargs, "padding", padding);
     PyDict_SetItemString(kwargs, "implicit", Py_True);
-    Py_DECREF(padding);
+    Py_DECREF(top);
     if (Tokenizer_emit_kwargs(self, TagCloseSelfclose, kwargs)) {
         return NULL;
     }
@@ -1700,32 +1753,22 @@ Tokenizer_handle_single_only_tag_end(Tokenizer *self)
 static PyObject *
 Tokenizer_handle_single_tag_end(Tokenizer *self)
 {
-    PyObject *token = 0, *padding, *kwargs;
+    PyObject *token = 0, *type, *padding, *kwargs;
     Py_ssize_t len, index;
-    int depth = 1, is_instance;
+    int depth = 1;
 
     len = PyList_GET_SIZE(self->topstack->stack);
     for (index = 2; index < len; index++) {
         token = PyList_GET_ITEM(self->topstack->stack, index);
-        is_instance = PyObject_IsInstance(token, TagOpenOpen);
-        if (is_instance == -1) {
-            return NULL;
-        } else if (is_instance == 1) {
+        type = token_type(token);
+        if (type == TagOpenOpen) {
             depth++;
-        }
-        is_instance = PyObject_IsInstance(token, TagCloseOpen);
-        if (is_instance == -1) {
-            return NULL;
-        } else if (is_instance == 1) {
+        } else if (type == TagCloseOpen) {
             depth--;
             if (depth == 0) {
                 break;
             }
-        }
-        is_instance = PyObject_IsInstance(token, TagCloseSelfclose);
-        if (is_instance == -1) {
-            return NULL;
-        } else if (is_instance == 1) {
+        } else if (type == TagCloseSelfclose) {
             depth--;
             if (depth == 0) { // Should never happen
                 return NULL;
@@ -1735,19 +1778,14 @@ Tokenizer_handle_single_tag_end(Tokenizer *self)
     if (!token || depth > 0) {
         return NULL;
     }
-    padding = PyObject_GetAttrString(token, "padding");
-    if (!padding) {
-        return NULL;
-    }
+    padding = token_attr(token, "padding");
     kwargs = PyDict_New();
     if (!kwargs) {
-        Py_DECREF(padding);
         return NULL;
     }
-    PyDict_SetItemString(kwargs, "padding", padding);
+    PyDict_SetItemString(kwargs, "padding", padding ? padding : Py_None);
     PyDict_SetItemString(kwargs, "implicit", Py_True);
-    Py_DECREF(padding);
-    token = PyObject_Call(TagCloseSelfclose, NOARGS, kwargs);
+    token = Tokenizer_new_token(self, TagCloseSelfclose, kwargs);
     Py_DECREF(kwargs);
     if (!token) {
         return NULL;
@@ -1814,19 +1852,16 @@ Tokenizer_really_parse_tag(Tokenizer *self)
             TagData_dealloc(data);
             self->topstack->context = LC_TAG_BODY;
             token = PyList_GET_ITEM(self->topstack->stack, 1);
-            text = PyObject_GetAttrString(token, "text");
+            text = get_token_attr(token, "text");
             if (!text) {
                 return NULL;
             }
             if (is_single_only(text)) {
-                Py_DECREF(text);
                 return Tokenizer_handle_single_only_tag_end(self);
             }
             if (is_parsable(text)) {
-                Py_DECREF(text);
                 return Tokenizer_parse(self, 0, 0);
             }
-            Py_DECREF(text);
             return Tokenizer_handle_blacklisted_tag(self);
         } else if (this == '/' && next == '>' && can_exit) {
             if (Tokenizer_handle_tag_close_open(self, data, TagCloseSelfclose)) {
@@ -1890,7 +1925,8 @@ Tokenizer_handle_invalid_tag_start(Tokenizer *self)
         return -1;
     }
     // Set invalid=True flag of TagOpenOpen
-    if (PyObject_SetAttrString(PyList_GET_ITEM(tag, 0), "invalid", Py_True)) {
+    if (set_token_attr(tag, 0, "invalid", Py_True)) {
+        Py_DECREF(tag);
         return -1;
     }
     if (Tokenizer_emit_all(self, tag)) {
@@ -2722,12 +2758,11 @@ Tokenizer_handle_end(Tokenizer *self, uint64_t context)
     if (context & AGG_FAIL) {
         if (context & LC_TAG_BODY) {
             token = PyList_GET_ITEM(self->topstack->stack, 1);
-            text = PyObject_GetAttrString(token, "text");
+            text = get_token_attr(token, "text");
             if (!text) {
                 return NULL;
             }
             single = is_single(text);
-            Py_DECREF(text);
             if (single) {
                 return Tokenizer_handle_single_tag_end(self);
             }
@@ -2854,6 +2889,25 @@ Tokenizer_has_leading_whitespace(Tokenizer *self)
     }
 }
 
+/*
+    When tokenizing partially, note that the tokens emitted so far are final if
+    we have just passed a newline at the top level without ever reading past
+    the end of the text: whatever comes next cannot change them.
+*/
+static int
+Tokenizer_mark_safe(Tokenizer *self)
+{
+    if (self->topstack->next || self->topstack->context || self->hit_end) {
+        return 0;
+    }
+    if (Tokenizer_push_textbuffer(self)) {
+        return -1;
+    }
+    self->safe_head = self->head + 1;
+    self->safe_tokens = PyList_GET_SIZE(self->topstack->stack);
+    return 0;
+}
+
 /*
     Parse the wikicode string, using context for when to stop. If push is true,
     we will push a new context, otherwise we won't and context will be ignored.
@@ -2913,8 +2967,8 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
                 return NULL;
             }
         } else if (this == '=' && this_context & LC_TEMPLATE_PARAM_KEY) {
-            if (!(self->global & GL_HEADING) && (!last || last == '\n') &&
-                next == '=') {
+            if (self->features & FT_HEADINGS && !(self->global & GL_HEADING) &&
+                (!last || last == '\n') && next == '=') {
                 if (Tokenizer_parse_heading(self)) {
                     return NULL;
                 }
@@ -2964,7 +3018,7 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
             return Tokenizer_pop(self);
         } else if (this == '=' && !(self->global & GL_HEADING) &&
                    !(this_context & LC_TEMPLATE)) {
-            if (!last || last == '\n') {
+            if (self->features & FT_HEADINGS && (!last || last == '\n')) {
                 if (Tokenizer_parse_heading(self)) {
                     return NULL;
                 }
@@ -2988,12 +3042,14 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
             } else if (Tokenizer_emit_char(self, this)) {
                 return NULL;
             }
-        } else if (this == '<' && next == '/' && Tokenizer_read(self, 2)) {
+        } else if (this == '<' && next == '/' && Tokenizer_read(self, 2) &&
+                   self->features & FT_TAGS) {
             if (this_context & LC_TAG_BODY ? Tokenizer_handle_tag_open_close(self)
                                            : Tokenizer_handle_invalid_tag_start(self)) {
                 return NULL;
             }
-        } else if (this == '<' && !(this_context & LC_TAG_CLOSE)) {
+        } else if (this == '<' && !(this_context & LC_TAG_CLOSE) &&
+                   self->features & FT_TAGS) {
             if (Tokenizer_CAN_RECURSE(self)) {
                 if (Tokenizer_parse_tag(self)) {
                     return NULL;
@@ -3009,7 +3065,8 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
                 return temp;
             }
         } else if ((!last || last == '\n') &&
-                   (this == '#' || this == '*' || this == ';' || this == ':')) {
+                   (this == '#' || this == '*' || this == ';' || this == ':') &&
+                   self->features & FT_LISTS) {
             if (Tokenizer_handle_list(self)) {
                 return NULL;
             }
@@ -3030,7 +3087,8 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
         }
 
         // Start of table parsing
-        else if (this == '{' && next == '|' && Tokenizer_has_leading_whitespace(self)) {
+        else if (this == '{' && next == '|' && self->features & FT_TABLES &&
+                 Tokenizer_has_leading_whitespace(self)) {
             if (Tokenizer_CAN_RECURSE(self)) {
                 if (Tokenizer_parse_table(self)) {
                     return NULL;
@@ -3115,6 +3173,9 @@ Tokenizer_parse(Tokenizer *self, uint64_t context, int push)
         } else if (Tokenizer_emit_char(self, this)) {
             return NULL;
         }
+        if (this == '\n' && self->partial && Tokenizer_mark_safe(self)) {
+            return NULL;
+        }
         self->head++;
     }
 }
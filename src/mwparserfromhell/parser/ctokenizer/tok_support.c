@@ -21,8 +21,10 @@ SOFTWARE.
 */
 
 #include "tok_support.h"
+#include "contexts.h"
 #include "textbuffer.h"
 #include "tokens.h"
+#include "utf8.h"
 
 /*
     Add a new token stack, context, and textbuffer to the list.
@@ -37,6 +39,7 @@ Tokenizer_push(Tokenizer *self, uint64_t context)
         return -1;
     }
     top->stack = PyList_New(0);
+    top->head = NULL;
     top->context = context;
     top->textbuffer = Textbuffer_new(&self->text);
     if (!top->textbuffer) {
@@ -66,6 +69,11 @@ Tokenizer_push_textbuffer(Tokenizer *self)
     if (!text) {
         return -1;
     }
+    if (self->spans) {
+        token = PyTuple_Pack(2, Text, text);
+        Py_DECREF(text);
+        goto append;
+    }
     kwargs = PyDict_New();
     if (!kwargs) {
         Py_DECREF(text);
@@ -75,6 +83,8 @@ Tokenizer_push_textbuffer(Tokenizer *self)
     Py_DECREF(text);
     token = PyObject_Call(Text, NOARGS, kwargs);
     Py_DECREF(kwargs);
+
+append:
     if (!token) {
         return -1;
     }
@@ -98,12 +108,39 @@ Tokenizer_delete_top_of_stack(Tokenizer *self)
     Stack *top = self->topstack;
 
     Py_DECREF(top->stack);
+    Py_XDECREF(top->head);
     Textbuffer_dealloc(top->textbuffer);
     self->topstack = top->next;
     free(top);
     self->depth--;
 }
 
+/*
+    Return a new reference to the full token list of the top stack, joining
+    any tokens that were emitted first to the front of it.
+*/
+static PyObject *
+Tokenizer_take_stack(Tokenizer *self)
+{
+    Stack *top = self->topstack;
+    PyObject *head = top->head;
+    Py_ssize_t size;
+
+    if (!head) {
+        Py_INCREF(top->stack);
+        return top->stack;
+    }
+    if (PyList_Reverse(head)) {
+        return NULL;
+    }
+    size = PyList_GET_SIZE(head);
+    if (PyList_SetSlice(head, size, size, top->stack)) {
+        return NULL;
+    }
+    top->head = NULL;
+    return head;
+}
+
 /*
     Pop the current stack/context/textbuffer, returing the stack.
 */
@@ -115,8 +152,10 @@ Tokenizer_pop(Tokenizer *self)
     if (Tokenizer_push_textbuffer(self)) {
         return NULL;
     }
-    stack = self->topstack->stack;
-    Py_INCREF(stack);
+    stack = Tokenizer_take_stack(self);
+    if (!stack) {
+        return NULL;
+    }
     Tokenizer_delete_top_of_stack(self);
     return stack;
 }
@@ -134,8 +173,10 @@ Tokenizer_pop_keeping_context(Tokenizer *self)
     if (Tokenizer_push_textbuffer(self)) {
         return NULL;
     }
-    stack = self->topstack->stack;
-    Py_INCREF(stack);
+    stack = Tokenizer_take_stack(self);
+    if (!stack) {
+        return NULL;
+    }
     context = self->topstack->context;
     Tokenizer_delete_top_of_stack(self);
     self->topstack->context = context;
@@ -241,6 +282,111 @@ Tokenizer_free_bad_route_tree(Tokenizer *self)
     self->bad_routes = NULL;
 }
 
+/*
+    Append a token instance to the current token stack. If 'first' is set, the
+    token is instead added to the stack's head list, which is joined to the
+    front of the stack in reverse order when it is popped. This keeps repeated
+    prepends from shifting the whole stack each time.
+*/
+static int
+Tokenizer_append_token(Tokenizer *self, PyObject *instance, int first)
+{
+    Stack *top = self->topstack;
+
+    if (!first) {
+        return PyList_Append(top->stack, instance);
+    }
+    if (!top->head) {
+        top->head = PyList_New(0);
+        if (!top->head) {
+            return -1;
+        }
+    }
+    return PyList_Append(top->head, instance);
+}
+
+/*
+    Return a new token of the given type, with kwargs as its attributes if it
+    is not NULL. When only spans are wanted, this is instead a lightweight
+    (type, kwargs) tuple record, with the text itself in place of kwargs for
+    Text records and None for records without attributes.
+*/
+PyObject *
+Tokenizer_new_token(Tokenizer *self, PyObject *type, PyObject *kwargs)
+{
+    if (self->spans) {
+        return PyTuple_Pack(2, type, kwargs ? kwargs : Py_None);
+    }
+    return PyObject_Call(type, NOARGS, kwargs);
+}
+
+/*
+    Return a borrowed reference to the type of a token or span record.
+*/
+PyObject *
+token_type(PyObject *token)
+{
+    if (PyTuple_CheckExact(token)) {
+        return PyTuple_GET_ITEM(token, 0);
+    }
+    return (PyObject *) Py_TYPE(token);
+}
+
+/*
+    Return a borrowed reference to an attribute of a token or span record, like
+    "text", or NULL without an exception set if it is missing. Since tokens are
+    dicts, this avoids going through Token.__getattr__.
+*/
+PyObject *
+token_attr(PyObject *token, const char *attr)
+{
+    PyObject *attrs;
+
+    if (!PyTuple_CheckExact(token)) {
+        return PyDict_GetItemString(token, attr);
+    }
+    attrs = PyTuple_GET_ITEM(token, 1);
+    if (PyUnicode_Check(attrs)) {
+        return strcmp(attr, "text") ? NULL : attrs;
+    }
+    return attrs == Py_None ? NULL : PyDict_GetItemString(attrs, attr);
+}
+
+/*
+    Set an attribute of the token or span record at the given index of a list.
+    Records may be replaced with new ones to do this.
+*/
+int
+set_token_attr(PyObject *list, Py_ssize_t index, const char *attr, PyObject *value)
+{
+    PyObject *token = PyList_GET_ITEM(list, index), *attrs, *record;
+
+    if (!PyTuple_CheckExact(token)) {
+        return PyDict_SetItemString(token, attr, value);
+    }
+    attrs = PyTuple_GET_ITEM(token, 1);
+    if (PyDict_Check(attrs)) {
+        return PyDict_SetItemString(attrs, attr, value);
+    }
+    if (PyUnicode_Check(attrs)) { // Text records only have a "text" attribute
+        record = PyTuple_Pack(2, PyTuple_GET_ITEM(token, 0), value);
+    } else {
+        if (!(attrs = PyDict_New())) {
+            return -1;
+        }
+        if (PyDict_SetItemString(attrs, attr, value)) {
+            Py_DECREF(attrs);
+            return -1;
+        }
+        record = PyTuple_Pack(2, PyTuple_GET_ITEM(token, 0), attrs);
+        Py_DECREF(attrs);
+    }
+    if (!record) {
+        return -1;
+    }
+    return PyList_SetItem(list, index, record);
+}
+
 /*
     Write a token to the current token stack.
 */
@@ -252,12 +398,11 @@ Tokenizer_emit_token(Tokenizer *self, PyObject *token, int first)
     if (Tokenizer_push_textbuffer(self)) {
         return -1;
     }
-    instance = PyObject_CallObject(token, NULL);
+    instance = Tokenizer_new_token(self, token, NULL);
     if (!instance) {
         return -1;
     }
-    if (first ? PyList_Insert(self->topstack->stack, 0, instance)
-              : PyList_Append(self->topstack->stack, instance)) {
+    if (Tokenizer_append_token(self, instance, first)) {
         Py_DECREF(instance);
         return -1;
     }
@@ -281,13 +426,12 @@ Tokenizer_emit_token_kwargs(Tokenizer *self,
         Py_DECREF(kwargs);
         return -1;
     }
-    instance = PyObject_Call(token, NOARGS, kwargs);
+    instance = Tokenizer_new_token(self, token, kwargs);
     if (!instance) {
         Py_DECREF(kwargs);
         return -1;
     }
-    if (first ? PyList_Insert(self->topstack->stack, 0, instance)
-              : PyList_Append(self->topstack->stack, instance)) {
+    if (Tokenizer_append_token(self, instance, first)) {
         Py_DECREF(instance);
         Py_DECREF(kwargs);
         return -1;
@@ -348,41 +492,33 @@ Tokenizer_emit_all(Tokenizer *self, PyObject *tokenlist)
 
     if (PyList_GET_SIZE(tokenlist) > 0) {
         token = PyList_GET_ITEM(tokenlist, 0);
-        switch (PyObject_IsInstance(token, Text)) {
-        case 0:
-            break;
-        case 1: {
+        if (token_type(token) == Text) {
             pushed = 1;
             buffer = self->topstack->textbuffer;
-            if (buffer->length == 0) {
-                break;
-            }
-            left = Textbuffer_render(buffer);
-            if (!left) {
-                return -1;
-            }
-            right = PyObject_GetAttrString(token, "text");
-            if (!right) {
-                return -1;
-            }
-            text = PyUnicode_Concat(left, right);
-            Py_DECREF(left);
-            Py_DECREF(right);
-            if (!text) {
-                return -1;
-            }
-            if (PyObject_SetAttrString(token, "text", text)) {
+            if (buffer->length > 0) {
+                right = token_attr(token, "text");
+                if (!right) {
+                    PyErr_SetString(PyExc_KeyError, "text");
+                    return -1;
+                }
+                left = Textbuffer_render(buffer);
+                if (!left) {
+                    return -1;
+                }
+                text = PyUnicode_Concat(left, right);
+                Py_DECREF(left);
+                if (!text) {
+                    return -1;
+                }
+                if (set_token_attr(tokenlist, 0, "text", text)) {
+                    Py_DECREF(text);
+                    return -1;
+                }
                 Py_DECREF(text);
-                return -1;
-            }
-            Py_DECREF(text);
-            if (Textbuffer_reset(buffer)) {
-                return -1;
+                if (Textbuffer_reset(buffer)) {
+                    return -1;
+                }
             }
-            break;
-        }
-        case -1:
-            return -1;
         }
     }
     if (!pushed) {
@@ -430,6 +566,12 @@ Tokenizer_emit_text_then_stack(Tokenizer *self, const char *text)
 static Py_UCS4
 read_codepoint(TokenizerInput *text, Py_ssize_t index)
 {
+    if (text->kind == UTF8_KIND) {
+        if (index < text->ascii) {
+            return ((unsigned char *) text->data)[index];
+        }
+        return utf8_read(text, index);
+    }
     return PyUnicode_READ(text->kind, text->data, index);
 }
 
@@ -442,6 +584,7 @@ Tokenizer_read(Tokenizer *self, Py_ssize_t delta)
     Py_ssize_t index = self->head + delta;
 
     if (index >= self->text.length) {
+        self->hit_end = 1;
         return '\0';
     }
     return read_codepoint(&self->text, index);
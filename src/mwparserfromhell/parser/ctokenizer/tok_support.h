@@ -36,6 +36,11 @@ void *Tokenizer_fail_route(Tokenizer *);
 int Tokenizer_check_route(Tokenizer *, uint64_t);
 void Tokenizer_free_bad_route_tree(Tokenizer *);
 
+PyObject *Tokenizer_new_token(Tokenizer *, PyObject *, PyObject *);
+PyObject *token_type(PyObject *);
+PyObject *token_attr(PyObject *, const char *);
+int set_token_attr(PyObject *, Py_ssize_t, const char *, PyObject *);
+
 int Tokenizer_emit_token(Tokenizer *, PyObject *, int);
 int Tokenizer_emit_token_kwargs(Tokenizer *, PyObject *, PyObject *, int);
 int Tokenizer_emit_char(Tokenizer *, Py_UCS4);
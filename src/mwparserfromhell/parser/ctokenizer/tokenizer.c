@@ -21,25 +21,30 @@ SOFTWARE.
 */
 
 #include "tokenizer.h"
+#include "definitions.h"
+#include "features.h"
+#include "spans.h"
 #include "tok_parse.h"
 #include "tok_support.h"
 #include "tokens.h"
+#include "utf8.h"
 
-/* Globals */
+/* Locking */
 
-int route_state;
-uint64_t route_context;
-
-char **entitydefs;
-
-PyObject *NOARGS;
-PyObject *definitions;
-
-static PyObject *ParserError;
-
-/* Forward declarations */
+/*
+    A tokenizer keeps all of its parsing state in itself, so threads using the
+    same one at once are made to take turns.
+*/
 
-static int load_exceptions(void);
+#define ACQUIRE_LOCK(self)                                                             \
+    do {                                                                               \
+        if (!PyThread_acquire_lock((self)->lock, 0)) {                                 \
+            Py_BEGIN_ALLOW_THREADS                                                     \
+            PyThread_acquire_lock((self)->lock, 1);                                    \
+            Py_END_ALLOW_THREADS                                                       \
+        }                                                                              \
+    } while (0)
+#define RELEASE_LOCK(self) PyThread_release_lock((self)->lock)
 
 /*
     Create a new tokenizer object.
@@ -48,6 +53,16 @@ static PyObject *
 Tokenizer_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
     Tokenizer *self = (Tokenizer *) type->tp_alloc(type, 0);
+
+    if (!self) {
+        return NULL;
+    }
+    self->state = PyType_GetModuleState(type);
+    if (!(self->lock = PyThread_allocate_lock())) {
+        Py_DECREF(self);
+        PyErr_NoMemory();
+        return NULL;
+    }
     return (PyObject *) self;
 }
 
@@ -57,7 +72,12 @@ Tokenizer_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 static void
 dealloc_tokenizer_text(TokenizerInput *text)
 {
+    if (text->kind == UTF8_KIND) {
+        PyBuffer_Release(&text->buffer);
+        text->kind = PyUnicode_1BYTE_KIND;
+    }
     Py_XDECREF(text->object);
+    text->object = NULL;
 }
 
 /*
@@ -66,17 +86,23 @@ dealloc_tokenizer_text(TokenizerInput *text)
 static void
 Tokenizer_dealloc(Tokenizer *self)
 {
+    PyTypeObject *type = Py_TYPE(self);
     Stack *this = self->topstack, *next;
     dealloc_tokenizer_text(&self->text);
 
     while (this) {
         Py_DECREF(this->stack);
+        Py_XDECREF(this->head);
         Textbuffer_dealloc(this->textbuffer);
         next = this->next;
         free(this);
         this = next;
     }
-    Py_TYPE(self)->tp_free((PyObject *) self);
+    if (self->lock) {
+        PyThread_free_lock(self->lock);
+    }
+    type->tp_free((PyObject *) self);
+    Py_DECREF(type);
 }
 
 /*
@@ -90,6 +116,7 @@ init_tokenizer_text(TokenizerInput *text)
     text->length = 0;
     text->kind = PyUnicode_1BYTE_KIND;
     text->data = NULL;
+    text->maxchar = 0x7F;
 }
 
 /*
@@ -109,220 +136,362 @@ Tokenizer_init(Tokenizer *self, PyObject *args, PyObject *kwds)
     self->route_context = self->route_state = 0;
     self->bad_routes = NULL;
     self->skip_style_tags = 0;
+    self->features = FT_ALL;
+    self->partial = self->spans = self->hit_end = 0;
+    self->safe_head = self->safe_tokens = 0;
     return 0;
 }
 
 /*
     Load input text into the tokenizer.
+
+    The input may be a string, or any object supporting the buffer protocol
+    (bytes, bytearray, memoryview, mmap, ...) that holds UTF-8. Buffers are
+    read in place rather than decoded into a string first, and are held only
+    until the next call to unload_tokenizer_text().
 */
 static int
 load_tokenizer_text(TokenizerInput *text, PyObject *input)
 {
     dealloc_tokenizer_text(text);
-    text->object = input;
 
-    if (PyUnicode_READY(input) < 0) {
+    if (PyUnicode_Check(input)) {
+        if (PyUnicode_READY(input) < 0) {
+            return -1;
+        }
+        Py_INCREF(input);
+        text->object = input;
+        text->kind = PyUnicode_KIND(input);
+        text->data = PyUnicode_DATA(input);
+        text->length = PyUnicode_GET_LENGTH(input);
+        text->maxchar = PyUnicode_MAX_CHAR_VALUE(input);
+        return 0;
+    }
+    if (!PyObject_CheckBuffer(input)) {
+        PyErr_Format(PyExc_TypeError,
+                     "tokenize() argument must be str or a bytes-like object, "
+                     "not '%.200s'",
+                     Py_TYPE(input)->tp_name);
         return -1;
     }
-    text->kind = PyUnicode_KIND(input);
-    text->data = PyUnicode_DATA(input);
-    text->length = PyUnicode_GET_LENGTH(input);
-    return 0;
+    if (PyObject_GetBuffer(input, &text->buffer, PyBUF_SIMPLE) < 0) {
+        return -1;
+    }
+    Py_INCREF(input);
+    text->object = input;
+    text->kind = UTF8_KIND;
+    text->data = text->buffer.buf;
+    text->size = text->buffer.len;
+    return utf8_scan(text);
 }
 
 /*
-    Build a list of tokens from a string of wikicode and return it.
+    Release the tokenizer's input text, so that buffers like mmaps are not
+    kept locked after tokenizing finishes.
+*/
+static void
+unload_tokenizer_text(TokenizerInput *text)
+{
+    dealloc_tokenizer_text(text);
+    init_tokenizer_text(text);
+}
+
+/*
+    Build a list of tokens from a string of wikicode and return it. The caller
+    must hold the tokenizer's lock.
 */
 static PyObject *
-Tokenizer_tokenize(Tokenizer *self, PyObject *args)
+tokenize(Tokenizer *self, PyObject *args)
 {
     PyObject *input, *tokens;
     unsigned long long context = 0;
-    int skip_style_tags = 0;
+    int skip_style_tags = 0, features = FT_ALL;
 
-    if (PyArg_ParseTuple(args, "U|Kp", &input, &context, &skip_style_tags)) {
-        Py_INCREF(input);
-        if (load_tokenizer_text(&self->text, input)) {
-            return NULL;
-        }
-    } else {
-        const char *encoded;
-        Py_ssize_t size;
-
-        /* Failed to parse a Unicode object; try a string instead. */
-        PyErr_Clear();
-        if (!PyArg_ParseTuple(
-                args, "s#|Kp", &encoded, &size, &context, &skip_style_tags)) {
-            return NULL;
-        }
-        if (!(input = PyUnicode_FromStringAndSize(encoded, size))) {
-            return NULL;
-        }
-        if (load_tokenizer_text(&self->text, input)) {
-            return NULL;
-        }
+    if (!PyArg_ParseTuple(
+            args, "O|Kpi", &input, &context, &skip_style_tags, &features)) {
+        return NULL;
+    }
+    if (load_tokenizer_text(&self->text, input)) {
+        unload_tokenizer_text(&self->text);
+        return NULL;
     }
 
     self->head = self->global = self->depth = 0;
     self->skip_style_tags = skip_style_tags;
+    self->features = features;
+    self->hit_end = 0;
+    self->safe_head = self->safe_tokens = 0;
     self->bad_routes = NULL;
 
     tokens = Tokenizer_parse(self, context, 1);
 
     Tokenizer_free_bad_route_tree(self);
+    unload_tokenizer_text(&self->text);
 
     if (!tokens || self->topstack) {
         Py_XDECREF(tokens);
         if (PyErr_Occurred()) {
             return NULL;
         }
-        if (!ParserError && load_exceptions() < 0) {
-            return NULL;
-        }
         if (BAD_ROUTE) {
             RESET_ROUTE();
-            PyErr_SetString(ParserError, "C tokenizer exited with BAD_ROUTE");
+            PyErr_SetString(self->state->parser_error,
+                            "C tokenizer exited with BAD_ROUTE");
         } else if (self->topstack) {
-            PyErr_SetString(ParserError,
+            PyErr_SetString(self->state->parser_error,
                             "C tokenizer exited with non-empty token stack");
         } else {
-            PyErr_SetString(ParserError, "C tokenizer exited unexpectedly");
+            PyErr_SetString(self->state->parser_error,
+                            "C tokenizer exited unexpectedly");
         }
         return NULL;
     }
     return tokens;
 }
 
+/*
+    Build a list of tokens from a string of wikicode and return it.
+*/
+static PyObject *
+Tokenizer_tokenize(Tokenizer *self, PyObject *args)
+{
+    PyObject *tokens;
+
+    ACQUIRE_LOCK(self);
+    tokens = tokenize(self, args);
+    RELEASE_LOCK(self);
+    return tokens;
+}
+
+/*
+    Tokenize a string of wikicode, returning the kinds, spans, and depths of
+    its tokens as a tuple of four array.array objects. No Token objects are
+    made for this; the tokenizer makes lightweight span records instead.
+*/
+static PyObject *
+Tokenizer_tokenize_spans(Tokenizer *self, PyObject *args)
+{
+    PyObject *records, *spans;
+
+    ACQUIRE_LOCK(self);
+    self->spans = 1;
+    records = tokenize(self, args);
+    self->spans = 0;
+    RELEASE_LOCK(self);
+    if (!records) {
+        return NULL;
+    }
+    spans = build_spans(self->state, records);
+    Py_DECREF(records);
+    return spans;
+}
+
+/*
+    Tokenize as much of a string of wikicode as cannot be changed by appending
+    more text to it. Return a tuple of the tokens that are final and the length
+    of the text they cover, which always ends with a newline.
+*/
+static PyObject *
+Tokenizer_tokenize_partial(Tokenizer *self, PyObject *args)
+{
+    PyObject *input, *text, *tokens, *final;
+    int skip_style_tags = 0, features = FT_ALL;
+    Py_ssize_t end, safe_head, safe_tokens;
+
+    if (!PyArg_ParseTuple(args, "U|pi", &input, &skip_style_tags, &features)) {
+        return NULL;
+    }
+    // Nothing after the last newline can be final yet, so skip it entirely:
+    end = PyUnicode_FindChar(input, '\n', 0, PyUnicode_GET_LENGTH(input), -1);
+    if (end == -2) {
+        return NULL;
+    }
+    if (!(text = PyUnicode_Substring(input, 0, end + 1))) {
+        return NULL;
+    }
+    args = Py_BuildValue("(NKii)", text, 0ULL, skip_style_tags, features);
+    if (!args) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    self->partial = 1;
+    tokens = tokenize(self, args);
+    self->partial = 0;
+    safe_head = self->safe_head;
+    safe_tokens = self->safe_tokens;
+    RELEASE_LOCK(self);
+    Py_DECREF(args);
+    if (!tokens) {
+        return NULL;
+    }
+    final = PyList_GetSlice(tokens, 0, safe_tokens);
+    Py_DECREF(tokens);
+    if (!final) {
+        return NULL;
+    }
+    return Py_BuildValue("(Nn)", final, safe_head);
+}
+
+/*
+    Load the names of all valid HTML entities into the module state.
+*/
 static int
-load_entities(void)
+load_entities(ModuleState *state)
 {
-    PyObject *tempmod, *defmap, *deflist;
-    unsigned numdefs, i;
-    PyObject *string;
+    PyObject *tempmod, *defmap, *deflist, *string;
+    Py_ssize_t numdefs, i;
 
     tempmod = PyImport_ImportModule("html.entities");
     if (!tempmod) {
         return -1;
     }
     defmap = PyObject_GetAttrString(tempmod, "entitydefs");
+    Py_DECREF(tempmod);
     if (!defmap) {
         return -1;
     }
-    Py_DECREF(tempmod);
     deflist = PyDict_Keys(defmap);
+    Py_DECREF(defmap);
     if (!deflist) {
         return -1;
     }
-    Py_DECREF(defmap);
-    numdefs = (unsigned) PyList_GET_SIZE(deflist);
-    entitydefs = calloc(numdefs + 1, sizeof(char *));
-    if (!entitydefs) {
+    numdefs = PyList_GET_SIZE(deflist);
+    state->entity_names = PyList_New(numdefs);
+    state->entitydefs = PyMem_Calloc(numdefs + 1, sizeof(char *));
+    if (!state->entity_names || !state->entitydefs) {
+        Py_DECREF(deflist);
+        PyErr_NoMemory();
         return -1;
     }
     for (i = 0; i < numdefs; i++) {
         string = PyUnicode_AsASCIIString(PyList_GET_ITEM(deflist, i));
         if (!string) {
+            Py_DECREF(deflist);
             return -1;
         }
-        entitydefs[i] = PyBytes_AsString(string);
-        if (!entitydefs[i]) {
-            return -1;
-        }
+        PyList_SET_ITEM(state->entity_names, i, string);
+        state->entitydefs[i] = PyBytes_AS_STRING(string);
     }
     Py_DECREF(deflist);
+    state->num_entitydefs = (size_t) numdefs;
+    sort_entities(state->entitydefs, state->num_entitydefs);
     return 0;
 }
 
+/*
+    Load the token types into the module state.
+*/
 static int
-load_tokens(void)
+load_tokens(ModuleState *state)
 {
-    PyObject *tempmod, *tokens;
-    PyObject *globals = PyEval_GetGlobals(), *locals = PyEval_GetLocals(),
-             *fromlist = PyList_New(1), *modname = PyUnicode_FromString("tokens");
-    char *name = "mwparserfromhell.parser";
+    PyObject *tokens = PyImport_ImportModule("mwparserfromhell.parser.tokens");
 
-    if (!fromlist || !modname) {
+    if (!tokens) {
         return -1;
     }
-    PyList_SET_ITEM(fromlist, 0, modname);
-    tempmod = PyImport_ImportModuleLevel(name, globals, locals, fromlist, 0);
-    Py_DECREF(fromlist);
-    if (!tempmod) {
+    if (load_tokens_from_module(state, tokens) || load_span_kinds(state, tokens)) {
+        Py_DECREF(tokens);
         return -1;
     }
-    tokens = PyObject_GetAttrString(tempmod, "tokens");
-    Py_DECREF(tempmod);
-    load_tokens_from_module(tokens);
     Py_DECREF(tokens);
     return 0;
 }
 
+/*
+    Load the ParserError exception into the module state.
+*/
 static int
-load_defs(void)
+load_exceptions(ModuleState *state)
 {
-    PyObject *tempmod;
-    PyObject *globals = PyEval_GetGlobals(), *locals = PyEval_GetLocals(),
-             *fromlist = PyList_New(1), *modname = PyUnicode_FromString("definitions");
-    char *name = "mwparserfromhell";
+    PyObject *errors = PyImport_ImportModule("mwparserfromhell.parser.errors");
 
-    if (!fromlist || !modname) {
-        return -1;
-    }
-    PyList_SET_ITEM(fromlist, 0, modname);
-    tempmod = PyImport_ImportModuleLevel(name, globals, locals, fromlist, 0);
-    Py_DECREF(fromlist);
-    if (!tempmod) {
+    if (!errors) {
         return -1;
     }
-    definitions = PyObject_GetAttrString(tempmod, "definitions");
-    Py_DECREF(tempmod);
-    return 0;
+    state->parser_error = PyObject_GetAttrString(errors, "ParserError");
+    Py_DECREF(errors);
+    return state->parser_error ? 0 : -1;
 }
 
+/*
+    Set up a newly created _tokenizer module. This runs once for each
+    interpreter that imports it.
+*/
 static int
-load_exceptions(void)
+module_exec(PyObject *module)
 {
-    PyObject *tempmod, *parsermod;
-    PyObject *globals = PyEval_GetGlobals(), *locals = PyEval_GetLocals(),
-             *fromlist = PyList_New(1), *modname = PyUnicode_FromString("parser");
-    char *name = "mwparserfromhell";
+    ModuleState *state = PyModule_GetState(module);
 
-    if (!fromlist || !modname) {
+    state->tokenizer_type = PyType_FromModuleAndSpec(module, &Tokenizer_spec, NULL);
+    if (!state->tokenizer_type) {
         return -1;
     }
-    PyList_SET_ITEM(fromlist, 0, modname);
-    tempmod = PyImport_ImportModuleLevel(name, globals, locals, fromlist, 0);
-    Py_DECREF(fromlist);
-    if (!tempmod) {
+    if (PyObject_SetAttrString(state->tokenizer_type, "USES_C", Py_True) ||
+        PyModule_AddObjectRef(module, "CTokenizer", state->tokenizer_type)) {
         return -1;
     }
-    parsermod = PyObject_GetAttrString(tempmod, "parser");
-    Py_DECREF(tempmod);
-    ParserError = PyObject_GetAttrString(parsermod, "ParserError");
-    Py_DECREF(parsermod);
+    state->noargs = PyTuple_New(0);
+    if (!state->noargs || load_entities(state) || load_tokens(state) ||
+        load_exceptions(state)) {
+        return -1;
+    }
+    return 0;
+}
+
+/*
+    Visit the Python objects in the module state for the garbage collector.
+*/
+static int
+module_traverse(PyObject *module, visitproc visit, void *arg)
+{
+    ModuleState *state = PyModule_GetState(module);
+
+    Py_VISIT(state->tokenizer_type);
+    Py_VISIT(state->parser_error);
+    Py_VISIT(state->noargs);
+    Py_VISIT(state->span_kinds);
+    Py_VISIT(state->entity_names);
+#define VISIT_TOKEN_TYPE(name) Py_VISIT(state->token_##name);
+    TOKEN_TYPES(VISIT_TOKEN_TYPE)
+#undef VISIT_TOKEN_TYPE
+    return 0;
+}
+
+/*
+    Clear the Python objects out of the module state.
+*/
+static int
+module_clear(PyObject *module)
+{
+    ModuleState *state = PyModule_GetState(module);
+
+    Py_CLEAR(state->tokenizer_type);
+    Py_CLEAR(state->parser_error);
+    Py_CLEAR(state->noargs);
+    Py_CLEAR(state->span_kinds);
+    state->num_entitydefs = 0;
+    Py_CLEAR(state->entity_names);
+#define CLEAR_TOKEN_TYPE(name) Py_CLEAR(state->token_##name);
+    TOKEN_TYPES(CLEAR_TOKEN_TYPE)
+#undef CLEAR_TOKEN_TYPE
     return 0;
 }
 
+/*
+    Free the module state when the module itself is freed.
+*/
+static void
+module_free(void *module)
+{
+    ModuleState *state = PyModule_GetState((PyObject *) module);
+
+    module_clear((PyObject *) module);
+    PyMem_Free(state->entitydefs);
+    state->entitydefs = NULL;
+}
+
 PyMODINIT_FUNC
 PyInit__tokenizer(void)
 {
-    PyObject *module;
-
-    TokenizerType.tp_new = PyType_GenericNew;
-    if (PyType_Ready(&TokenizerType) < 0) {
-        return NULL;
-    }
-    module = PyModule_Create(&module_def);
-    if (!module) {
-        return NULL;
-    }
-    Py_INCREF(&TokenizerType);
-    PyModule_AddObject(module, "CTokenizer", (PyObject *) &TokenizerType);
-    Py_INCREF(Py_True);
-    PyDict_SetItemString(TokenizerType.tp_dict, "USES_C", Py_True);
-    NOARGS = PyTuple_New(0);
-    if (!NOARGS || load_entities() || load_tokens() || load_defs()) {
-        return NULL;
-    }
-    return module;
+    return PyModuleDef_Init(&module_def);
 }
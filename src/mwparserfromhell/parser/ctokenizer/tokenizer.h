@@ -31,6 +31,13 @@ static PyObject *Tokenizer_new(PyTypeObject *, PyObject *, PyObject *);
 static void Tokenizer_dealloc(Tokenizer *);
 static int Tokenizer_init(Tokenizer *, PyObject *, PyObject *);
 static PyObject *Tokenizer_tokenize(Tokenizer *, PyObject *);
+static PyObject *Tokenizer_tokenize_spans(Tokenizer *, PyObject *);
+static PyObject *Tokenizer_tokenize_partial(Tokenizer *, PyObject *);
+
+static int module_exec(PyObject *);
+static int module_traverse(PyObject *, visitproc, void *);
+static int module_clear(PyObject *);
+static void module_free(void *);
 
 /* Structs */
 
@@ -41,6 +48,19 @@ static PyMethodDef Tokenizer_methods[] = {
         METH_VARARGS,
         "Build a list of tokens from a string of wikicode and return it.",
     },
+    {
+        "tokenize_spans",
+        (PyCFunction) Tokenizer_tokenize_spans,
+        METH_VARARGS,
+        "Tokenize a string of wikicode, returning only where its tokens are.",
+    },
+    {
+        "tokenize_partial",
+        (PyCFunction) Tokenizer_tokenize_partial,
+        METH_VARARGS,
+        "Tokenize as much of a string of wikicode as will not change if more "
+        "text is appended.",
+    },
     {NULL},
 };
 
@@ -48,55 +68,43 @@ static PyMemberDef Tokenizer_members[] = {
     {NULL},
 };
 
-static PyTypeObject TokenizerType = {
-    PyVarObject_HEAD_INIT(NULL, 0)                         /* header */
-    "_tokenizer.CTokenizer",                               /* tp_name */
-    sizeof(Tokenizer),                                     /* tp_basicsize */
-    0,                                                     /* tp_itemsize */
-    (destructor) Tokenizer_dealloc,                        /* tp_dealloc */
-    0,                                                     /* tp_print */
-    0,                                                     /* tp_getattr */
-    0,                                                     /* tp_setattr */
-    0,                                                     /* tp_compare */
-    0,                                                     /* tp_repr */
-    0,                                                     /* tp_as_number */
-    0,                                                     /* tp_as_sequence */
-    0,                                                     /* tp_as_mapping */
-    0,                                                     /* tp_hash  */
-    0,                                                     /* tp_call */
-    0,                                                     /* tp_str */
-    0,                                                     /* tp_getattro */
-    0,                                                     /* tp_setattro */
-    0,                                                     /* tp_as_buffer */
-    Py_TPFLAGS_DEFAULT,                                    /* tp_flags */
-    "Creates a list of tokens from a string of wikicode.", /* tp_doc */
-    0,                                                     /* tp_traverse */
-    0,                                                     /* tp_clear */
-    0,                                                     /* tp_richcompare */
-    0,                                                     /* tp_weaklistoffset */
-    0,                                                     /* tp_iter */
-    0,                                                     /* tp_iternext */
-    Tokenizer_methods,                                     /* tp_methods */
-    Tokenizer_members,                                     /* tp_members */
-    0,                                                     /* tp_getset */
-    0,                                                     /* tp_base */
-    0,                                                     /* tp_dict */
-    0,                                                     /* tp_descr_get */
-    0,                                                     /* tp_descr_set */
-    0,                                                     /* tp_dictoffset */
-    (initproc) Tokenizer_init,                             /* tp_init */
-    0,                                                     /* tp_alloc */
-    Tokenizer_new,                                         /* tp_new */
+static PyType_Slot Tokenizer_slots[] = {
+    {Py_tp_new, Tokenizer_new},
+    {Py_tp_init, Tokenizer_init},
+    {Py_tp_dealloc, Tokenizer_dealloc},
+    {Py_tp_methods, Tokenizer_methods},
+    {Py_tp_members, Tokenizer_members},
+    {Py_tp_doc, "Creates a list of tokens from a string of wikicode."},
+    {0, NULL},
+};
+
+static PyType_Spec Tokenizer_spec = {
+    "_tokenizer.CTokenizer",
+    sizeof(Tokenizer),
+    0,
+    Py_TPFLAGS_DEFAULT,
+    Tokenizer_slots,
+};
+
+static PyModuleDef_Slot module_slots[] = {
+    {Py_mod_exec, module_exec},
+#if PY_VERSION_HEX >= 0x030C0000
+    {Py_mod_multiple_interpreters, Py_MOD_PER_INTERPRETER_GIL_SUPPORTED},
+#endif
+#ifdef Py_GIL_DISABLED
+    {Py_mod_gil, Py_MOD_GIL_NOT_USED},
+#endif
+    {0, NULL},
 };
 
 static PyModuleDef module_def = {
     PyModuleDef_HEAD_INIT,
     "_tokenizer",
     "Creates a list of tokens from a string of wikicode.",
-    -1,
-    NULL,
-    NULL,
-    NULL,
-    NULL,
+    sizeof(ModuleState),
     NULL,
+    module_slots,
+    module_traverse,
+    module_clear,
+    module_free,
 };
@@ -22,88 +22,18 @@ SOFTWARE.
 
 #include "tokens.h"
 
-/* Globals */
-
-PyObject *Text;
-
-PyObject *TemplateOpen;
-PyObject *TemplateParamSeparator;
-PyObject *TemplateParamEquals;
-PyObject *TemplateClose;
-
-PyObject *ArgumentOpen;
-PyObject *ArgumentSeparator;
-PyObject *ArgumentClose;
-
-PyObject *WikilinkOpen;
-PyObject *WikilinkSeparator;
-PyObject *WikilinkClose;
-
-PyObject *ExternalLinkOpen;
-PyObject *ExternalLinkSeparator;
-PyObject *ExternalLinkClose;
-
-PyObject *HTMLEntityStart;
-PyObject *HTMLEntityNumeric;
-PyObject *HTMLEntityHex;
-PyObject *HTMLEntityEnd;
-PyObject *HeadingStart;
-PyObject *HeadingEnd;
-
-PyObject *CommentStart;
-PyObject *CommentEnd;
-
-PyObject *TagOpenOpen;
-PyObject *TagAttrStart;
-PyObject *TagAttrEquals;
-PyObject *TagAttrQuote;
-PyObject *TagCloseOpen;
-PyObject *TagCloseSelfclose;
-PyObject *TagOpenClose;
-PyObject *TagCloseClose;
-
 /*
-    Load individual tokens into globals from the given Python module object.
+    Load the token types from the given Python module object into the given
+    module state. Return 0 on success or -1 on error.
 */
-void
-load_tokens_from_module(PyObject *module)
+int
+load_tokens_from_module(ModuleState *state, PyObject *module)
 {
-    Text = PyObject_GetAttrString(module, "Text");
-
-    TemplateOpen = PyObject_GetAttrString(module, "TemplateOpen");
-    TemplateParamSeparator = PyObject_GetAttrString(module, "TemplateParamSeparator");
-    TemplateParamEquals = PyObject_GetAttrString(module, "TemplateParamEquals");
-    TemplateClose = PyObject_GetAttrString(module, "TemplateClose");
-
-    ArgumentOpen = PyObject_GetAttrString(module, "ArgumentOpen");
-    ArgumentSeparator = PyObject_GetAttrString(module, "ArgumentSeparator");
-    ArgumentClose = PyObject_GetAttrString(module, "ArgumentClose");
-
-    WikilinkOpen = PyObject_GetAttrString(module, "WikilinkOpen");
-    WikilinkSeparator = PyObject_GetAttrString(module, "WikilinkSeparator");
-    WikilinkClose = PyObject_GetAttrString(module, "WikilinkClose");
-
-    ExternalLinkOpen = PyObject_GetAttrString(module, "ExternalLinkOpen");
-    ExternalLinkSeparator = PyObject_GetAttrString(module, "ExternalLinkSeparator");
-    ExternalLinkClose = PyObject_GetAttrString(module, "ExternalLinkClose");
-
-    HTMLEntityStart = PyObject_GetAttrString(module, "HTMLEntityStart");
-    HTMLEntityNumeric = PyObject_GetAttrString(module, "HTMLEntityNumeric");
-    HTMLEntityHex = PyObject_GetAttrString(module, "HTMLEntityHex");
-    HTMLEntityEnd = PyObject_GetAttrString(module, "HTMLEntityEnd");
-
-    HeadingStart = PyObject_GetAttrString(module, "HeadingStart");
-    HeadingEnd = PyObject_GetAttrString(module, "HeadingEnd");
-
-    CommentStart = PyObject_GetAttrString(module, "CommentStart");
-    CommentEnd = PyObject_GetAttrString(module, "CommentEnd");
-
-    TagOpenOpen = PyObject_GetAttrString(module, "TagOpenOpen");
-    TagAttrStart = PyObject_GetAttrString(module, "TagAttrStart");
-    TagAttrEquals = PyObject_GetAttrString(module, "TagAttrEquals");
-    TagAttrQuote = PyObject_GetAttrString(module, "TagAttrQuote");
-    TagCloseOpen = PyObject_GetAttrString(module, "TagCloseOpen");
-    TagCloseSelfclose = PyObject_GetAttrString(module, "TagCloseSelfclose");
-    TagOpenClose = PyObject_GetAttrString(module, "TagOpenClose");
-    TagCloseClose = PyObject_GetAttrString(module, "TagCloseClose");
+#define LOAD_TOKEN_TYPE(name)                                                          \
+    if (!(state->token_##name = PyObject_GetAttrString(module, #name))) {              \
+        return -1;                                                                     \
+    }
+    TOKEN_TYPES(LOAD_TOKEN_TYPE)
+#undef LOAD_TOKEN_TYPE
+    return 0;
 }
@@ -24,46 +24,56 @@ SOFTWARE.
 
 #include "common.h"
 
-/* Token globals */
-
-extern PyObject *Text;
-
-extern PyObject *TemplateOpen;
-extern PyObject *TemplateParamSeparator;
-extern PyObject *TemplateParamEquals;
-extern PyObject *TemplateClose;
-
-extern PyObject *ArgumentOpen;
-extern PyObject *ArgumentSeparator;
-extern PyObject *ArgumentClose;
-
-extern PyObject *WikilinkOpen;
-extern PyObject *WikilinkSeparator;
-extern PyObject *WikilinkClose;
-
-extern PyObject *ExternalLinkOpen;
-extern PyObject *ExternalLinkSeparator;
-extern PyObject *ExternalLinkClose;
-
-extern PyObject *HTMLEntityStart;
-extern PyObject *HTMLEntityNumeric;
-extern PyObject *HTMLEntityHex;
-extern PyObject *HTMLEntityEnd;
-extern PyObject *HeadingStart;
-extern PyObject *HeadingEnd;
-
-extern PyObject *CommentStart;
-extern PyObject *CommentEnd;
-
-extern PyObject *TagOpenOpen;
-extern PyObject *TagAttrStart;
-extern PyObject *TagAttrEquals;
-extern PyObject *TagAttrQuote;
-extern PyObject *TagCloseOpen;
-extern PyObject *TagCloseSelfclose;
-extern PyObject *TagOpenClose;
-extern PyObject *TagCloseClose;
+/* Token types */
+
+/*
+    These find the token types in the module state of the tokenizer "self",
+    like the error handling macros in common.h. Files without one can define
+    TOKEN_STATE to some other ModuleState pointer before including this file.
+*/
+
+#ifndef TOKEN_STATE
+#    define TOKEN_STATE self->state
+#endif
+
+#define Text ((TOKEN_STATE)->token_Text)
+
+#define TemplateOpen ((TOKEN_STATE)->token_TemplateOpen)
+#define TemplateParamSeparator ((TOKEN_STATE)->token_TemplateParamSeparator)
+#define TemplateParamEquals ((TOKEN_STATE)->token_TemplateParamEquals)
+#define TemplateClose ((TOKEN_STATE)->token_TemplateClose)
+
+#define ArgumentOpen ((TOKEN_STATE)->token_ArgumentOpen)
+#define ArgumentSeparator ((TOKEN_STATE)->token_ArgumentSeparator)
+#define ArgumentClose ((TOKEN_STATE)->token_ArgumentClose)
+
+#define WikilinkOpen ((TOKEN_STATE)->token_WikilinkOpen)
+#define WikilinkSeparator ((TOKEN_STATE)->token_WikilinkSeparator)
+#define WikilinkClose ((TOKEN_STATE)->token_WikilinkClose)
+
+#define ExternalLinkOpen ((TOKEN_STATE)->token_ExternalLinkOpen)
+#define ExternalLinkSeparator ((TOKEN_STATE)->token_ExternalLinkSeparator)
+#define ExternalLinkClose ((TOKEN_STATE)->token_ExternalLinkClose)
+
+#define HTMLEntityStart ((TOKEN_STATE)->token_HTMLEntityStart)
+#define HTMLEntityNumeric ((TOKEN_STATE)->token_HTMLEntityNumeric)
+#define HTMLEntityHex ((TOKEN_STATE)->token_HTMLEntityHex)
+#define HTMLEntityEnd ((TOKEN_STATE)->token_HTMLEntityEnd)
+#define HeadingStart ((TOKEN_STATE)->token_HeadingStart)
+#define HeadingEnd ((TOKEN_STATE)->token_HeadingEnd)
+
+#define CommentStart ((TOKEN_STATE)->token_CommentStart)
+#define CommentEnd ((TOKEN_STATE)->token_CommentEnd)
+
+#define TagOpenOpen ((TOKEN_STATE)->token_TagOpenOpen)
+#define TagAttrStart ((TOKEN_STATE)->token_TagAttrStart)
+#define TagAttrEquals ((TOKEN_STATE)->token_TagAttrEquals)
+#define TagAttrQuote ((TOKEN_STATE)->token_TagAttrQuote)
+#define TagCloseOpen ((TOKEN_STATE)->token_TagCloseOpen)
+#define TagCloseSelfclose ((TOKEN_STATE)->token_TagCloseSelfclose)
+#define TagOpenClose ((TOKEN_STATE)->token_TagOpenClose)
+#define TagCloseClose ((TOKEN_STATE)->token_TagCloseClose)
 
 /* Functions */
 
-void load_tokens_from_module(PyObject *);
+int load_tokens_from_module(ModuleState *, PyObject *);
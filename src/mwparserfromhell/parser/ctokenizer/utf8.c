@@ -0,0 +1,166 @@
+/*
+Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+*/
+#include "utf8.h"
+
+#define IS_CONTINUATION(byte) (((byte) & 0xC0) == 0x80)
+
+/*
+    Return the length of the all-ASCII prefix of the given buffer.
+*/
+static Py_ssize_t
+ascii_prefix(const unsigned char *data, Py_ssize_t size)
+{
+    Py_ssize_t i = 0;
+    uint64_t chunk;
+
+    for (; i + 8 <= size; i += 8) {
+        memcpy(&chunk, data + i, 8);
+        if (chunk & 0x8080808080808080ULL) {
+            break;
+        }
+    }
+    while (i < size && data[i] < 0x80) {
+        i++;
+    }
+    return i;
+}
+
+/*
+    Validate the UTF-8 data of the given input, filling in its length in
+    codepoints, its maximum codepoint (rounded up to the bound of its string
+    kind, like PyUnicode_MAX_CHAR_VALUE), and the length of its ASCII prefix.
+
+    Return 0 on success. On failure, set a UnicodeDecodeError and return -1.
+*/
+int
+utf8_scan(TokenizerInput *text)
+{
+    const unsigned char *data = text->data;
+    Py_ssize_t i, size = text->size, length;
+    Py_UCS4 maxchar = 0x7F;
+    unsigned char byte, lo, hi;
+    int extra, j;
+    PyObject *error;
+
+    text->ascii = i = ascii_prefix(data, size);
+    length = i;
+    while (i < size) {
+        byte = data[i];
+        lo = 0x80;
+        hi = 0xBF;
+        if (byte < 0x80) {
+            extra = 0;
+        } else if (byte >= 0xC2 && byte <= 0xDF) {
+            extra = 1;
+            if (byte > 0xC3 && maxchar < 0xFFFF) {
+                maxchar = 0xFFFF;
+            } else if (maxchar < 0xFF) {
+                maxchar = 0xFF;
+            }
+        } else if (byte >= 0xE0 && byte <= 0xEF) {
+            extra = 2;
+            lo = byte == 0xE0 ? 0xA0 : 0x80; // No overlong encodings
+            hi = byte == 0xED ? 0x9F : 0xBF; // No surrogates
+            if (maxchar < 0xFFFF) {
+                maxchar = 0xFFFF;
+            }
+        } else if (byte >= 0xF0 && byte <= 0xF4) {
+            extra = 3;
+            lo = byte == 0xF0 ? 0x90 : 0x80; // No overlong encodings
+            hi = byte == 0xF4 ? 0x8F : 0xBF; // Nothing above U+10FFFF
+            maxchar = 0x10FFFF;
+        } else {
+            goto invalid;
+        }
+        if (i + extra >= size) {
+            goto invalid;
+        }
+        for (j = 1; j <= extra; j++) {
+            byte = data[i + j];
+            if (j == 1 ? (byte < lo || byte > hi) : !IS_CONTINUATION(byte)) {
+                goto invalid;
+            }
+        }
+        i += extra + 1;
+        length++;
+    }
+    text->length = length;
+    text->maxchar = maxchar;
+    text->cursor_index = text->cursor_offset = text->ascii;
+    return 0;
+
+invalid:
+    // Let Python's own decoder describe the error:
+    error = PyUnicode_DecodeUTF8(text->data, text->size, "strict");
+    if (error) {
+        Py_DECREF(error);
+        PyErr_SetString(PyExc_ValueError, "invalid UTF-8 input");
+    }
+    return -1;
+}
+
+/*
+    Read the codepoint at the given index of some UTF-8 input, which must be
+    past its ASCII prefix and before its end.
+
+    The input remembers where its last read was, and we walk there from that
+    point. The tokenizer mostly reads near where it read last, so this is
+    usually quick.
+*/
+Py_UCS4
+utf8_read(TokenizerInput *text, Py_ssize_t index)
+{
+    const unsigned char *data = text->data;
+    Py_ssize_t at = text->cursor_index, offset = text->cursor_offset;
+    Py_UCS4 code;
+    unsigned char byte;
+
+    if (index - text->ascii < (at > index ? at - index : index - at)) {
+        at = offset = text->ascii;
+    }
+    while (at < index) {
+        byte = data[offset];
+        offset += byte < 0xE0 ? (byte < 0x80 ? 1 : 2) : (byte < 0xF0 ? 3 : 4);
+        at++;
+    }
+    while (at > index) {
+        do {
+            offset--;
+        } while (IS_CONTINUATION(data[offset]));
+        at--;
+    }
+    text->cursor_index = at;
+    text->cursor_offset = offset;
+
+    byte = data[offset];
+    if (byte < 0x80) {
+        return byte;
+    } else if (byte < 0xE0) {
+        return ((byte & 0x1F) << 6) | (data[offset + 1] & 0x3F);
+    } else if (byte < 0xF0) {
+        code = ((byte & 0x0F) << 12) | ((data[offset + 1] & 0x3F) << 6);
+        return code | (data[offset + 2] & 0x3F);
+    }
+    code = ((byte & 0x07) << 18) | ((data[offset + 1] & 0x3F) << 12);
+    code |= (data[offset + 2] & 0x3F) << 6;
+    return code | (data[offset + 3] & 0x3F);
+}
@@ -0,0 +1,220 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :func:`iterevents`, which turns a list of tokens into a
+stream of parsing events without building a node tree. It is used by
+:meth:`.Parser.iterparse` and :func:`mwparserfromhell.iterparse`.
+
+Each event is a 2-tuple. ``("text", value)`` carries a piece of text, while
+``("start", name)`` and ``("end", name)`` bracket a node or one of its parts.
+Nodes are named ``"template"``, ``"argument"``, ``"wikilink"``,
+``"external_link"``, ``"html_entity"``, ``"heading"``, ``"comment"``, and
+``"tag"``, and their parts are named after the attributes of the matching
+:class:`.Node` class:
+
+* templates: ``"name"``, then a ``"parameter"`` for each parameter, each with
+  an optional ``"name"`` (only if it was given explicitly) and a ``"value"``
+* arguments: ``"name"`` and an optional ``"default"``
+* wikilinks: ``"title"`` and an optional ``"text"``
+* external links: ``"url"`` and an optional ``"title"``
+* headings: ``"title"``
+* tags: ``"name"``, then an ``"attribute"`` for each attribute, each with a
+  ``"name"`` and an optional ``"value"``, and finally ``"contents"`` unless
+  the tag is self-closing
+
+Comments and HTML entities have no parts; their contents (or the entity's
+value, like ``"nbsp"``, ``"107"``, or ``"6b"``) appear as text directly.
+Markup, such as brackets and closing tags, does not generate events, and text
+is not necessarily yielded in one piece.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from . import tokens
+from .errors import ParserError
+
+__all__ = ["iterevents"]
+
+_NODES = {
+    tokens.TemplateOpen: ("template", "name"),
+    tokens.ArgumentOpen: ("argument", "name"),
+    tokens.WikilinkOpen: ("wikilink", "title"),
+    tokens.ExternalLinkOpen: ("external_link", "url"),
+    tokens.HTMLEntityStart: ("html_entity", None),
+    tokens.HeadingStart: ("heading", "title"),
+    tokens.CommentStart: ("comment", None),
+    tokens.TagOpenOpen: ("tag", "name"),
+}
+
+_SEPARATORS = {
+    tokens.ArgumentSeparator: "default",
+    tokens.WikilinkSeparator: "text",
+    tokens.ExternalLinkSeparator: "title",
+    tokens.TagCloseOpen: "contents",
+}
+
+_CLOSES = frozenset(
+    {
+        tokens.TemplateClose,
+        tokens.ArgumentClose,
+        tokens.WikilinkClose,
+        tokens.ExternalLinkClose,
+        tokens.HTMLEntityEnd,
+        tokens.HeadingEnd,
+        tokens.CommentEnd,
+        tokens.TagCloseSelfclose,
+        tokens.TagCloseClose,
+    }
+)
+
+_SKIPPED = frozenset(
+    {tokens.HTMLEntityNumeric, tokens.HTMLEntityHex, tokens.TagAttrQuote}
+)
+
+
+def _find_named_params(tokenlist):
+    """Return the indices of template parameters that have explicit names.
+
+    Whether a parameter is named is only known once its
+    :class:`.TemplateParamEquals` is reached, so we look for these up front.
+    """
+    named = set()
+    stack = []
+    for index, token in enumerate(tokenlist):
+        if isinstance(token, tokens.TemplateOpen):
+            stack.append(None)
+        elif isinstance(token, tokens.TemplateParamSeparator) and stack:
+            stack[-1] = index
+        elif isinstance(token, tokens.TemplateParamEquals) and stack:
+            named.add(stack[-1])
+        elif isinstance(token, tokens.TemplateClose) and stack:
+            stack.pop()
+    return named
+
+
+def _end(frame):
+    """Return the events that finish the given node or part *frame*."""
+    kind, part = frame
+    if part:
+        return [("end", part), ("end", kind)]
+    return [("end", kind)]
+
+
+def _switch(frame, part):
+    """Move *frame* on to its next *part*, returning the resulting events."""
+    events = [("end", frame[1])] if frame[1] else []
+    frame[1] = part
+    events.append(("start", part))
+    return events
+
+
+def _iterevents(tokenlist, stack):
+    """Yield parsing events for *tokenlist*, tracking open nodes in *stack*."""
+    named = _find_named_params(tokenlist)
+    muted = None  # Stack depth of the closing tag being skipped, if any
+    for index, token in enumerate(tokenlist):
+        ttype = type(token)
+        if ttype is tokens.Text:
+            if muted is None:
+                yield ("text", token.text)
+            continue
+
+        if ttype in _NODES:
+            kind, part = _NODES[ttype]
+            stack.append([kind, part])
+            events = [("start", kind)]
+            if part:
+                events.append(("start", part))
+        elif ttype is tokens.TemplateParamSeparator:
+            if stack[-1][0] == "parameter":
+                events = _end(stack.pop())
+            else:
+                events = [("end", stack[-1][1])]
+                stack[-1][1] = None
+            part = "name" if index in named else "value"
+            stack.append(["parameter", part])
+            events += [("start", "parameter"), ("start", part)]
+        elif ttype is tokens.TemplateParamEquals or ttype is tokens.TagAttrEquals:
+            events = _switch(stack[-1], "value")
+        elif ttype is tokens.TagAttrStart:
+            if stack[-1][0] == "attribute":
+                events = _end(stack.pop())
+            else:
+                events = [("end", stack[-1][1])]
+                stack[-1][1] = None
+            stack.append(["attribute", "name"])
+            events += [("start", "attribute"), ("start", "name")]
+        elif ttype in _SEPARATORS:
+            events = _end(stack.pop()) if stack[-1][0] == "attribute" else []
+            events += _switch(stack[-1], _SEPARATORS[ttype])
+        elif ttype is tokens.TagOpenClose:
+            # Skip everything up to the end of the closing tag:
+            if muted is None:
+                yield ("end", stack[-1][1])
+                muted = len(stack)
+            stack[-1][1] = None
+            continue
+        elif ttype in _CLOSES:
+            if stack[-1][0] in ("parameter", "attribute"):
+                events = _end(stack.pop())
+            else:
+                events = []
+            events += _end(stack.pop())
+            if muted is not None and len(stack) < muted:
+                muted = None
+        elif ttype in _SKIPPED:
+            continue
+        else:
+            err = "iterevents() got unexpected {0}"
+            raise ParserError(err.format(ttype.__name__))
+
+        if muted is None:
+            yield from events
+
+
+def _iterbatches(
+    batches: Iterable[list[tokens.Token]],
+) -> Iterator[tuple[str, str]]:
+    """Yield parsing events for successive lists of tokens.
+
+    The lists are taken one at a time, so only one needs to exist at once. Each
+    must hold every token of the nodes that it starts, like the lists returned
+    by :class:`.IncrementalTokenizer`, since whether a template parameter has
+    a name is worked out from the whole list.
+    """
+    stack: list[list] = []
+    try:
+        for tokenlist in batches:
+            yield from _iterevents(tokenlist, stack)
+    except IndexError:
+        raise ParserError("iterevents() got an unmatched token") from None
+    if stack:
+        raise ParserError("iterevents() missed a close token")
+
+
+def iterevents(tokenlist: list[tokens.Token]) -> Iterator[tuple[str, str]]:
+    """Yield parsing events for a list of tokens; see :mod:`.events`.
+
+    :exc:`.ParserError` is raised if the tokens are not properly nested.
+    """
+    return _iterbatches([tokenlist])
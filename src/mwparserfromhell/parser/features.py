@@ -0,0 +1,60 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains flags for the parts of the wikicode grammar that the
+tokenizer can be asked to recognize. They can be passed as the *features*
+argument to :meth:`.Parser.parse` (and :func:`mwparserfromhell.parse`) to limit
+parsing to a subset of the syntax. Markup for a disabled feature is never
+attempted and is left in the output as plain text, which can make parsing much
+faster when only some kinds of nodes are wanted.
+
+Like contexts, features are stored as an integer, with these definitions
+bitwise OR'd to enable them and AND'd with their complement to disable them.
+For example, to parse everything except tables and HTML tags::
+
+    >>> from mwparserfromhell.parser import features
+    >>> mask = features.ALL & ~(features.TABLES | features.TAGS)
+    >>> mwparserfromhell.parse(text, features=mask)
+
+Features:
+
+* :const:`EXT_LINKS`: external links, bracketed or free
+* :const:`TAGS`: HTML tags, like ``<ref>``
+* :const:`TABLES`: wiki-style tables, like ``{| ... |}``
+* :const:`ENTITIES`: HTML entities, like ``&nbsp;``
+* :const:`HEADINGS`: section headings, like ``== Foo ==``
+* :const:`LISTS`: wiki-style list markup (``#``, ``*``, ``;``, ``:``)
+* :const:`ALL`: all of the above (the default)
+
+Templates, arguments, wikilinks, and comments are always parsed. Style tags
+(``''`` and ``'''``) are controlled separately with *skip_style_tags*.
+"""
+
+from __future__ import annotations
+
+EXT_LINKS = 1 << 0
+TAGS = 1 << 1
+TABLES = 1 << 2
+ENTITIES = 1 << 3
+HEADINGS = 1 << 4
+LISTS = 1 << 5
+
+ALL = EXT_LINKS + TAGS + TABLES + ENTITIES + HEADINGS + LISTS
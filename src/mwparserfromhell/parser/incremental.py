@@ -0,0 +1,127 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :class:`IncrementalTokenizer`, which tokenizes wikicode
+that arrives in chunks, without holding all of it in memory at once.
+"""
+
+from __future__ import annotations
+
+from . import features, tokens
+
+__all__ = ["IncrementalTokenizer"]
+
+
+def _join_text(tokenlist, merged):
+    """Append *tokenlist* to the list *merged*, joining adjacent text tokens.
+
+    The tokenizer splits text at the points where it finds tokens to be final,
+    and we want the result to look like the text was never split.
+    """
+    for token in tokenlist:
+        if isinstance(token, tokens.Text) and merged:
+            last = merged[-1]
+            if isinstance(last, tokens.Text):
+                merged[-1] = tokens.Text(text=last.text + token.text)
+                continue
+        merged.append(token)
+    return merged
+
+
+class IncrementalTokenizer:
+    """Tokenizes wikicode that is read in chunks, like from a large file.
+
+    Pass each chunk of text to :meth:`feed` as it becomes available and call
+    :meth:`close` at the end. Both return a list of the tokens that have become
+    final, meaning that no backtracking caused by later text could change them;
+    joined together, these lists are identical to what
+    :meth:`.Tokenizer.tokenize` would give for the entire text.
+
+    Only the text that can still be affected by backtracking is kept between
+    calls. This is usually little more than the last line, but it can be much
+    longer while a construct like a table or a template is left open. To keep
+    the total work linear, this text is not tokenized again until it has at
+    least doubled in length.
+
+    Like :class:`.Parser`, instances should not be shared between threads, and
+    the arguments are the same as for :meth:`.Parser.parse`.
+    """
+
+    def __init__(self, skip_style_tags=False, features=features.ALL):
+        # pylint: disable=import-outside-toplevel
+        from . import CTokenizer, use_c
+
+        if use_c and CTokenizer:
+            self._tokenizer = CTokenizer()
+        else:
+            from .tokenizer import Tokenizer
+
+            self._tokenizer = Tokenizer()
+        self._skip_style_tags = skip_style_tags
+        self._features = features
+        self._chunks: list[str] = []
+        self._size = 0
+        self._retry_size = 0
+        self._last_text: tokens.Token | None = None
+
+    def _merge(self, tokenlist, final):
+        """Join adjacent text tokens, returning the new list of tokens.
+
+        Unless *final* is ``True``, a text token at the very end is also held
+        back in case the next chunk of text starts with more of it.
+        """
+        merged = [self._last_text] if self._last_text else []
+        _join_text(tokenlist, merged)
+        self._last_text = None
+        if not final and merged and isinstance(merged[-1], tokens.Text):
+            self._last_text = merged.pop()
+        return merged
+
+    def feed(self, chunk: str) -> list[tokens.Token]:
+        """Add a chunk of text, returning any tokens that are now final."""
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        # Tokens can only become final at the end of a line:
+        if self._size < self._retry_size or "\n" not in chunk:
+            return []
+
+        text = "".join(self._chunks)
+        tokenlist, length = self._tokenizer.tokenize_partial(
+            text, self._skip_style_tags, self._features
+        )
+        rest = text[length:]
+        self._chunks = [rest] if rest else []
+        self._size = len(rest)
+        self._retry_size = 2 * len(rest)
+        return self._merge(tokenlist, False)
+
+    def close(self) -> list[tokens.Token]:
+        """Finish tokenizing, returning the rest of the tokens.
+
+        The tokenizer can be used for a new text after this is called.
+        """
+        text = "".join(self._chunks)
+        self._chunks = []
+        self._size = self._retry_size = 0
+        tokenlist = self._tokenizer.tokenize(
+            text, 0, self._skip_style_tags, self._features
+        )
+        return self._merge(tokenlist, True)
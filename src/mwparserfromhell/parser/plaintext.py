@@ -0,0 +1,281 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :func:`strip_tokens`, which turns a list of tokens
+straight into the text that :meth:`.Wikicode.strip_code` would give for the
+tree built from them. It is used by :meth:`.Parser.strip` and
+:func:`mwparserfromhell.strip`.
+
+No :class:`.Node` or :class:`.Wikicode` objects are created, but each kind of
+node is stripped exactly as its :meth:`~.Node.__strip__` method would do it,
+and everything a node's method strips as a separate :class:`.Wikicode` object
+is collapsed on its own.
+"""
+
+from __future__ import annotations
+
+import html.entities as htmlentities
+import re
+
+from ..definitions import is_visible
+from . import tokens
+from .errors import ParserError
+
+__all__ = ["strip_tokens"]
+
+# Runs of three or more newlines, which are collapsed to two:
+_NEWLINES = re.compile(r"\n{3,}")
+
+_OPENS = frozenset(
+    {
+        tokens.TemplateOpen,
+        tokens.ArgumentOpen,
+        tokens.WikilinkOpen,
+        tokens.ExternalLinkOpen,
+        tokens.HTMLEntityStart,
+        tokens.HeadingStart,
+        tokens.CommentStart,
+        tokens.TagOpenOpen,
+    }
+)
+
+_CLOSES = frozenset(
+    {
+        tokens.TemplateClose,
+        tokens.ArgumentClose,
+        tokens.WikilinkClose,
+        tokens.ExternalLinkClose,
+        tokens.HTMLEntityEnd,
+        tokens.HeadingEnd,
+        tokens.CommentEnd,
+        tokens.TagCloseSelfclose,
+        tokens.TagCloseClose,
+    }
+)
+
+_PARAM_ENDS = (tokens.TemplateParamSeparator, tokens.TemplateClose)
+_ATTR_ENDS = (tokens.TagAttrStart, tokens.TagCloseOpen, tokens.TagCloseSelfclose)
+
+
+class _Stripper:
+    """Strips a list of tokens; see :func:`strip_tokens`."""
+
+    def __init__(self, tokenlist, normalize, collapse, keep_template_params):
+        self._tokens = tokenlist
+        self._head = 0
+        self._out = []
+        self._normalize = normalize
+        self._collapse = collapse
+        self._keep_template_params = keep_template_params
+        self._handlers = {
+            tokens.TemplateOpen: self._template,
+            tokens.ArgumentOpen: self._argument,
+            tokens.WikilinkOpen: self._wikilink,
+            tokens.ExternalLinkOpen: self._external_link,
+            tokens.HTMLEntityStart: self._entity,
+            tokens.HeadingStart: self._heading,
+            tokens.CommentStart: self._comment,
+            tokens.TagOpenOpen: self._tag,
+        }
+
+    def _next(self, expected):
+        """Return the token at the head, which must be one of *expected*."""
+        try:
+            token = self._tokens[self._head]
+        except IndexError:
+            raise ParserError("strip_tokens() missed a close token") from None
+        if not isinstance(token, expected):
+            err = "strip_tokens() got unexpected {0}"
+            raise ParserError(err.format(type(token).__name__))
+        self._head += 1
+        return token
+
+    def _at(self, ttype):
+        """Return whether the token at the head is of type *ttype*."""
+        return (
+            self._head < len(self._tokens) and type(self._tokens[self._head]) is ttype
+        )
+
+    def _skip(self, stops):
+        """Skip over tokens up to the next one in *stops* at the same level."""
+        tokenlist, head, depth = self._tokens, self._head, 0
+        while head < len(tokenlist):
+            ttype = type(tokenlist[head])
+            if depth == 0 and ttype in stops:
+                self._head = head
+                return
+            if ttype in _OPENS:
+                depth += 1
+            elif ttype in _CLOSES:
+                depth -= 1
+            head += 1
+        raise ParserError("strip_tokens() missed a close token")
+
+    def code(self, stops=()):
+        """Strip nodes up to the next token in *stops*, like a :class:`.Wikicode`
+        object holding them.
+        """
+        tokenlist, out, handlers = self._tokens, self._out, self._handlers
+        start = len(out)
+        while self._head < len(tokenlist):
+            token = tokenlist[self._head]
+            ttype = type(token)
+            if ttype is tokens.Text:
+                out.append(token.text)
+                self._head += 1
+            elif ttype in stops:
+                break
+            else:
+                try:
+                    handler = handlers[ttype]
+                except KeyError:
+                    err = "strip_tokens() got unexpected {0}"
+                    raise ParserError(err.format(ttype.__name__)) from None
+                self._head += 1
+                handler(token)
+        else:
+            if stops:
+                raise ParserError("strip_tokens() missed a close token")
+
+        if self._collapse and len(out) > start:
+            text = "".join(out[start:]).strip("\n")
+            if "\n\n\n" in text:
+                text = _NEWLINES.sub("\n\n", text)
+            del out[start:]
+            if text:
+                out.append(text)
+
+    def _template(self, token):
+        """Strip a template, like :meth:`.Template.__strip__`."""
+        self._skip(_PARAM_ENDS)
+        if not self._keep_template_params:
+            self._skip((tokens.TemplateClose,))
+            self._head += 1
+            return
+
+        out = self._out
+        start = len(out)
+        while self._next(_PARAM_ENDS).__class__ is tokens.TemplateParamSeparator:
+            # Separate each parameter from the last one, unless it is empty:
+            if len(out) > start:
+                out.append(" ")
+            end = len(out)
+            # We can't tell whether the first part is the name or the value
+            # until we see what comes after it:
+            self.code(_PARAM_ENDS + (tokens.TemplateParamEquals,))
+            if self._at(tokens.TemplateParamEquals):
+                del out[end:]
+                self._head += 1
+                self.code(_PARAM_ENDS)
+            if len(out) == end and end > start:
+                out.pop()
+
+    def _argument(self, token):
+        """Strip an argument, like :meth:`.Argument.__strip__`."""
+        self._skip((tokens.ArgumentSeparator, tokens.ArgumentClose))
+        if self._at(tokens.ArgumentSeparator):
+            self._head += 1
+            self.code((tokens.ArgumentClose,))
+        self._head += 1
+
+    def _wikilink(self, token):
+        """Strip a wikilink, like :meth:`.Wikilink.__strip__`."""
+        start = len(self._out)
+        self.code((tokens.WikilinkSeparator, tokens.WikilinkClose))
+        if self._at(tokens.WikilinkSeparator):
+            del self._out[start:]
+            self._head += 1
+            self.code((tokens.WikilinkClose,))
+        self._head += 1
+
+    def _external_link(self, token):
+        """Strip an external link, like :meth:`.ExternalLink.__strip__`."""
+        stops = (tokens.ExternalLinkSeparator, tokens.ExternalLinkClose)
+        if token.brackets:
+            self._skip(stops)
+            if self._at(tokens.ExternalLinkSeparator):
+                self._head += 1
+                self.code((tokens.ExternalLinkClose,))
+        else:
+            self.code(stops)
+            self._skip((tokens.ExternalLinkClose,))
+        self._head += 1
+
+    def _entity(self, token):
+        """Strip an HTML entity, like :meth:`.HTMLEntity.__strip__`."""
+        token = self._next((tokens.HTMLEntityNumeric, tokens.Text))
+        if type(token) is tokens.Text:
+            value = token.text
+            if self._normalize:
+                text = chr(htmlentities.name2codepoint[value])
+            else:
+                text = f"&{value};"
+        elif self._at(tokens.HTMLEntityHex):
+            char = self._next((tokens.HTMLEntityHex,)).char
+            value = self._next((tokens.Text,)).text
+            text = chr(int(value, 16)) if self._normalize else f"&#{char}{value};"
+        else:
+            value = self._next((tokens.Text,)).text
+            text = chr(int(value)) if self._normalize else f"&#{value};"
+        self._next((tokens.HTMLEntityEnd,))
+        self._out.append(text)
+
+    def _heading(self, token):
+        """Strip a heading, like :meth:`.Heading.__strip__`."""
+        self.code((tokens.HeadingEnd,))
+        self._head += 1
+
+    def _comment(self, token):
+        """Strip a comment, which has no text."""
+        self._skip((tokens.CommentEnd,))
+        self._head += 1
+
+    def _tag(self, token):
+        """Strip a tag, like :meth:`.Tag.__strip__`."""
+        tokenlist, name = self._tokens, []
+        while type(tokenlist[self._head]) is tokens.Text:
+            name.append(tokenlist[self._head].text)
+            self._head += 1
+        self._skip(_ATTR_ENDS[1:])
+        if self._next(_ATTR_ENDS[1:]).__class__ is tokens.TagCloseSelfclose:
+            return
+        if is_visible("".join(name)):
+            self.code((tokens.TagOpenClose,))
+        else:
+            self._skip((tokens.TagOpenClose,))
+        self._skip((tokens.TagCloseClose,))
+        self._head += 1
+
+
+def strip_tokens(
+    tokenlist: list[tokens.Token],
+    normalize: bool = True,
+    collapse: bool = True,
+    keep_template_params: bool = False,
+) -> str:
+    """Return the text of :meth:`.Wikicode.strip_code` for a list of tokens.
+
+    The arguments are the same as for :meth:`~.Wikicode.strip_code`.
+    :exc:`.ParserError` is raised if the tokens are not properly nested.
+    """
+    stripper = _Stripper(tokenlist, normalize, collapse, keep_template_params)
+    stripper.code()
+    return "".join(stripper._out)  # pylint: disable=protected-access
@@ -23,8 +23,10 @@ from __future__ import annotations
 import html.entities
 import math
 import re
+from array import array
 from enum import Enum
-from typing import Literal, cast, overload
+from itertools import islice
+from typing import Any, Literal, cast, overload
 
 from ..definitions import (
     get_html_tag,
@@ -33,7 +35,7 @@ from ..definitions import (
     is_single,
     is_single_only,
 )
-from . import contexts, tokens
+from . import contexts, features, tokens
 from .errors import ParserError
 
 __all__ = ["Tokenizer"]
@@ -74,6 +76,166 @@ class Sentinel(Enum):
 START = Sentinel.START
 END = Sentinel.END
 
+_SPAN_KINDS = {getattr(tokens, name): kind for kind, name in enumerate(tokens.__all__)}
+_SPAN_WIDTHS = {
+    tokens.TemplateOpen: 2,
+    tokens.TemplateParamSeparator: 1,
+    tokens.TemplateParamEquals: 1,
+    tokens.TemplateClose: 2,
+    tokens.ArgumentOpen: 3,
+    tokens.ArgumentSeparator: 1,
+    tokens.ArgumentClose: 3,
+    tokens.WikilinkOpen: 2,
+    tokens.WikilinkSeparator: 1,
+    tokens.WikilinkClose: 2,
+    tokens.HTMLEntityStart: 1,
+    tokens.HTMLEntityNumeric: 1,
+    tokens.HTMLEntityEnd: 1,
+    tokens.CommentStart: 4,
+    tokens.CommentEnd: 3,
+}
+_SPAN_OPENERS = frozenset(
+    (
+        tokens.TemplateOpen,
+        tokens.ArgumentOpen,
+        tokens.WikilinkOpen,
+        tokens.ExternalLinkOpen,
+        tokens.HTMLEntityStart,
+        tokens.HeadingStart,
+        tokens.CommentStart,
+        tokens.TagOpenOpen,
+    )
+)
+_SPAN_CLOSERS = frozenset(
+    (
+        tokens.TemplateClose,
+        tokens.ArgumentClose,
+        tokens.WikilinkClose,
+        tokens.ExternalLinkClose,
+        tokens.HTMLEntityEnd,
+        tokens.HeadingEnd,
+        tokens.CommentEnd,
+        tokens.TagCloseSelfclose,
+        tokens.TagCloseClose,
+    )
+)
+
+# Sections of a tag, used to tell whether its name is part of the source text:
+_TAG_NAME, _TAG_ATTRS, _TAG_BODY, _TAG_CLOSE = range(4)
+
+
+def _build_spans(tokenlist):
+    """Return the kinds, spans, and depths of a list of tokens.
+
+    This works out how much of the source text each token covers, which is the
+    same text the :class:`.Builder` would write for it. The padding after a tag
+    attribute's name and the closing quote of its value have no tokens of their
+    own, so they are counted as part of the token that follows them.
+
+    Tokens are read as the dicts they are rather than through
+    :meth:`.Token.__getattr__`, and text outside of tags skips the frame
+    bookkeeping entirely, since this runs once for every token.
+    """
+    kinds, starts, ends, depths = array("q"), array("q"), array("q"), array("q")
+    text_kind = _SPAN_KINDS[tokens.Text]
+    frames: list[list[Any]] = []
+    frame: list[Any] = []
+    head = depth = 0
+    for token in tokenlist:
+        ttype = type(token)
+        if ttype is tokens.Text:
+            if frame and frame[0] is tokens.TagOpenOpen and frame[1]:
+                if frame[2] == _TAG_NAME or frame[2] == _TAG_CLOSE:
+                    width = 0  # Tag names aren't written out for wiki-markup tags
+                else:
+                    width = len(token["text"])
+            else:
+                width = len(token["text"])
+            kinds.append(text_kind)
+            starts.append(head)
+            head += width
+            ends.append(head)
+            depths.append(depth)
+            continue
+
+        level = depth - 1
+        if ttype in _SPAN_WIDTHS:
+            width = _SPAN_WIDTHS[ttype]
+        elif ttype is tokens.ExternalLinkOpen:
+            width = 1 if token.get("brackets") else 0
+        elif ttype is tokens.ExternalLinkSeparator:
+            width = 0 if token.get("suppress_space") is True else 1
+        elif ttype is tokens.ExternalLinkClose or ttype is tokens.HeadingEnd:
+            if not frame:
+                raise ParserError("malformed token list")
+            width = frame[1]
+        elif ttype is tokens.HTMLEntityHex:
+            width = len(token["char"])
+        elif ttype is tokens.HeadingStart:
+            width = token["level"]
+        elif ttype is tokens.TagOpenOpen:
+            if token.get("wiki_markup"):
+                width = len(token["wiki_markup"])
+            else:
+                width = 2 if token.get("invalid") else 1
+        elif not frame or frame[0] is not tokens.TagOpenOpen:
+            raise ParserError(f"cannot find the span of unexpected {ttype.__name__}")
+        elif ttype is tokens.TagAttrStart:
+            width = frame[3] + len(token.get("pad_first") or "")
+            frame[2:] = [
+                _TAG_ATTRS,
+                len(token.get("pad_before_eq") or ""),
+                token.get("pad_after_eq"),
+            ]
+        elif ttype is tokens.TagAttrEquals:
+            width = frame[3] + 1 + len(frame[4] or "")
+            frame[3] = 0
+        elif ttype is tokens.TagAttrQuote:
+            width = frame[3] = len(token["char"])
+        elif ttype is tokens.TagCloseOpen:
+            width = frame[3] + len(token.get("padding") or "")
+            width += len(token.get("wiki_markup") or "") if frame[1] else 1
+            frame[2:4] = [_TAG_BODY, 0]
+        elif ttype is tokens.TagCloseSelfclose:
+            width = frame[3] + len(token.get("padding") or "")
+            if not frame[1]:
+                width += 1 if token.get("implicit") else 2
+        elif ttype is tokens.TagOpenClose:
+            if not frame[1]:
+                width = 2
+            elif token.get("wiki_markup") is None:
+                width = len(frame[1])
+            else:
+                width = len(token["wiki_markup"])
+            frame[2] = _TAG_CLOSE
+        elif ttype is tokens.TagCloseClose:
+            width = 0 if frame[1] else 1
+        else:  # pragma: no cover (untestable/exceptional case)
+            raise ParserError(f"cannot find the span of unexpected {ttype.__name__}")
+
+        if ttype in _SPAN_OPENERS:
+            level = depth
+            depth += 1
+            if ttype is tokens.TagOpenOpen:
+                frame = [ttype, token.get("wiki_markup") or None, _TAG_NAME, 0, None]
+            else:
+                frame = [ttype, width]
+            frames.append(frame)
+        elif ttype in _SPAN_CLOSERS:
+            if not frames:
+                raise ParserError("malformed token list")
+            frames.pop()
+            frame = frames[-1] if frames else []
+            depth -= 1
+            level = depth
+
+        kinds.append(_SPAN_KINDS[ttype])
+        starts.append(head)
+        head += width
+        ends.append(head)
+        depths.append(level)
+    return kinds, starts, ends, depths
+
 
 class Tokenizer:
     """Creates a list of tokens from a string of wikicode."""
@@ -115,10 +277,18 @@ class Tokenizer:
         self._depth = 0
         self._bad_routes = set()
         self._skip_style_tags = False
+        self._features = features.ALL
+        self._partial = False
+        self._hit_end = False
+        self._safe = (0, 0)
 
     @property
     def _stack(self):
-        """The current token stack."""
+        """The current token stack.
+
+        This does not include tokens written with :meth:`_emit_first`, which
+        are only joined to the stack when it is popped.
+        """
         return self._stacks[-1][0]
 
     @property
@@ -155,7 +325,7 @@ class Tokenizer:
         if new_ident in self._bad_routes:
             raise BadRoute(context)
 
-        self._stacks.append([[], context, [], new_ident])
+        self._stacks.append([[], context, [], new_ident, []])
         self._depth += 1
 
     def _push_textbuffer(self):
@@ -172,12 +342,15 @@ class Tokenizer:
         """
         self._push_textbuffer()
         self._depth -= 1
+        top = self._stacks.pop()
         if keep_context:
-            context = self._context
-            stack = self._stacks.pop()[0]
-            self._context = context
-            return stack
-        return self._stacks.pop()[0]
+            self._context = top[1]
+        stack, head = top[0], top[4]
+        if head:
+            head.reverse()
+            head.extend(stack)
+            return head
+        return stack
 
     def _can_recurse(self):
         """Return whether or not our max recursion depth has been exceeded."""
@@ -208,9 +381,14 @@ class Tokenizer:
         self._stack.append(token)
 
     def _emit_first(self, token):
-        """Write a token to the beginning of the current token stack."""
+        """Write a token to the beginning of the current token stack.
+
+        Rather than shifting the whole stack, the token is appended to a
+        separate list of prepended tokens, which is reversed and joined with
+        the rest of the stack when it is popped.
+        """
         self._push_textbuffer()
-        self._stack.insert(0, token)
+        self._stacks[-1][4].append(token)
 
     def _emit_text(self, text):
         """Write text to the current textbuffer."""
@@ -219,9 +397,12 @@ class Tokenizer:
     def _emit_all(self, tokenlist):
         """Write a series of tokens to the current stack at once."""
         if tokenlist and isinstance(tokenlist[0], tokens.Text):
-            self._emit_text(tokenlist.pop(0).text)
-        self._push_textbuffer()
-        self._stack.extend(tokenlist)
+            self._emit_text(tokenlist[0].text)
+            self._push_textbuffer()
+            self._stack.extend(islice(tokenlist, 1, None))
+        else:
+            self._push_textbuffer()
+            self._stack.extend(tokenlist)
 
     def _emit_text_then_stack(self, text):
         """Pop the current stack, write *text*, and then write the stack."""
@@ -266,6 +447,7 @@ class Tokenizer:
         try:
             return self._text[index]
         except IndexError:
+            self._hit_end = True
             if strict:
                 self._fail_route()
             return END
@@ -381,6 +563,8 @@ class Tokenizer:
         self._head += 2
         try:
             # If the wikilink looks like an external link, parse it as such:
+            if not self._features & features.EXT_LINKS:
+                raise BadRoute()
             link, _extra = self._really_parse_external_link(True)
         except BadRoute:
             self._head = reset + 1
@@ -582,7 +766,11 @@ class Tokenizer:
 
     def _parse_external_link(self, brackets):
         """Parse an external link at the head of the wikicode string."""
-        if self._context & contexts.NO_EXT_LINKS or not self._can_recurse():
+        if (
+            self._context & contexts.NO_EXT_LINKS
+            or not self._features & features.EXT_LINKS
+            or not self._can_recurse()
+        ):
             if not brackets and self._context & contexts.DL_TERM:
                 self._handle_dl_term()
             else:
@@ -701,6 +889,9 @@ class Tokenizer:
 
     def _parse_entity(self):
         """Parse an HTML entity at the head of the wikicode string."""
+        if not self._features & features.ENTITIES:
+            self._emit_text(self._read())
+            return
         reset = self._head
         try:
             self._push(contexts.HTML_ENTITY)
@@ -784,7 +975,7 @@ class Tokenizer:
             self._parse_template_or_argument()
         elif text == nxt == "[":
             self._parse_wikilink()
-        elif text == "<":
+        elif text == "<" and self._features & features.TAGS:
             self._parse_tag()
         else:
             self._emit_text(text)
@@ -1430,7 +1621,8 @@ class Tokenizer:
                 self._handle_template_param()
             elif this == "=" and self._context & contexts.TEMPLATE_PARAM_KEY:
                 if (
-                    not self._global & contexts.GL_HEADING
+                    self._features & features.HEADINGS
+                    and not self._global & contexts.GL_HEADING
                     and self._read(-1) in ("\n", START)
                     and nxt == "="
                 ):
@@ -1468,7 +1660,10 @@ class Tokenizer:
                 and not self._global & contexts.GL_HEADING
                 and not self._context & contexts.TEMPLATE
             ):
-                if self._read(-1) in ("\n", START):
+                if self._features & features.HEADINGS and self._read(-1) in (
+                    "\n",
+                    START,
+                ):
                     self._parse_heading()
                 else:
                     self._emit_text("=")
@@ -1483,12 +1678,21 @@ class Tokenizer:
                     self._parse_comment()
                 else:
                     self._emit_text(this)
-            elif this == "<" and nxt == "/" and self._read(2) is not END:
+            elif (
+                this == "<"
+                and nxt == "/"
+                and self._read(2) is not END
+                and self._features & features.TAGS
+            ):
                 if self._context & contexts.TAG_BODY:
                     self._handle_tag_open_close()
                 else:
                     self._handle_invalid_tag_start()
-            elif this == "<" and not self._context & contexts.TAG_CLOSE:
+            elif (
+                this == "<"
+                and not self._context & contexts.TAG_CLOSE
+                and self._features & features.TAGS
+            ):
                 if self._can_recurse():
                     self._parse_tag()
                 else:
@@ -1499,10 +1703,16 @@ class Tokenizer:
                 result = self._parse_style()
                 if result is not None:
                     return result
-            elif self._read(-1) in ("\n", START) and this in ("#", "*", ";", ":"):
+            elif (
+                self._read(-1) in ("\n", START)
+                and this in ("#", "*", ";", ":")
+                and self._features & features.LISTS
+            ):
                 self._handle_list()
             elif self._read(-1) in ("\n", START) and (
-                this == nxt == self._read(2) == self._read(3) == "-"
+                # Check this first so that we don't read past the end of the
+                # text at blank lines, so tokenize_partial() can stop there:
+                this == "-" == nxt == self._read(2) == self._read(3)
             ):
                 self._handle_hr()
             elif this in ("\n", ":") and self._context & contexts.DL_TERM:
@@ -1514,6 +1724,7 @@ class Tokenizer:
             elif (
                 this == "{"
                 and nxt == "|"
+                and self._features & features.TABLES
                 and (
                     self._read(-1) in ("\n", START)
                     or (
@@ -1576,15 +1787,45 @@ class Tokenizer:
 
             else:
                 self._emit_text(this)
+            if this == "\n" and self._partial:
+                self._mark_safe()
             self._head += 1
 
-    def tokenize(self, text: str, context=0, skip_style_tags=False):
-        """Build a list of tokens from a string of wikicode and return it."""
+    def _mark_safe(self):
+        """Note that the tokens emitted so far are final, if they are.
+
+        This is used by :meth:`tokenize_partial` just after each newline. If we
+        are at the top level and have never read past the end of the text, then
+        nothing that comes next can change the tokens we have emitted.
+        """
+        if len(self._stacks) == 1 and not self._context and not self._hit_end:
+            self._push_textbuffer()
+            self._safe = (self._head + 1, len(self._stack))
+
+    def tokenize(
+        self,
+        text: str | bytes,
+        context=0,
+        skip_style_tags=False,
+        features=features.ALL,
+    ):
+        """Build a list of tokens from a string of wikicode and return it.
+
+        *text* may also be any bytes-like object holding UTF-8, such as
+        ``bytes``, a ``memoryview``, or an ``mmap``. *features* is a bitmask of
+        :mod:`.features` naming the kinds of markup to recognize; anything
+        else is emitted as plain text.
+        """
+        if not isinstance(text, str):
+            text = str(text, "utf8")
         split = self.regex.split(text)
         self._text = [segment for segment in split if segment]
         self._head = self._global = self._depth = 0
         self._bad_routes = set()
         self._skip_style_tags = skip_style_tags
+        self._features = features
+        self._hit_end = False
+        self._safe = (0, 0)
 
         try:
             result = self._parse(context)
@@ -1594,3 +1835,39 @@ class Tokenizer:
             err = "Python tokenizer exited with non-empty token stack"
             raise ParserError(err)
         return result
+
+    def tokenize_spans(
+        self,
+        text: str | bytes,
+        context=0,
+        skip_style_tags=False,
+        features=features.ALL,
+    ):
+        """Tokenize a string of wikicode, returning only where its tokens are.
+
+        The result is a tuple of four parallel ``array.array`` objects of
+        integers, one entry per token: its kind (the index of its type's name
+        in :data:`.tokens.__all__`), its start and end offsets in *text*, and
+        its nesting depth. Tokens that open, separate, or close a node have the
+        depth of the node itself, while the node's contents are one deeper.
+        """
+        tokenlist = self.tokenize(text, context, skip_style_tags, features)
+        return _build_spans(tokenlist)
+
+    def tokenize_partial(
+        self, text: str, skip_style_tags=False, features=features.ALL
+    ) -> tuple[list[tokens.Token], int]:
+        """Tokenize as much of *text* as will not change if more is appended.
+
+        Return a tuple of the tokens that are final and the length of the
+        prefix of *text* that they cover, which always ends with a newline.
+        """
+        # Nothing after the last newline can be final yet, so skip it entirely:
+        end = text.rfind("\n") + 1
+        self._partial = True
+        try:
+            tokenlist = self.tokenize(text[:end], 0, skip_style_tags, features)
+        finally:
+            self._partial = False
+        head, count = self._safe
+        return tokenlist[:count], sum(len(segment) for segment in self._text[:head])
@@ -0,0 +1,500 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :class:`Query`, a compiled selector for finding nodes in
+a tree, which is used by :meth:`.Wikicode.select`.
+
+Selectors are written much like CSS selectors. Each step names a kind of
+object, or ``*`` for any kind, followed by any number of conditions in
+brackets; steps separated by spaces match objects inside the one before at any
+depth, and steps separated by ``>`` match objects directly inside it. Several
+selectors can be joined with commas. For example::
+
+    tag[name=ref] template[name="cite web"] > parameter[name=url]
+
+finds the ``url`` parameter of every ``{{cite web}}`` inside a ``<ref>``.
+Starting a selector with ``>`` makes its first step only match objects at the
+top level of the tree.
+
+The kinds are ``argument``, ``comment``, ``external_link``, ``heading``,
+``html_entity``, ``tag``, ``template``, ``text``, and ``wikilink`` for the
+nodes of the same names, and ``parameter`` and ``attribute`` for the
+:class:`.Parameter`\\ s of templates and the :class:`.Attribute`\\ s of tags.
+The nodes in the name and value of a parameter or attribute are directly
+inside it, and the other nodes in a template or tag are directly inside the
+node. Each kind has these fields:
+
+=================  ==========================
+``argument``       ``name``, ``default``
+``attribute``      ``name``, ``value``
+``comment``        ``contents``
+``external_link``  ``url``, ``title``
+``heading``        ``title``, ``level``
+``html_entity``    ``value``
+``parameter``      ``name``, ``value``
+``tag``            ``name``, ``contents``
+``template``       ``name``
+``text``           ``value``
+``wikilink``       ``title``, ``text``
+=================  ==========================
+
+A condition is either a field on its own, like ``[text]``, which matches if
+the object has a value for that field, or a field, an operator, and a value.
+Values may be quoted with ``"`` or ``'``, inside which a backslash escapes a
+quote or another backslash. ``=`` and ``!=`` test whether the field, with
+surrounding whitespace removed, is equal to the value: the names of templates
+and the titles of wikilinks are compared like :meth:`.Wikicode.matches` does,
+and the names of tags and attributes ignore case. ``~=`` searches the field for
+a regular expression, with the same flags as :meth:`.Wikicode.filter`.
+
+To find matches, each object in the tree is visited at most once, with all of
+the selectors tested together, and the parts of the tree that can't hold a
+match are skipped. The kinds of objects inside each :class:`.Wikicode` are
+remembered from one query to the next, so later queries of the same tree don't
+look inside the ones that can't hold a match at all. These are forgotten when
+the tree changes, in the same way as fingerprints (see :mod:`.fingerprint`),
+and aren't remembered for objects holding a plain ``list`` of nodes.
+"""
+
+from __future__ import annotations
+
+__all__ = ["Query", "compile_query"]
+
+import re
+from collections.abc import Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from .fingerprint import watch
+from .nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    Heading,
+    HTMLEntity,
+    Node,
+    Tag,
+    Template,
+    Text,
+    Wikilink,
+)
+from .nodes.extras import Attribute, Parameter
+from .utils import parse_anything
+
+if TYPE_CHECKING:
+    from .wikicode import Wikicode
+
+_Item = Node | Parameter | Attribute
+
+_KINDS: dict[type, str] = {
+    Argument: "argument",
+    Attribute: "attribute",
+    Comment: "comment",
+    ExternalLink: "external_link",
+    Heading: "heading",
+    HTMLEntity: "html_entity",
+    Parameter: "parameter",
+    Tag: "tag",
+    Template: "template",
+    Text: "text",
+    Wikilink: "wikilink",
+}
+
+# The attribute behind each field of each kind:
+_FIELDS: dict[str, dict[str, str]] = {
+    "argument": {"name": "name", "default": "default"},
+    "attribute": {"name": "name", "value": "value"},
+    "comment": {"contents": "contents"},
+    "external_link": {"url": "url", "title": "title"},
+    "heading": {"title": "title", "level": "level"},
+    "html_entity": {"value": "value"},
+    "parameter": {"name": "name", "value": "value"},
+    "tag": {"name": "tag", "contents": "contents"},
+    "template": {"name": "name"},
+    "text": {"value": "value"},
+    "wikilink": {"title": "title", "text": "text"},
+}
+
+# Each kind has a bit in the masks of kinds found inside Wikicode objects:
+_BITS = {kind: 1 << i for i, kind in enumerate(_FIELDS)}
+_ANY = (1 << len(_BITS)) - 1
+# Kinds of nodes that never have anything inside them:
+_LEAVES = frozenset({"comment", "html_entity", "text"})
+
+_FLAGS = re.IGNORECASE | re.DOTALL
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<comma>,) |
+        (?P<child>>) |
+        (?P<kind>\*|[A-Za-z_]+) |
+        \[\s*(?P<field>[A-Za-z_]+)\s*
+            (?:(?P<op>!=|~=|=)\s*
+                (?:"(?P<dq>(?:[^"\\]|\\.)*)"|'(?P<sq>(?:[^'\\]|\\.)*)'|(?P<bare>[^\]]*))
+            \s*)?
+        \]
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# Backslashes escape quotes and other backslashes in quoted values:
+_ESCAPE = re.compile(r"""\\(["'\\])""")
+
+
+def _kind(obj: _Item) -> str | None:
+    """Return the name of the kind of *obj*, or ``None`` if it has none."""
+    kind = _KINDS.get(type(obj))
+    if kind is None:
+        for cls in type(obj).__mro__:
+            if cls in _KINDS:
+                kind = _KINDS[type(obj)] = _KINDS[cls]
+                break
+    return kind
+
+
+def _text(value: Any) -> str:
+    """Return ``str(value)``, without rendering code that is only text."""
+    nodes = getattr(value, "nodes", None)
+    if nodes is not None and len(nodes) == 1 and type(nodes[0]) is Text:
+        return nodes[0].value
+    return str(value)
+
+
+def _plain(value: Any) -> str:
+    """Normalize a field that is compared exactly."""
+    return _text(value).strip()
+
+
+def _title(value: Any) -> str:
+    """Normalize a page name, like :meth:`.Wikicode.matches` does."""
+    nodes = getattr(value, "nodes", None)
+    if nodes is not None and len(nodes) == 1 and type(nodes[0]) is Text:
+        text = nodes[0].value.strip()
+    else:
+        text = parse_anything(value).strip_code().strip()
+    return (text[0].upper() + text[1:]).replace("_", " ") if text else text
+
+
+def _caseless(value: Any) -> str:
+    """Normalize a field that is compared without case."""
+    return _text(value).strip().lower()
+
+
+# How each field is normalized before being compared with =:
+_NORMALIZERS: dict[tuple[str, str], Callable[[Any], str]] = {
+    ("template", "name"): _title,
+    ("wikilink", "title"): _title,
+    ("tag", "name"): _caseless,
+    ("attribute", "name"): _caseless,
+}
+
+
+def _condition(
+    kind: str | None, field: str, op: str | None, value: str
+) -> Callable[[_Item, str], bool]:
+    """Return a function testing an object of a given kind for a condition."""
+    if kind is not None and field not in _FIELDS[kind]:
+        raise ValueError(f"{kind} has no field {field!r}")
+    if kind is None and not any(field in fields for fields in _FIELDS.values()):
+        raise ValueError(f"no kind has a field {field!r}")
+
+    if op is None:
+        return lambda obj, kind: _get(obj, kind, field) is not None
+    if op == "~=":
+        try:
+            regex = re.compile(value, _FLAGS)
+        except re.error as exc:
+            raise ValueError(f"bad regular expression {value!r}") from exc
+        return lambda obj, kind: (
+            (found := _get(obj, kind, field)) is not None
+            and regex.search(_text(found)) is not None
+        )
+
+    # Normalize the value once for every way it might be compared:
+    targets = {norm: norm(value) for norm in {_plain, *_NORMALIZERS.values()}}
+
+    def equal(obj: _Item, kind: str) -> bool:
+        found = _get(obj, kind, field)
+        if found is None:
+            return False
+        norm = _NORMALIZERS.get((kind, field), _plain)
+        return norm(found) == targets[norm]
+
+    if op == "=":
+        return equal
+    return lambda obj, kind: not equal(obj, kind)
+
+
+def _get(obj: _Item, kind: str, field: str) -> Any:
+    """Return the value of *field* for *obj*, or ``None`` if it has none."""
+    attr = _FIELDS[kind].get(field)
+    return None if attr is None else getattr(obj, attr)
+
+
+class _Step:
+    """One step of a selector: a kind, its conditions, and what comes next."""
+
+    __slots__ = ("bit", "child", "conditions", "kind", "next")
+
+    def __init__(
+        self,
+        kind: str | None,
+        conditions: list[Callable[[_Item, str], bool]],
+        child: bool,
+    ) -> None:
+        self.kind = kind
+        self.conditions = conditions
+        self.child = child  # Whether it must be directly inside the last step
+        self.next: int | None = None
+        self.bit = _ANY if kind is None else _BITS[kind]
+
+
+class _Plan:
+    """What to do with the objects that a set of steps is tested against."""
+
+    __slots__ = ("below", "keep", "need", "tests")
+
+    def __init__(self, steps: list[_Step], states: tuple[int, ...]) -> None:
+        # The steps that objects of each kind could match:
+        self.tests: dict[str | None, list[_Step]] = {}
+        for kind in _FIELDS:
+            matching = [steps[s] for s in states if steps[s].kind in (None, kind)]
+            if matching:
+                self.tests[kind] = matching
+        # The steps that carry on to everything inside an object either way:
+        self.keep = tuple(s for s in states if not steps[s].child)
+        self.need = 0
+        for state in states:
+            self.need |= steps[state].bit
+        # The plan for the objects inside one that doesn't match any step:
+        self.below: _Plan | None = None
+
+
+class Query:
+    """A compiled selector, as described in :mod:`.query`.
+
+    Queries are usually compiled by :func:`compile_query` or
+    :meth:`.Wikicode.select`, which cache them. :exc:`ValueError` is raised if
+    *pattern* isn't a valid selector.
+    """
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self._steps: list[_Step] = []
+        self._start: tuple[int, ...] = ()
+        self._compile()
+        # The plan for each set of steps seen so far:
+        self._plans: dict[tuple[int, ...], _Plan] = {}
+
+    def __repr__(self) -> str:
+        return f"Query({self.pattern!r})"
+
+    def _error(self, pos: int, message: str) -> ValueError:
+        return ValueError(f"{message} at position {pos} of query {self.pattern!r}")
+
+    def _compile(self) -> None:
+        """Turn :attr:`pattern` into a flat list of steps."""
+        pattern, pos = self.pattern, 0
+        start: list[int] = []
+        last: _Step | None = None
+        kind: str | None = None
+        conditions: list[Callable[[_Item, str], bool]] = []
+        child = compound = False
+
+        def finish(end: int) -> None:
+            nonlocal last, kind, conditions, child, compound
+            if not compound:
+                raise self._error(end, "expected a kind or a condition")
+            step = _Step(kind, conditions, child)
+            if last is None:
+                start.append(len(self._steps))
+            else:
+                last.next = len(self._steps)
+            self._steps.append(step)
+            last, kind, conditions, child, compound = step, None, [], False, False
+
+        while pos < len(pattern.rstrip()):
+            match = _TOKEN.match(pattern, pos)
+            if not match:
+                raise self._error(pos, "unexpected character")
+            spaced = pattern[pos].isspace()
+            at = match.end() - len(match[0].lstrip())
+            if match["comma"]:
+                finish(at)
+                last = None
+            elif match["child"]:
+                if compound:
+                    finish(at)
+                elif last is not None or child:
+                    raise self._error(at, "unexpected '>'")
+                child = True
+            elif match["kind"]:
+                if compound:
+                    if not spaced:
+                        raise self._error(at, "expected a space")
+                    finish(at)
+                name = match["kind"]
+                if name != "*" and name not in _FIELDS:
+                    raise self._error(at, f"unknown kind {name!r}")
+                kind, compound = (None if name == "*" else name), True
+            else:
+                if compound and spaced:
+                    finish(at)
+                if match["bare"] is not None:
+                    value = match["bare"].strip()
+                else:
+                    quoted = match["dq"] if match["dq"] is not None else match["sq"]
+                    value = _ESCAPE.sub(r"\1", quoted or "")
+                try:
+                    conditions.append(
+                        _condition(kind, match["field"], match["op"], value)
+                    )
+                except ValueError as exc:
+                    raise self._error(at, str(exc)) from None
+                compound = True
+            pos = match.end()
+        finish(pos)
+        self._start = tuple(start)
+
+    def _plan(self, states: tuple[int, ...]) -> _Plan:
+        """Return the plan for testing objects against *states*."""
+        plan = self._plans.get(states)
+        if plan is None:
+            plan = _Plan(self._steps, states)
+            if plan.keep == states:
+                plan.below = plan
+            elif plan.keep:
+                plan.below = self._plan(plan.keep)
+            self._plans[states] = plan
+        return plan
+
+    def _test(self, obj: Any, kind: str, plan: _Plan, out: list[_Item]) -> _Plan | None:
+        """Test *obj* against *plan*, adding it to *out* if it matches.
+
+        Return the plan for the objects inside *obj*, or ``None`` if none of
+        them can match.
+        """
+        steps = plan.tests.get(kind)
+        if steps is None:
+            return plan.below
+        inner = list(plan.keep)
+        matched = False
+        for step in steps:
+            if all(test(obj, kind) for test in step.conditions):
+                if step.next is None:
+                    matched = True
+                elif step.next not in inner:
+                    inner.append(step.next)
+        if matched:
+            out.append(obj)
+        return self._plan(tuple(inner)) if inner else None
+
+    def _walk(self, code: Wikicode, plan: _Plan, out: list[_Item]) -> int:
+        """Test the nodes of *code* and everything inside them.
+
+        Return a mask of the bits of the kinds of objects inside *code*, or -1
+        if parts of it were skipped without being looked at or it can't be
+        kept. A full mask is cached on *code*, so later walks can skip it
+        entirely if nothing they need is there.
+        """
+        # pylint: disable=protected-access
+        cached = code._kinds
+        fresh = False
+        if cached is not None:
+            if not cached & plan.need:
+                return cached
+            fresh = True
+        tests, walk = plan.tests, self._walk
+        mask = 0
+        # Whether every change inside the nodes will be noticed:
+        cacheable = True
+        for node in code.nodes:
+            kind = _KINDS.get(type(node)) or _kind(node)
+            if kind in _LEAVES:
+                mask |= _BITS[kind]
+                if kind in tests:
+                    self._test(node, kind, plan, out)
+                continue
+            # Changes to what is inside the node must make the mask out of date;
+            # changes to text, comments, and entities don't matter:
+            if not fresh and not watch(node, code):
+                cacheable = False
+            if kind is None:
+                mask |= _ANY
+                inner = plan.below
+            else:
+                mask |= _BITS[kind]
+                inner = self._test(node, kind, plan, out)
+            if inner is None:
+                mask = -1
+            elif isinstance(node, Template):
+                mask |= walk(node.name, inner, out)
+                for param in node.params:
+                    mask |= _BITS["parameter"]
+                    below = self._test(param, "parameter", inner, out)
+                    if below is None:
+                        mask = -1
+                        continue
+                    if param.showkey:
+                        mask |= walk(param.name, below, out)
+                    mask |= walk(param.value, below, out)
+            elif isinstance(node, Tag):
+                if not node.wiki_markup:
+                    mask |= walk(node.tag, inner, out)
+                for attr in node.attributes:
+                    mask |= _BITS["attribute"]
+                    below = self._test(attr, "attribute", inner, out)
+                    if below is None:
+                        mask = -1
+                        continue
+                    mask |= walk(attr.name, below, out)
+                    if attr.value is not None:
+                        mask |= walk(attr.value, below, out)
+                if not node.self_closing:
+                    mask |= walk(node.contents, inner, out)
+                    if not node.wiki_markup and node.closing_tag:
+                        mask |= walk(node.closing_tag, inner, out)
+            else:
+                for child in node.__children__():
+                    mask |= walk(child, inner, out)
+
+        if mask >= 0 and not fresh:
+            # Masks of objects holding plain lists could go out of date without
+            # us noticing, so neither they nor the masks around them are kept:
+            if not cacheable or not watch(code):
+                return -1
+            code._kinds = mask
+        return mask
+
+    def select(self, code: Wikicode) -> list[_Item]:
+        """Return every object in *code* that matches, in the order found."""
+        out: list[_Item] = []
+        self._walk(code, self._plan(self._start), out)
+        return out
+
+
+@lru_cache(maxsize=256)
+def compile_query(pattern: str) -> Query:
+    """Return a :class:`Query` for *pattern*, reusing earlier ones.
+
+    :exc:`ValueError` is raised if *pattern* isn't a valid selector.
+    """
+    return Query(pattern)
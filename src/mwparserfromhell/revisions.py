@@ -0,0 +1,307 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :func:`diff`, which compares two versions of a page
+node-by-node, and :class:`Change`, which describes each difference found.
+"""
+
+from __future__ import annotations
+
+__all__ = ["Change", "diff"]
+
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, Any, Literal
+
+from .fingerprint import code_fingerprint, node_fingerprint
+from .nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    Heading,
+    HTMLEntity,
+    Node,
+    Tag,
+    Template,
+    Text,
+    Wikilink,
+)
+from .nodes.extras import Attribute, Parameter
+from .utils import parse_anything
+
+if TYPE_CHECKING:
+    from .wikicode import Wikicode
+
+_Item = Node | Parameter | Attribute
+
+_NAMES: dict[type, str] = {
+    Argument: "argument",
+    Comment: "comment",
+    ExternalLink: "external link",
+    Heading: "heading",
+    HTMLEntity: "HTML entity",
+    Text: "text",
+}
+
+
+def _describe(obj: _Item) -> str:
+    """Return a short description of *obj* for use in messages."""
+    if isinstance(obj, (Parameter, Attribute)):
+        kind = "parameter" if isinstance(obj, Parameter) else "attribute"
+        return f"{kind} {str(obj.name).strip()!r}"
+    if isinstance(obj, Template):
+        return f"template {str(obj.name).strip()!r}"
+    if isinstance(obj, Tag):
+        return f"tag {str(obj.tag).strip()!r}"
+    if isinstance(obj, Wikilink):
+        return f"wikilink {str(obj.title).strip()!r}"
+    return _NAMES.get(type(obj), type(obj).__name__)
+
+
+class Change:
+    """A single difference between two trees, as returned by :func:`diff`.
+
+    :attr:`kind` is ``"insert"``, ``"delete"``, or ``"change"``. :attr:`old` is
+    the object in the old tree and :attr:`new` is the one in the new tree; for
+    insertions, :attr:`old` is ``None``, and for deletions, :attr:`new` is.
+    Objects are usually nodes, but template parameters and tag attributes are
+    compared on their own, so they can also be :class:`.Parameter` or
+    :class:`.Attribute` objects. :attr:`parents` holds the nodes containing
+    the change in the new tree, from the outermost one inwards.
+
+    ``str()`` gives a short description, like ``"parameter 'date' of template
+    'cite web' changed"``.
+    """
+
+    def __init__(
+        self,
+        kind: Literal["insert", "delete", "change"],
+        old: _Item | None,
+        new: _Item | None,
+        parents: tuple[Node, ...] = (),
+    ) -> None:
+        self.kind = kind
+        self.old = old
+        self.new = new
+        self.parents = parents
+
+    def __repr__(self) -> str:
+        return f"Change({self.kind!r}, {self.old!r}, {self.new!r})"
+
+    def __str__(self) -> str:
+        obj = self.new if self.old is None else self.old
+        assert obj is not None
+        parts = [_describe(obj)]
+        for i, parent in enumerate(reversed(self.parents)):
+            parts.append(("of " if i == 0 else "in ") + _describe(parent))
+        verb = {"insert": "inserted", "delete": "deleted", "change": "changed"}
+        parts.append(verb[self.kind])
+        return " ".join(parts)
+
+
+def _key(node: Node) -> tuple[type, str | None]:
+    """Return what must match for two nodes to be compared with each other.
+
+    Nodes that don't match are reported as a deletion and an insertion
+    rather than a change.
+    """
+    if isinstance(node, (Template, Argument)):
+        return type(node), str(node.name).strip()
+    if isinstance(node, Tag):
+        return type(node), str(node.tag).strip().lower()
+    if isinstance(node, Wikilink):
+        return type(node), str(node.title).strip()
+    return type(node), None
+
+
+def _parts(obj: Node | Parameter | Attribute) -> list[str | Wikicode]:
+    """Return the text and children that *obj* renders, in order."""
+    parts: list[str | Wikicode] = []
+    obj.__render__(parts.append, parts.append)
+    return parts
+
+
+def _same_shape(old: list[Any], new: list[Any]) -> bool:
+    """Return whether two lists of parts differ only inside their children."""
+    if len(old) != len(new):
+        return False
+    for part1, part2 in zip(old, new):
+        if (isinstance(part1, str) or isinstance(part2, str)) and part1 != part2:
+            return False
+    return True
+
+
+class _Differ:
+    """Find the differences between two trees; see :func:`diff`."""
+
+    def __init__(self) -> None:
+        self.changes: list[Change] = []
+
+    def code(self, old: Wikicode, new: Wikicode, parents: tuple[Node, ...]) -> None:
+        """Compare two lists of nodes, skipping the parts that are the same."""
+        if code_fingerprint(old) == code_fingerprint(new):
+            return
+        nodes1, nodes2 = old.nodes, new.nodes
+        start, end1, end2 = 0, len(nodes1), len(nodes2)
+        while (
+            start < end1
+            and start < end2
+            and node_fingerprint(nodes1[start]) == node_fingerprint(nodes2[start])
+        ):
+            start += 1
+        while (
+            end1 > start
+            and end2 > start
+            and node_fingerprint(nodes1[end1 - 1]) == node_fingerprint(nodes2[end2 - 1])
+        ):
+            end1 -= 1
+            end2 -= 1
+
+        nodes1, nodes2 = nodes1[start:end1], nodes2[start:end2]
+        matcher = SequenceMatcher(
+            None,
+            [node_fingerprint(node) for node in nodes1],
+            [node_fingerprint(node) for node in nodes2],
+            autojunk=False,
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                self.block(nodes1[i1:i2], nodes2[j1:j2], parents)
+
+    def block(
+        self, old: list[Node], new: list[Node], parents: tuple[Node, ...]
+    ) -> None:
+        """Compare two runs of nodes that have nothing in common."""
+        matcher = SequenceMatcher(
+            None, [_key(node) for node in old], [_key(node) for node in new], False
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for node1, node2 in zip(old[i1:i2], new[j1:j2]):
+                    self.node(node1, node2, parents)
+            else:
+                for node in old[i1:i2]:
+                    self.changes.append(Change("delete", node, None, parents))
+                for node in new[j1:j2]:
+                    self.changes.append(Change("insert", None, node, parents))
+
+    def node(self, old: Node, new: Node, parents: tuple[Node, ...]) -> None:
+        """Compare two nodes of the same kind."""
+        if node_fingerprint(old) == node_fingerprint(new):
+            return
+        count = len(self.changes)
+        if isinstance(old, Template) and isinstance(new, Template):
+            if code_fingerprint(old.name) == code_fingerprint(new.name):
+                self.extras(old.params, new.params, parents + (new,))
+                if len(self.changes) > count:
+                    return
+        elif isinstance(old, Tag) and isinstance(new, Tag):
+            if self.tag(old, new, parents + (new,)) and len(self.changes) > count:
+                return
+        else:
+            parts1, parts2 = _parts(old), _parts(new)
+            if _same_shape(parts1, parts2):
+                for part1, part2 in zip(parts1, parts2):
+                    if not isinstance(part1, str):
+                        assert not isinstance(part2, str)
+                        self.code(part1, part2, parents + (new,))
+                if len(self.changes) > count:
+                    return
+        # Either the nodes differ too much to look inside, or they differ in a
+        # way nothing inside them shows, like the order of their parameters:
+        self.changes.append(Change("change", old, new, parents))
+
+    def extras(
+        self,
+        old: list[Parameter] | list[Attribute],
+        new: list[Parameter] | list[Attribute],
+        parents: tuple[Node, ...],
+    ) -> None:
+        """Compare the parameters or attributes of two nodes, by name."""
+        by_name: defaultdict[str, list[Any]] = defaultdict(list)
+        for extra in old:
+            by_name[str(extra.name).strip()].append(extra)
+        for extra in new:
+            matches = by_name.get(str(extra.name).strip())
+            if not matches:
+                self.changes.append(Change("insert", None, extra, parents))
+                continue
+            match = matches.pop(0)
+            parts1, parts2 = _parts(match), _parts(extra)
+            if not _same_shape(parts1, parts2) or any(
+                not isinstance(part1, str)
+                and not isinstance(part2, str)
+                and code_fingerprint(part1) != code_fingerprint(part2)
+                for part1, part2 in zip(parts1, parts2)
+            ):
+                self.changes.append(Change("change", match, extra, parents))
+        for matches in by_name.values():
+            for extra in matches:
+                self.changes.append(Change("delete", extra, None, parents))
+
+    def tag(self, old: Tag, new: Tag, parents: tuple[Node, ...]) -> bool:
+        """Compare two tags, or return ``False`` if they differ too much."""
+        attrs = (
+            "wiki_markup",
+            "self_closing",
+            "invalid",
+            "implicit",
+            "padding",
+            "wiki_style_separator",
+            "closing_wiki_markup",
+        )
+        if any(getattr(old, attr) != getattr(new, attr) for attr in attrs):
+            return False
+        if code_fingerprint(old.tag) != code_fingerprint(new.tag):
+            return False
+        if (
+            not old.self_closing
+            and not old.wiki_markup
+            and code_fingerprint(old.closing_tag) != code_fingerprint(new.closing_tag)
+        ):
+            return False
+        self.extras(old.attributes, new.attributes, parents)
+        if not old.self_closing:
+            self.code(old.contents, new.contents, parents)
+        return True
+
+
+def diff(old: Any, new: Any) -> list[Change]:
+    """Return the differences between two versions of some wikicode.
+
+    *old* and *new* can be anything parsable by :func:`.parse_anything`, but
+    are usually :class:`.Wikicode` objects for two revisions of a page. The
+    result is a list of :class:`Change` objects, roughly in the order they
+    appear in the text, that would turn *old* into *new*.
+
+    Nodes are compared by :meth:`fingerprint <.Wikicode.fingerprint>`, so
+    parts of the trees that are the same are skipped without looking inside
+    them, and the work done is proportional to the amount that changed.
+    Changed nodes of the same kind are compared recursively where that makes
+    sense: templates with the same name by their parameters, tags of the same
+    type by their attributes and contents, and other nodes by their children.
+    Template parameters and tag attributes are matched up by name and are
+    reported as a whole when changed; if they were only reordered, the whole
+    node is reported as changed.
+    """
+    differ = _Differ()
+    differ.code(parse_anything(old), parse_anything(new), ())
+    return differ.changes
@@ -0,0 +1,459 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+This module contains :func:`dumps` and :func:`loads`, which convert
+:class:`.Wikicode` objects to and from a compact binary format. They are also
+available as :meth:`.Wikicode.dumps` and :meth:`.Wikicode.loads`.
+
+Loading a tree this way is much faster than parsing its text again, so this is
+meant for caching parsed pages. The format looks like this:
+
+- the four bytes ``MWPH`` and one byte for :data:`FORMAT_VERSION`;
+- the length in bytes of the string table, as a varint;
+- the string table: every distinct string in the tree, encoded in UTF-8 and
+  joined together;
+- everything else, as a sequence of unsigned varints: the number of strings,
+  the length of each one in characters, and then the tree itself.
+
+A :class:`.Wikicode` object is written as the number of nodes it contains
+followed by each node, which is a tag for its type (an index into
+:data:`NODE_TYPES`) followed by its fields in a fixed order. Strings are
+written as indices into the string table, so each one is only stored once.
+Fields that may be ``None`` are written as one more than their value, with
+zero meaning ``None``, and flags are packed together into a single number.
+
+The format is not guaranteed to be readable by other versions of this library;
+:func:`loads` raises :exc:`ValueError` if it sees one it doesn't understand.
+"""
+
+from __future__ import annotations
+
+__all__ = ["FORMAT_VERSION", "NODE_TYPES", "dumps", "loads"]
+
+import gc
+from collections.abc import Callable
+from typing import Any
+
+from .fingerprint import WatchedList
+from .nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    Heading,
+    HTMLEntity,
+    Node,
+    Tag,
+    Template,
+    Text,
+    Wikilink,
+)
+from .nodes.extras import Attribute, Parameter
+from .smart_list import SmartList
+from .wikicode import Wikicode
+
+FORMAT_VERSION = 1
+
+NODE_TYPES: tuple[type[Node], ...] = (
+    Text,
+    Template,
+    Argument,
+    Wikilink,
+    ExternalLink,
+    Tag,
+    Heading,
+    HTMLEntity,
+    Comment,
+)
+
+_MAGIC = b"MWPH"
+_new = object.__new__
+
+
+def _to_varints(values: list[int]) -> bytearray:
+    """Encode a list of unsigned integers as varints."""
+    result = bytearray()
+    append = result.append
+    for value in values:
+        while value > 0x7F:
+            append(value & 0x7F | 0x80)
+            value >>= 7
+        append(value)
+    return result
+
+
+def _from_varints(data: bytes, start: int) -> list[int]:
+    """Decode every varint in *data*, beginning at the index *start*."""
+    values: list[int] = []
+    append = values.append
+    value = shift = 0
+    for byte in memoryview(data)[start:]:
+        if byte & 0x80:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        elif shift:
+            append(value | byte << shift)
+            value = shift = 0
+        else:
+            append(byte)
+    if shift:
+        raise ValueError("serialized data ends in the middle of a number")
+    return values
+
+
+class _Encoder:
+    """Builds the string table and integer sequence for a tree."""
+
+    def __init__(self) -> None:
+        self.strings: dict[str, int] = {}
+        self.out: list[int] = []
+        self._writers: dict[type, Callable[[Any], None]] = {
+            Text: self._text,
+            Template: self._template,
+            Argument: self._argument,
+            Wikilink: self._wikilink,
+            ExternalLink: self._external_link,
+            Tag: self._tag,
+            Heading: self._heading,
+            HTMLEntity: self._html_entity,
+            Comment: self._comment,
+        }
+        self._tags = {nodetype: i for i, nodetype in enumerate(NODE_TYPES)}
+
+    def string(self, value: str) -> None:
+        """Write a string, adding it to the table if it is new."""
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.out.append(index)
+
+    def optional_string(self, value: str | None) -> None:
+        """Write a string that may be ``None``."""
+        if value is None:
+            self.out.append(0)
+        else:
+            index = self.strings.get(value)
+            if index is None:
+                index = self.strings[value] = len(self.strings)
+            self.out.append(index + 1)
+
+    def code(self, code: Wikicode) -> None:
+        """Write a :class:`.Wikicode` object and all of its nodes."""
+        nodes = code.nodes
+        self.out.append(len(nodes))
+        self._nodes(nodes)
+
+    def optional_code(self, code: Wikicode | None) -> None:
+        """Write a :class:`.Wikicode` object that may be ``None``."""
+        if code is None:
+            self.out.append(0)
+        else:
+            nodes = code.nodes
+            self.out.append(len(nodes) + 1)
+            self._nodes(nodes)
+
+    def _nodes(self, nodes: list[Node]) -> None:
+        out, writers, tags = self.out, self._writers, self._tags
+        for node in nodes:
+            nodetype = type(node)
+            try:
+                writer = writers[nodetype]
+            except KeyError:
+                raise TypeError(f"can't serialize {nodetype.__name__} nodes") from None
+            out.append(tags[nodetype])
+            writer(node)
+
+    def _text(self, node: Text) -> None:
+        self.string(node.value)
+
+    def _template(self, node: Template) -> None:
+        self.code(node.name)
+        self.out.append(len(node.params))
+        for param in node.params:
+            self.code(param.name)
+            self.code(param.value)
+            self.out.append(param.showkey)
+
+    def _argument(self, node: Argument) -> None:
+        self.code(node.name)
+        self.optional_code(node.default)
+
+    def _wikilink(self, node: Wikilink) -> None:
+        self.code(node.title)
+        self.optional_code(node.text)
+
+    def _external_link(self, node: ExternalLink) -> None:
+        self.code(node.url)
+        self.optional_code(node.title)
+        self.out.append(node.brackets | node.suppress_space << 1)
+
+    def _tag(self, node: Tag) -> None:
+        self.code(node.tag)
+        # Tags made from wiki markup share one object for both names:
+        if node.closing_tag is node.tag:
+            self.out.append(0)
+        else:
+            self.optional_code(node.closing_tag)
+        self.code(node.contents)
+        self.out.append(len(node.attributes))
+        for attr in node.attributes:
+            self.code(attr.name)
+            self.optional_code(attr.value)
+            self.optional_string(attr.quotes)
+            self.string(attr.pad_first)
+            self.string(attr.pad_before_eq)
+            self.string(attr.pad_after_eq)
+        self.optional_string(node.wiki_markup)
+        self.optional_string(node.closing_wiki_markup)
+        self.out.append(node.self_closing | node.invalid << 1 | node.implicit << 2)
+        self.string(node.padding)
+        self.optional_string(node.wiki_style_separator)
+
+    def _heading(self, node: Heading) -> None:
+        self.code(node.title)
+        self.out.append(node.level)
+
+    def _html_entity(self, node: HTMLEntity) -> None:
+        self.string(node.value)
+        self.out.append(node.named | node.hexadecimal << 1)
+        self.string(node.hex_char)
+
+    def _comment(self, node: Comment) -> None:
+        self.string(node.contents)
+
+
+class _Decoder:
+    """Rebuilds a tree from the integer sequence written by :class:`_Encoder`.
+
+    Nodes are created without calling their constructors, since the values
+    were already validated when the tree was first built. Attributes are set
+    in the same order as the constructors would, so that the new objects can
+    share their dictionary keys with those made by the parser.
+    """
+
+    def __init__(self, read: Callable[[], int], strings: list[str]) -> None:
+        self.read = read
+        self.strings = strings
+        self._readers: tuple[Callable[[], Node], ...] = (
+            self._text,
+            self._template,
+            self._argument,
+            self._wikilink,
+            self._external_link,
+            self._tag,
+            self._heading,
+            self._html_entity,
+            self._comment,
+        )
+
+    def code(self, count: int) -> Wikicode:
+        """Read a :class:`.Wikicode` object with *count* nodes."""
+        read, strings, readers = self.read, self.strings, self._readers
+        nodes: list[Node] = []
+        append = nodes.append
+        for _ in range(count):
+            tag = read()
+            if tag == 0:
+                # Text is by far the most common node, so skip the method call:
+                node = _new(Text)
+                node._value = strings[read()]
+                append(node)
+            else:
+                append(readers[tag]())
+        code = _new(Wikicode)
+        code._nodes = SmartList(nodes)
+        return code
+
+    def optional_code(self) -> Wikicode | None:
+        """Read a :class:`.Wikicode` object that may be ``None``."""
+        count = self.read()
+        return self.code(count - 1) if count else None
+
+    def optional_string(self) -> str | None:
+        """Read a string that may be ``None``."""
+        index = self.read()
+        return self.strings[index - 1] if index else None
+
+    def _text(self) -> Text:
+        node = _new(Text)
+        node._value = self.strings[self.read()]
+        return node
+
+    def _template(self) -> Template:
+        read = self.read
+        node = _new(Template)
+        node._name = self.code(read())
+        params = []
+        for _ in range(read()):
+            param = _new(Parameter)
+            param._name = self.code(read())
+            param._value = self.code(read())
+            param._showkey = bool(read())
+            params.append(param)
+        node._params = WatchedList(params)
+        return node
+
+    def _argument(self) -> Argument:
+        node = _new(Argument)
+        node._name = self.code(self.read())
+        node._default = self.optional_code()
+        return node
+
+    def _wikilink(self) -> Wikilink:
+        node = _new(Wikilink)
+        node._title = self.code(self.read())
+        node._text = self.optional_code()
+        return node
+
+    def _external_link(self) -> ExternalLink:
+        node = _new(ExternalLink)
+        node._url = self.code(self.read())
+        node._title = self.optional_code()
+        flags = self.read()
+        node._brackets = bool(flags & 1)
+        node.suppress_space = bool(flags & 2)
+        return node
+
+    def _tag(self) -> Tag:
+        read, strings = self.read, self.strings
+        node = _new(Tag)
+        node._tag = self.code(read())
+        closing_tag = self.optional_code()
+        node._closing_tag = node._tag if closing_tag is None else closing_tag
+        node._contents = self.code(read())
+        attrs = []
+        for _ in range(read()):
+            attr = _new(Attribute)
+            attr._name = self.code(read())
+            value = self.optional_code()
+            attr._quotes = self.optional_string()
+            attr._value = value
+            attr._pad_first = strings[read()]
+            attr._pad_before_eq = strings[read()]
+            attr._pad_after_eq = strings[read()]
+            attrs.append(attr)
+        node._attrs = WatchedList(attrs)
+        wiki_markup = self.optional_string()
+        node._closing_wiki_markup = self.optional_string()
+        node._wiki_markup = wiki_markup
+        flags = read()
+        node._self_closing = bool(flags & 1)
+        node._invalid = bool(flags & 2)
+        node._implicit = bool(flags & 4)
+        node._padding = strings[read()]
+        node._wiki_style_separator = self.optional_string()
+        return node
+
+    def _heading(self) -> Heading:
+        node = _new(Heading)
+        node._title = self.code(self.read())
+        node._level = self.read()
+        return node
+
+    def _html_entity(self) -> HTMLEntity:
+        node = _new(HTMLEntity)
+        node._value = self.strings[self.read()]
+        flags = self.read()
+        node._named = bool(flags & 1)
+        node._hexadecimal = bool(flags & 2)
+        node._hex_char = self.strings[self.read()]
+        return node
+
+    def _comment(self) -> Comment:
+        node = _new(Comment)
+        node._contents = self.strings[self.read()]
+        return node
+
+
+def dumps(code: Wikicode) -> bytes:
+    """Serialize *code* into a compact binary string.
+
+    The result can be turned back into an identical tree with :func:`loads`.
+    Only the node types that come with this library are supported; other
+    subclasses of :class:`.Node` raise :exc:`TypeError`.
+    """
+    encoder = _Encoder()
+    encoder.code(code)
+    strings = list(encoder.strings)
+    table = "".join(strings).encode("utf8")
+    header = [len(strings)]
+    header.extend(len(string) for string in strings)
+    return b"".join(
+        (
+            _MAGIC,
+            bytes((FORMAT_VERSION,)),
+            _to_varints([len(table)]),
+            table,
+            _to_varints(header),
+            _to_varints(encoder.out),
+        )
+    )
+
+
+def loads(data: bytes | bytearray | memoryview) -> Wikicode:
+    """Load a :class:`.Wikicode` object that was serialized with :func:`dumps`.
+
+    Raises :exc:`ValueError` if *data* is not in a format that this version of
+    the library can read, or if it has been truncated or corrupted.
+    """
+    data = bytes(data)
+    if data[:4] != _MAGIC:
+        raise ValueError("data was not serialized with Wikicode.dumps()")
+    if len(data) < 5 or data[4] != FORMAT_VERSION:
+        version = data[4] if len(data) > 4 else None
+        raise ValueError(f"unsupported serialization format version: {version}")
+
+    pos = 5
+    size = shift = 0
+    while pos < len(data) and data[pos] & 0x80:
+        size |= (data[pos] & 0x7F) << shift
+        shift += 7
+        pos += 1
+    if pos >= len(data):
+        raise ValueError("serialized data is truncated")
+    size |= data[pos] << shift
+    pos += 1
+    try:
+        table = data[pos : pos + size].decode("utf8")
+    except UnicodeDecodeError as exc:
+        raise ValueError("serialized data has an invalid string table") from exc
+
+    values = iter(_from_varints(data, pos + size))
+    read = values.__next__
+    # We create many objects and no cycles, so garbage collection passes would
+    # only slow us down:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        strings = []
+        offset = 0
+        for _ in range(read()):
+            length = read()
+            strings.append(table[offset : offset + length])
+            offset += length
+        code = _Decoder(read, strings).code(read())
+    except (StopIteration, IndexError) as exc:
+        raise ValueError("serialized data is truncated or corrupt") from exc
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if next(values, None) is not None:
+        raise ValueError("serialized data has trailing content")
+    return code
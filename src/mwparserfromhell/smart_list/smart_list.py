@@ -24,6 +24,7 @@ from __future__ import annotations
 from typing import Any
 from weakref import ref
 
+from ..fingerprint import touched
 from .list_proxy import ListProxy
 from .utils import _SliceNormalizerMixIn, inheritdoc
 
@@ -52,11 +53,14 @@ class SmartList(list, _SliceNormalizerMixIn):
         [0, 1, 2, 3, 4]
     """
 
-    __slots__ = ("_children",)
+    __slots__ = ("_children", "_owner")
 
     def __new__(cls, *args, **kwargs):
         obj = super().__new__(cls, *args, **kwargs)
         obj._children = {}
+        # The object holding us, once we are part of a cached fingerprint; see
+        # .fingerprint:
+        obj._owner = None
         return obj
 
     def __reduce_ex__(self, protocol: Any) -> tuple:
@@ -74,6 +78,7 @@ class SmartList(list, _SliceNormalizerMixIn):
         return child
 
     def __setitem__(self, key, item):
+        touched(self._owner)
         if not isinstance(key, slice):
             super().__setitem__(key, item)
             return
@@ -90,17 +95,27 @@ class SmartList(list, _SliceNormalizerMixIn):
                 self._children[id(child)][1][1] += diff
 
     def __delitem__(self, key):
-        super().__delitem__(key)
+        touched(self._owner)
         if isinstance(key, slice):
-            key = self._normalize_slice(key, clamp=True)
+            removed = range(*key.indices(len(self)))
+            if removed.step < 0:
+                removed = removed[::-1]
         else:
-            key = slice(key, key + 1, 1)
-        diff = (key.stop - key.start) // key.step
+            index = key + len(self) if key < 0 else key
+            removed = range(index, index + 1)
+        super().__delitem__(key)
+        if not removed:
+            return
+        # Each bound moves back by the number of removed items before it, so
+        # children overlapping the deleted range shrink instead of shifting:
         for child, (start, stop, _step) in self._children.values():
-            if start > key.start:
-                self._children[id(child)][1][0] -= diff
-            if stop is not None and stop >= key.stop:
-                self._children[id(child)][1][1] -= diff
+            sliceinfo = self._children[id(child)][1]
+            if start > removed.start:
+                end = min(start, removed.stop)
+                sliceinfo[0] -= len(range(removed.start, end, removed.step))
+            if stop is not None and stop > removed.start:
+                end = min(stop, removed.stop)
+                sliceinfo[1] -= len(range(removed.start, end, removed.step))
 
     def __add__(self, other):
         return SmartList(list(self) + other)
@@ -128,6 +143,10 @@ class SmartList(list, _SliceNormalizerMixIn):
         head = len(self)
         self[head:head] = [item]
 
+    @inheritdoc
+    def clear(self):
+        del self[:]
+
     @inheritdoc
     def extend(self, item):
         head = len(self)
@@ -151,11 +170,13 @@ class SmartList(list, _SliceNormalizerMixIn):
 
     @inheritdoc
     def reverse(self):
+        touched(self._owner)
         self._detach_children()
         super().reverse()
 
     @inheritdoc
     def sort(self, *, key=None, reverse=None):
+        touched(self._owner)
         self._detach_children()
         kwargs = {}
         if key is not None:
@@ -25,55 +25,94 @@ users generally won't need stuff from here.
 
 from __future__ import annotations
 
-__all__ = ["parse_anything"]
+__all__ = ["iterparse", "parse_anything", "strip"]
 
+import mmap
 import typing
+from collections.abc import Iterator
 from typing import Any
 
 if typing.TYPE_CHECKING:
+    from .cache import ParseCache
     from .wikicode import Wikicode
 
+_BYTES_LIKE = (bytes, bytearray, memoryview, mmap.mmap)
+
 
 def parse_anything(
-    value: Any, context: int = 0, *, skip_style_tags: bool = False
+    value: Any,
+    context: int = 0,
+    *,
+    skip_style_tags: bool = False,
+    features: int | None = None,
+    parallel: int | None = None,
+    cache: ParseCache | None = None,
 ) -> Wikicode:
     """Return a :class:`.Wikicode` for *value*, allowing multiple types.
 
     This differs from :meth:`.Parser.parse` in that we accept more than just a
-    string to be parsed. Strings, bytes, integers (converted to strings),
+    string to be parsed. Strings, bytes-like objects holding UTF-8 (including
+    ``mmap`` objects, which are read in place), integers (converted to strings),
     ``None``, existing :class:`.Node` or :class:`.Wikicode` objects, as well
     as an iterable of these types, are supported. This is used to parse input
     on-the-fly by various methods of :class:`.Wikicode` and others like
     :class:`.Template`, such as :meth:`wikicode.insert() <.Wikicode.insert>`
     or setting :meth:`template.name <.Template.name>`.
 
-    Additional arguments are passed directly to :meth:`.Parser.parse`.
+    Additional arguments are passed directly to :meth:`.Parser.parse`; if
+    *features* is not given, all of them are enabled. If *cache* is a
+    :class:`.ParseCache`, strings and bytes-like objects are looked up in it
+    before being parsed.
     """
     # pylint: disable=cyclic-import,import-outside-toplevel
     from .nodes import Node
     from .parser import Parser
+    from .parser import features as _features
     from .smart_list import SmartList
     from .wikicode import Wikicode
 
+    if features is None:
+        features = _features.ALL
+
     if isinstance(value, Wikicode):
         return value
     if isinstance(value, Node):
         return Wikicode(SmartList([value]))
-    if isinstance(value, str):
-        return Parser().parse(value, context, skip_style_tags)
-    if isinstance(value, bytes):
-        return Parser().parse(value.decode("utf8"), context, skip_style_tags)
+    if isinstance(value, (str, *_BYTES_LIKE)):
+        if cache is not None:
+            return cache.parse(
+                value,
+                context,
+                skip_style_tags=skip_style_tags,
+                features=features,
+                parallel=parallel,
+            )
+        return Parser().parse(
+            value, context, skip_style_tags, features, parallel=parallel
+        )
     if isinstance(value, int):
-        return Parser().parse(str(value), context, skip_style_tags)
+        return Parser().parse(str(value), context, skip_style_tags, features)
     if value is None:
         return Wikicode(SmartList())
     if hasattr(value, "read"):
-        return parse_anything(value.read(), context, skip_style_tags=skip_style_tags)
+        return parse_anything(
+            value.read(),
+            context,
+            skip_style_tags=skip_style_tags,
+            features=features,
+            parallel=parallel,
+            cache=cache,
+        )
     try:
         nodelist = SmartList()
         for item in value:
             nodelist += parse_anything(
-                item, context, skip_style_tags=skip_style_tags
+                item,
+                context,
+                skip_style_tags=skip_style_tags,
+                features=features,
+                parallel=parallel,
+                cache=cache,
             ).nodes
         return Wikicode(nodelist)
     except TypeError as exc:
@@ -82,3 +121,70 @@ def parse_anything(
             "iterable of these, but got {0}: {1}"
         )
         raise ValueError(error.format(type(value).__name__, value)) from exc
+
+
+def iterparse(
+    value: str | bytes | bytearray | memoryview | mmap.mmap,
+    context: int = 0,
+    *,
+    skip_style_tags: bool = False,
+    features: int | None = None,
+) -> Iterator[tuple[str, str]]:
+    """Return an iterator over parsing events for the wikicode in *value*.
+
+    This is a lighter alternative to :func:`parse_anything` for code that only
+    needs to look over a page once: no node tree is built, and events like
+    ``("start", "template")``, ``("text", "foo")``, and ``("end", "template")``
+    are yielded straight from the tokenizer. See :mod:`.parser.events` for the
+    full list. *value* must be a string or a bytes-like object holding UTF-8,
+    such as ``bytes`` or an ``mmap``, or :exc:`TypeError` is raised; the other
+    arguments are passed to :meth:`.Parser.iterparse`.
+    """
+    # pylint: disable=cyclic-import,import-outside-toplevel
+    from .parser import Parser
+    from .parser import features as _features
+
+    if features is None:
+        features = _features.ALL
+    if not isinstance(value, (str, *_BYTES_LIKE)):
+        error = "Needs string or bytes, but got {0}: {1}"
+        raise TypeError(error.format(type(value).__name__, value))
+    return Parser().iterparse(value, context, skip_style_tags, features)
+
+
+def strip(
+    value: str | bytes | bytearray | memoryview | mmap.mmap,
+    normalize: bool = True,
+    collapse: bool = True,
+    *,
+    keep_template_params: bool = False,
+    skip_style_tags: bool = False,
+    features: int | None = None,
+) -> str:
+    """Return the printable text of the wikicode in *value*.
+
+    This gives the same result as ``parse_anything(value).strip_code(...)``,
+    but no node tree is built: the text is stripped straight from the
+    tokenizer's output. *normalize*, *collapse*, and *keep_template_params*
+    are passed to :meth:`.Wikicode.strip_code`. As with :func:`iterparse`,
+    *value* must be a string or a bytes-like object holding UTF-8; the other
+    arguments are passed to :meth:`.Parser.strip`.
+    """
+    # pylint: disable=cyclic-import,import-outside-toplevel
+    from .parser import Parser
+    from .parser import features as _features
+
+    if features is None:
+        features = _features.ALL
+    if not isinstance(value, (str, *_BYTES_LIKE)):
+        error = "Needs string or bytes, but got {0}: {1}"
+        raise TypeError(error.format(type(value).__name__, value))
+    return Parser().strip(
+        value,
+        0,
+        skip_style_tags,
+        features,
+        normalize=normalize,
+        collapse=collapse,
+        keep_template_params=keep_template_params,
+    )
@@ -21,11 +21,14 @@
 from __future__ import annotations
 
 import re
-from collections.abc import Callable, Generator, Iterable
+from bisect import bisect_left
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
 from enum import Enum
 from itertools import chain
-from typing import Any, Literal, TypeVar, cast, overload
+from typing import Any, Literal, Protocol, TypeVar, cast, overload
 
+from .fingerprint import code_fingerprint, touched
 from .nodes import (
     Argument,
     Comment,
@@ -38,17 +41,28 @@ from .nodes import (
     Text,
     Wikilink,
 )
+from .nodes._base import render, render_to
+from .nodes.extras import Attribute, Parameter
+from .query import Query, compile_query
 from .smart_list.list_proxy import ListProxy
 from .string_mixin import StringMixIn
 from .utils import parse_anything
 
-__all__ = ["Wikicode"]
+__all__ = ["Batch", "Wikicode"]
 
 FLAGS = re.IGNORECASE | re.DOTALL
 
 N = TypeVar("N", bound=Node)
 
 
+class _SupportsWrite(Protocol):
+    def write(self, text: str, /) -> Any: ...
+
+
+# Runs of three or more newlines, which strip_code() collapses to two:
+_NEWLINES = re.compile(r"\n{3,}")
+
+
 class Recurse(Enum):
     RECURSE_OTHERS = 2
 
@@ -66,12 +80,37 @@ class Wikicode(StringMixIn):
 
     RECURSE_OTHERS = Recurse.RECURSE_OTHERS
 
+    # The node containing this object, once track_parents() has been called or
+    # it is part of a cached fingerprint:
+    _parent_node: Node | None = None
+    _tracking = False
+    # The value of fingerprint(), once it is cached; see .fingerprint:
+    _fingerprint: bytes | None = None
+    # Attributes holding lists that can be edited directly; see .fingerprint:
+    _lists = ("_nodes",)
+    # The kinds of objects inside this one, once they are cached; see .query:
+    _kinds: int | None = None
+
     def __init__(self, nodes: list[Node]):
         super().__init__()
         self._nodes = nodes
 
     def __str__(self) -> str:
-        return "".join([str(node) for node in self.nodes])
+        return render(self)
+
+    def __render__(
+        self, write: Callable[[str], None], get: Callable[[Wikicode], None]
+    ) -> None:
+        get(self)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Parent links aren't copied or pickled; see Node.__getstate__():
+        state = self.__dict__.copy()
+        state.pop("_parent_node", None)
+        state.pop("_tracking", None)
+        state.pop("_fingerprint", None)
+        state.pop("_kinds", None)
+        return state
 
     @overload
     @staticmethod
@@ -114,6 +153,33 @@ class Wikicode(StringMixIn):
         substring = "".join(nodes).replace(old, new)
         code.nodes[index] = parse_anything(substring).nodes
 
+    @staticmethod
+    def _render_spans(code: Wikicode) -> tuple[str, dict[int, tuple[int, int]]]:
+        """Render *code* in a single pass, noting where each node's text is.
+
+        Return the text and a dict mapping the ``id()`` of every node rendered
+        to the (*start*, *end*) offsets of its text within it. Nodes whose
+        :meth:`.Node.__render__` doesn't pass their children to *get* leave
+        those children out of the dict.
+        """
+        parts: list[str] = []
+        spans: dict[int, tuple[int, int]] = {}
+        length = 0
+
+        def write(text: str) -> None:
+            nonlocal length
+            parts.append(text)
+            length += len(text)
+
+        def get(code: Wikicode) -> None:
+            for node in code.nodes:
+                start = length
+                node.__render__(write, get)
+                spans[id(node)] = (start, length)
+
+        get(code)
+        return "".join(parts), spans
+
     @staticmethod
     def _build_matcher(
         matches: Callable[[N], bool | re.Match[str] | None] | re.Pattern | str | None,
@@ -165,8 +231,98 @@ class Wikicode(StringMixIn):
             ):
                 yield (i, cast(N, node))
 
+    @staticmethod
+    def _link(code: Wikicode, parent: Node | None = None) -> None:
+        """Set the parent links of *code* and everything below it.
+
+        *parent* is the node that contains *code*, if any.
+        """
+        todo = [(code, parent)]
+        while todo:
+            code, parent = todo.pop()
+            if parent is not None:
+                code._parent_node = parent
+            for i, node in enumerate(code.nodes):
+                node._parent_code = code
+                node._parent_index = i
+                todo.extend((child, node) for child in node.__children__())
+
+    def _link_nodes(self, start: int, count: int) -> None:
+        """Link *count* nodes starting at *start* that were just added to us."""
+        if not self._tracking and self._parent_node is None:
+            return
+        for i in range(start, start + count):
+            node = self.nodes[i]
+            node._parent_code = self
+            node._parent_index = i
+            for child in node.__children__():
+                self._link(child, node)
+
+    def _child_index(self, node: Node) -> int | None:
+        """Return the index of *node* among our nodes using its parent link."""
+        nodes = self.nodes
+        index = node._parent_index
+        if index < len(nodes) and nodes[index] is node:
+            return index
+        # Indices shift when nodes are added or removed, so number them again:
+        found = None
+        for i, child in enumerate(nodes):
+            child._parent_code = self
+            child._parent_index = i
+            if child is node and found is None:
+                found = i
+        return found
+
+    def _follow_links(self, obj: Node) -> list[tuple[Wikicode, int]] | None:
+        """Follow parent links from *obj* up to this object.
+
+        Every step is checked against the tree, so stale links are never
+        trusted. Return a list of (*context*, *index*) pairs going up from the
+        :class:`.Wikicode` holding *obj* to ourselves, or ``None`` if the links
+        don't lead here.
+        """
+        path = []
+        node = obj
+        while True:
+            code = node._parent_code
+            if code is None:
+                return None
+            index = code._child_index(node)
+            if index is None:
+                return None
+            path.append((code, index))
+            if code is self:
+                return path
+            parent = code._parent_node
+            if parent is None or not any(
+                child is code for child in parent.__children__()
+            ):
+                return None
+            node = parent
+
+    def _trace(self, obj: Node) -> list[tuple[Wikicode, int]] | None:
+        """Find where *obj* is using parent links, which must be tracked.
+
+        If the links are stale, the whole tree is linked again and we try once
+        more. Since every node in the tree has a correct link after that,
+        ``None`` is returned only if *obj* isn't in the tree at all.
+        """
+        path = self._follow_links(obj)
+        if path is None:
+            self._link(self)
+            path = self._follow_links(obj)
+        return path
+
     def _is_child_wikicode(self, obj: Wikicode, recursive: bool = True) -> bool:
         """Return whether the given :class:`.Wikicode` is a descendant."""
+        if recursive and self._tracking:
+            parent = obj._parent_node
+            if (
+                parent is not None
+                and any(child is obj for child in parent.__children__())
+                and self._trace(parent) is not None
+            ):
+                return True
 
         def deref(nodes):
             if isinstance(nodes, ListProxy):
@@ -210,6 +366,12 @@ class Wikicode(StringMixIn):
             def mkslice(i):
                 return slice(i, i + 1)
 
+            if self._tracking:
+                path = self._trace(obj)
+                if path is None or not (recursive or len(path) == 1):
+                    raise ValueError(obj)
+                context, index = path[0]
+                return context, mkslice(index)
             if not recursive:
                 return self, mkslice(self.index(obj))
             for node in self.nodes:
@@ -243,8 +405,44 @@ class Wikicode(StringMixIn):
         multiple nodes.
         """
         obj = parse_anything(obj)
-        if not obj or obj not in self:
+        text, spans = self._render_spans(self)
+        pieces = [str(node) for node in obj.nodes]
+        needle = "".join(pieces)
+        if not needle or needle not in text:
             raise ValueError(obj)
+
+        # Every node is compared using its offsets into the text rendered
+        # above, and the needle is found within it only once, so no subtree
+        # has to be rendered again as we go down the tree:
+        found: list[int] = []
+
+        def find_all(start: int) -> None:
+            pos = text.find(needle, start)
+            while pos >= 0:
+                found.append(pos)
+                pos = text.find(needle, pos + 1)
+
+        def locate(node: Node, context: Wikicode) -> tuple[int, int]:
+            nonlocal text
+            if id(node) not in spans:  # Hidden by a custom Node.__render__()
+                extra, more = self._render_spans(context)
+                offset = len(text)
+                text += extra
+                for key, (start, end) in more.items():
+                    spans[key] = (start + offset, end + offset)
+                find_all(offset)
+            return spans[id(node)]
+
+        def equals(piece: str, node: Node, context: Wikicode) -> bool:
+            start, end = locate(node, context)
+            return end - start == len(piece) and text.startswith(piece, start)
+
+        def contains(node: Node, context: Wikicode) -> bool:
+            start, end = locate(node, context)
+            i = bisect_left(found, start)
+            return i < len(found) and found[i] + len(needle) <= end
+
+        find_all(0)
         results = []
         contexts: list[Wikicode] = [self]
         while contexts:
@@ -252,15 +450,15 @@ class Wikicode(StringMixIn):
             i = len(context.nodes) - 1
             while i >= 0:
                 node = context.get(i)
-                if obj.get(-1) == node:
-                    for j in range(-len(obj.nodes), -1):
-                        if obj.get(j) != context.get(i + j + 1):
+                if equals(pieces[-1], node, context):
+                    for j in range(-len(pieces), -1):
+                        if not equals(pieces[j], context.get(i + j + 1), context):
                             break
                     else:
                         i -= len(obj.nodes) - 1
                         index = slice(i, i + len(obj.nodes))
                         results.append((True, context, index))
-                elif recursive and obj in node:
+                elif recursive and contains(node, context):
                     contexts.extend(node.__children__())
                 i -= 1
         if not results:
@@ -313,6 +511,7 @@ class Wikicode(StringMixIn):
 
     @nodes.setter
     def nodes(self, value: list[Node] | Any) -> None:
+        touched(self)
         if not isinstance(value, list):
             value = parse_anything(value).nodes
         self._nodes = value
@@ -342,6 +541,7 @@ class Wikicode(StringMixIn):
             raise IndexError("List assignment index out of range")
         if nodes:
             self.nodes[index] = nodes[0]
+            self._link_nodes(index % len(self.nodes), 1)
         else:
             self.nodes.pop(index)
 
@@ -371,6 +571,11 @@ class Wikicode(StringMixIn):
         nodes. Otherwise, the lookup is done only on direct descendants.
         """
         strict = isinstance(obj, Node)
+        if strict and self._tracking:
+            path = self._trace(cast(Node, obj))
+            if path is None or not (recursive or len(path) == 1):
+                raise ValueError(obj)
+            return path[-1][1]
         equivalent = (lambda o, n: o is n) if strict else (lambda o, n: o == n)
         for i, node in enumerate(self.nodes):
             if recursive:
@@ -413,6 +618,11 @@ class Wikicode(StringMixIn):
         elif not isinstance(obj, Node):
             raise ValueError(obj)
 
+        if self._tracking:
+            path = self._trace(obj)
+            if path is None:
+                raise ValueError(obj)
+            return [cast(Node, code._parent_node) for code, _ in path[-2::-1]]
         ancestors = _get_ancestors(self, obj)
         if ancestors is None:
             raise ValueError(obj)
@@ -429,6 +639,28 @@ class Wikicode(StringMixIn):
         ancestors = self.get_ancestors(obj)
         return ancestors[-1] if ancestors else None
 
+    def track_parents(self) -> None:
+        """Make every node in the tree remember where it is.
+
+        Normally, finding a specific :class:`.Node` or :class:`.Wikicode`
+        object means walking the tree down from the top, so each call to
+        :meth:`get_ancestors`, :meth:`get_parent`, :meth:`contains`, or
+        :meth:`insert_before`, :meth:`insert_after`, :meth:`replace`, and
+        :meth:`remove` with such an object takes time proportional to the size
+        of the whole tree. After this is called, they follow links up from the
+        object instead, which only takes time proportional to its depth. This
+        is worth it for code that makes many edits to a large page.
+
+        Nodes added with methods like :meth:`insert` are linked as they go in.
+        Links that are made stale by other changes, such as setting
+        :attr:`.Template.name` or changing :attr:`nodes` directly, are noticed
+        when they are used, and the tree is linked again from scratch, so
+        results are always the same as without tracking. Links are not copied
+        or pickled along with the tree.
+        """
+        self._tracking = True
+        self._link(self)
+
     def insert(self, index: int, value: Any) -> None:
         """Insert *value* at *index* in the list of nodes.
 
@@ -436,8 +668,10 @@ class Wikicode(StringMixIn):
         includes strings or other :class:`.Wikicode` or :class:`.Node` objects.
         """
         nodes = parse_anything(value).nodes
-        for node in reversed(nodes):
-            self.nodes.insert(index, node)
+        size = len(self.nodes)
+        start = max(size + index, 0) if index < 0 else min(index, size)
+        self.nodes[start:start] = nodes
+        self._link_nodes(start, len(nodes))
 
     def insert_before(
         self, obj: Node | Wikicode | str, value: Any, recursive: bool = True
@@ -505,14 +739,12 @@ class Wikicode(StringMixIn):
         """
         if isinstance(obj, (Node, Wikicode)):
             context, index = self._do_strong_search(obj, recursive)
-            for _ in range(index.start, index.stop):
-                context.nodes.pop(index.start)
+            del context.nodes[index]
             context.insert(index.start, value)
         else:
             for exact, context, index in self._do_weak_search(obj, recursive):
                 if exact:
-                    for _ in range(index.start, index.stop):
-                        context.nodes.pop(index.start)
+                    del context.nodes[index]
                     context.insert(index.start, value)
                 else:
                     self._slice_replace(context, index, str(obj), str(value))
@@ -525,6 +757,7 @@ class Wikicode(StringMixIn):
         nodes = parse_anything(value).nodes
         for node in nodes:
             self.nodes.append(node)
+        self._link_nodes(len(self.nodes) - len(nodes), len(nodes))
 
     def remove(self, obj: Node | Wikicode | str, recursive: bool = True) -> None:
         """Remove *obj* from the list of nodes.
@@ -540,16 +773,43 @@ class Wikicode(StringMixIn):
         """
         if isinstance(obj, (Node, Wikicode)):
             context, index = self._do_strong_search(obj, recursive)
-            for _ in range(index.start, index.stop):
-                context.nodes.pop(index.start)
+            del context.nodes[index]
         else:
             for exact, context, index in self._do_weak_search(obj, recursive):
                 if exact:
-                    for _ in range(index.start, index.stop):
-                        context.nodes.pop(index.start)
+                    del context.nodes[index]
                 else:
                     self._slice_replace(context, index, str(obj), "")
 
+    @contextmanager
+    def batch(self) -> Iterator[Batch]:
+        """Make many edits to specific nodes at once, in a single pass.
+
+        This is a context manager that gives a :class:`.Batch`, which has
+        methods like :meth:`remove` and :meth:`replace` that take a
+        :class:`.Node` somewhere in this object. Edits are only recorded until
+        the ``with`` block ends, and then they are all applied together: the
+        tree is searched once for every node involved, and nearby edits in the
+        same list of nodes are merged. This is much faster than calling the
+        methods here one at a time when making hundreds of changes::
+
+            >>> code = mwparserfromhell.parse("{{a}}{{b|{{c}}}}{{d}}")
+            >>> with code.batch() as batch:
+            ...     for template in code.filter_templates():
+            ...         if template.name in ("a", "c"):
+            ...             batch.remove(template)
+            ...         elif template.name == "d":
+            ...             batch.replace(template, "{{e}}")
+            ...
+            >>> print(code)
+            {{b|}}{{e}}
+
+        If the block raises an exception, nothing is changed.
+        """
+        batch = Batch(self)
+        yield batch
+        batch.apply()
+
     def matches(
         self,
         other: Node | Wikicode | str | bytes | Iterable[Node | Wikicode | str | bytes],
@@ -938,6 +1198,22 @@ class Wikicode(StringMixIn):
             recursive=recursive, matches=matches, flags=flags, forcetype=Wikilink
         )
 
+    def select(self, query: str | Query) -> list[Node | Parameter | Attribute]:
+        """Return a list of the objects in the tree matching a selector.
+
+        *query* is a string like ``'template[name="cite web"] >
+        parameter[name=url]'``, written as described in :mod:`.query`, or a
+        :class:`.Query` compiled from one. Strings are compiled once and
+        reused. Matches are usually nodes, but can also be the
+        :class:`.Parameter`\\ s of templates and :class:`.Attribute`\\ s of tags,
+        and are listed in the order they appear.
+
+        :exc:`ValueError` is raised if *query* isn't a valid selector.
+        """
+        if not isinstance(query, Query):
+            query = compile_query(query)
+        return query.select(self)
+
     def get_sections(
         self,
         levels: Iterable[int] | None = None,
@@ -1042,19 +1318,25 @@ class Wikicode(StringMixIn):
             "collapse": collapse,
             "keep_template_params": keep_template_params,
         }
+        out: list[str] = []
 
-        nodes = []
-        for node in self.nodes:
-            stripped = node.__strip__(**kwargs)
-            if stripped:
-                nodes.append(str(stripped))
-
-        if collapse:
-            stripped = "".join(nodes).strip("\n")
-            while "\n\n\n" in stripped:
-                stripped = stripped.replace("\n\n\n", "\n\n")
-            return stripped
-        return "".join(nodes)
+        # Every object is stripped into the same list. Objects inside of nodes
+        # are collapsed as if they were stripped on their own, by joining the
+        # part of the list they wrote:
+        def strip(code: Wikicode) -> None:
+            start = len(out)
+            for node in code.nodes:
+                node.__strip_into__(out, strip, kwargs)
+            if collapse and len(out) > start:
+                text = "".join(out[start:]).strip("\n")
+                if "\n\n\n" in text:
+                    text = _NEWLINES.sub("\n\n", text)
+                del out[start:]
+                if text:
+                    out.append(text)
+
+        strip(self)
+        return "".join(out)
 
     def get_tree(self) -> str:
         """Return a hierarchical tree representation of the object.
@@ -1081,3 +1363,223 @@ class Wikicode(StringMixIn):
         """
         marker = object()  # Random object we can find with certainty in a list
         return "\n".join(self._get_tree(self, [], marker, 0))
+
+    def fingerprint(self) -> bytes:
+        """Return a 16-byte hash of the structure and text of this object.
+
+        This is built from the fingerprints of our nodes (see
+        :meth:`.Node.fingerprint`), so two objects with the same nodes in the
+        same order have the same fingerprint, and the value is stable between
+        runs. It is cached until the tree is changed, so comparing or looking
+        up trees by fingerprint doesn't render them each time. See
+        :mod:`.fingerprint` for details.
+        """
+        return code_fingerprint(self)
+
+    def render_into(self, out: list[str] | _SupportsWrite) -> None:
+        """Write the text of this object into *out*, piece by piece.
+
+        *out* can be a list, which the pieces are appended to, or any object
+        with a ``write()`` method that takes a string, like a text file or an
+        :class:`io.StringIO`. The tree is walked once and nothing is joined
+        along the way, so the time taken depends only on the length of the
+        text, no matter how deeply it is nested. ``"".join(out)`` on the list
+        gives the same result as :func:`str`.
+        """
+        write = out.append if isinstance(out, list) else out.write
+        render_to(self, write)
+
+    def write(self, fp: _SupportsWrite) -> None:
+        """Write the text of this object to the text file *fp*.
+
+        This gives the same output as ``fp.write(str(code))``, but the text is
+        written out in chunks instead of building the whole string in memory
+        first. The pieces are mostly strings already held by the tree, so only
+        references to them are collected before writing.
+        """
+        pieces: list[str] = []
+        render_to(self, pieces.append)
+        for i in range(0, len(pieces), 4096):
+            fp.write("".join(pieces[i : i + 4096]))
+
+    def dumps(self) -> bytes:
+        """Serialize the object into a compact binary string.
+
+        This is much smaller and faster to load than a pickle, which makes it
+        useful for caching parsed pages. Use :meth:`loads` to get the tree
+        back. See :mod:`.serialize` for details about the format.
+        """
+        # pylint: disable=cyclic-import,import-outside-toplevel
+        from .serialize import dumps
+
+        return dumps(self)
+
+    @staticmethod
+    def loads(data: bytes | bytearray | memoryview) -> Wikicode:
+        """Load a :class:`.Wikicode` object serialized with :meth:`dumps`.
+
+        This is several times faster than parsing the original text again.
+        Raises :exc:`ValueError` if *data* is not in a format that this version
+        of the library can read.
+        """
+        # pylint: disable=cyclic-import,import-outside-toplevel
+        from .serialize import loads
+
+        return loads(data)
+
+
+class Batch:
+    """A set of edits to a :class:`.Wikicode` object, applied all at once.
+
+    This is usually created by :meth:`.Wikicode.batch`. Every method takes a
+    :class:`.Node` within the object, which can be at any depth, and records an
+    edit to be made next to it. Nothing changes until :meth:`apply` is called;
+    the edits then behave like the :class:`.Wikicode` methods with the same
+    names, called in the order they were made.
+
+    A node can be removed or replaced only once, but any number of values can
+    be inserted before or after it, including after it is removed. Nodes
+    inside one that is removed or replaced can't be edited in the same batch.
+    """
+
+    def __init__(self, code: Wikicode) -> None:
+        self._code = code
+        # id(node) -> [node, nodes before, replacement or None, nodes after]
+        self._edits: dict[int, list[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def _edit(self, obj: Node) -> list[Any]:
+        """Return the edit recorded for *obj*, creating it if needed."""
+        if not isinstance(obj, Node):
+            raise TypeError(obj)
+        edit = self._edits.get(id(obj))
+        if edit is None:
+            edit = self._edits[id(obj)] = [obj, [], None, []]
+        return edit
+
+    def insert_before(self, obj: Node, value: Any) -> None:
+        """Insert *value* immediately before *obj*.
+
+        *value* can be anything parsable by :func:`.parse_anything`.
+        """
+        self._edit(obj)[1].extend(parse_anything(value).nodes)
+
+    def insert_after(self, obj: Node, value: Any) -> None:
+        """Insert *value* immediately after *obj*.
+
+        *value* can be anything parsable by :func:`.parse_anything`. Like
+        calling :meth:`.Wikicode.insert_after` repeatedly, each value goes
+        right after *obj*, before any that were inserted earlier.
+        """
+        edit = self._edit(obj)
+        edit[3][:0] = parse_anything(value).nodes
+
+    def replace(self, obj: Node, value: Any) -> None:
+        """Replace *obj* with *value*.
+
+        *value* can be anything parsable by :func:`.parse_anything`. Raises
+        :exc:`ValueError` if *obj* was already removed or replaced.
+        """
+        edit = self._edit(obj)
+        if edit[2] is not None:
+            raise ValueError(f"{obj!r} is already being removed or replaced")
+        edit[2] = list(parse_anything(value).nodes)
+
+    def remove(self, obj: Node) -> None:
+        """Remove *obj*.
+
+        Raises :exc:`ValueError` if *obj* was already removed or replaced.
+        """
+        self.replace(obj, None)
+
+    def _locate(self) -> dict[int, tuple[Wikicode, list[tuple[int, list[Any]]]]]:
+        """Find every node we have edits for, grouped by the list holding it.
+
+        Raises :exc:`ValueError` if any of them isn't in the tree, or is inside
+        a node that is also being removed or replaced, since that edit would
+        be lost along with it.
+        """
+        code = self._code
+        edits = self._edits
+        found: dict[int, tuple[Wikicode, list[tuple[int, list[Any]]]]] = {}
+
+        def add(context: Wikicode, index: int, edit: list[Any]) -> None:
+            if id(context) not in found:
+                found[id(context)] = (context, [])
+            found[id(context)][1].append((index, edit))
+
+        def replaced(node: Node) -> bool:
+            edit = edits.get(id(node))
+            return edit is not None and edit[2] is not None
+
+        # pylint: disable=protected-access
+        if code._tracking:
+            for edit in edits.values():
+                path = code._trace(edit[0])
+                if path is None:
+                    raise ValueError(edit[0])
+                for context, _ in path[:-1]:
+                    if replaced(cast(Node, context._parent_node)):
+                        raise ValueError(
+                            f"{edit[0]!r} is inside a node being removed or replaced"
+                        )
+                add(*path[0], edit)
+            return found
+
+        missing = dict(edits)
+        # Pairs of (list, the innermost node above it being removed or replaced):
+        todo: list[tuple[Wikicode, Node | None]] = [(code, None)]
+        while todo and missing:
+            context, outer = todo.pop()
+            for index, node in enumerate(context.nodes):
+                edit = missing.pop(id(node), None)
+                if edit is not None:
+                    if outer is not None:
+                        raise ValueError(
+                            f"{node!r} is inside a node being removed or replaced"
+                        )
+                    add(context, index, edit)
+                inner = node if outer is None and replaced(node) else outer
+                todo.extend((child, inner) for child in node.__children__())
+        if missing:
+            raise ValueError(next(iter(missing.values()))[0])
+        return found
+
+    def apply(self) -> None:
+        """Make all of the recorded edits, and forget them.
+
+        Raises :exc:`ValueError` without changing anything if any of the nodes
+        being edited is no longer in the tree, or is inside another node that
+        is being removed or replaced.
+        """
+        # pylint: disable=protected-access
+        found = self._locate()
+        self._edits = {}
+        for context, edits in found.values():
+            # Turn the edits into splices of (start, stop, new nodes), merging
+            # those that touch, and make them from the end of the list so that
+            # earlier indices stay valid:
+            splices: list[list[Any]] = []
+            for index, (node, before, replacement, after) in sorted(
+                edits, key=lambda item: item[0], reverse=True
+            ):
+                if replacement is None:
+                    parts = [(index + 1, index + 1, after), (index, index, before)]
+                else:
+                    parts = [(index, index + 1, before + replacement + after)]
+                for start, stop, nodes in parts:
+                    if start == stop and not nodes:
+                        continue
+                    if splices and splices[-1][0] == stop:
+                        splices[-1][0] = start
+                        splices[-1][2] = nodes + splices[-1][2]
+                    else:
+                        splices.append([start, stop, nodes])
+            for start, stop, nodes in splices:
+                if start < stop:
+                    del context.nodes[start:stop]
+                if nodes:
+                    context.nodes[start:start] = nodes
+                    context._link_nodes(start, len(nodes))
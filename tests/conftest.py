@@ -155,6 +155,25 @@ def _assert_wikilink_node_equal(expected, actual):
         assert actual.text is None
 
 
+def assert_render_equal(node, children=None):
+    """Assert that a node's __render__() agrees with its __str__().
+
+    The child Wikicode objects passed to the getter must also be *children*,
+    or the node's __children__() if not given, in the same order.
+    """
+    output, got = [], []
+
+    def get(code):
+        got.append(code)
+        output.append(str(code))
+
+    node.__render__(output.append, get)
+    assert str(node) == "".join(output)
+    if children is None:
+        children = list(node.__children__())
+    assert [id(code) for code in children] == [id(code) for code in got]
+
+
 def assert_wikicode_equal(expected, actual):
     """Assert that two Wikicode objects have the same data."""
     assert isinstance(actual, Wikicode)
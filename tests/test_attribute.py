@@ -29,7 +29,7 @@ import pytest
 from mwparserfromhell.nodes import Template
 from mwparserfromhell.nodes.extras import Attribute
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def test_str():
@@ -48,6 +48,20 @@ def test_str():
     assert " a= " == str(node6)
 
 
+def test_render():
+    """test Attribute.__render__()"""
+    node = Attribute(wraptext("foo"))
+    assert_render_equal(node, [node.name])
+    nodes = [
+        Attribute(wraptext("foo"), wraptext("bar")),
+        Attribute(wraptext("a"), wraptext("b"), "'", "", " ", "   "),
+        Attribute(wraptext("a"), wraptext("b"), None, "", " ", "   "),
+        Attribute(wraptext("a"), wrap([]), None, " ", "", " "),
+    ]
+    for node in nodes:
+        assert_render_equal(node, [node.name, node.value])
+
+
 def test_name():
     """test getter/setter for the name attribute"""
     name = wraptext("id")
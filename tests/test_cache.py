@@ -0,0 +1,119 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the ParseCache class in the cache module.
+"""
+
+from __future__ import annotations
+
+import os
+
+import mwparserfromhell
+from mwparserfromhell.cache import ParseCache
+from mwparserfromhell.parser import contexts, features
+
+from .conftest import assert_wikicode_equal
+
+TEXT = "{{foo|''bar''}} [[baz]] <ref>spam</ref>"
+
+
+def test_hits_and_misses():
+    """test that the same text is only parsed once"""
+    cache = ParseCache()
+    first = mwparserfromhell.parse(TEXT, cache=cache)
+    second = mwparserfromhell.parse(TEXT, cache=cache)
+    third = cache.parse(TEXT.encode("utf8"))
+    assert (2, 1, 1) == (cache.hits, cache.misses, len(cache))
+    assert_wikicode_equal(mwparserfromhell.parse(TEXT), first)
+    assert_wikicode_equal(first, second)
+    assert_wikicode_equal(first, third)
+
+
+def test_options():
+    """test that parsing options are part of the cache key"""
+    cache = ParseCache()
+    cache.parse(TEXT)
+    styled = cache.parse(TEXT, skip_style_tags=True)
+    cache.parse(TEXT, features=features.ALL & ~features.TAGS)
+    cache.parse(TEXT, contexts.EXT_LINK_URI)
+    assert (0, 4) == (cache.hits, cache.misses)
+    assert "''bar''" == styled.filter_templates()[0].get(1).value
+    cache.parse(TEXT, skip_style_tags=True, parallel=4)
+    assert 1 == cache.hits
+
+
+def test_copies():
+    """test that changing a returned tree doesn't change the cache"""
+    cache = ParseCache()
+    first = mwparserfromhell.parse(TEXT, cache=cache)
+    first.filter_templates()[0].name = "changed"
+    second = mwparserfromhell.parse(TEXT, cache=cache)
+    assert TEXT == second
+    second.filter_wikilinks()[0].title = "changed"
+    assert first is not second
+    assert TEXT == mwparserfromhell.parse(TEXT, cache=cache)
+
+
+def test_eviction():
+    """test that the least recently used trees are dropped first"""
+    size = len(mwparserfromhell.parse("{{a}}").dumps())
+    cache = ParseCache(maxsize=size * 2)
+    cache.parse("{{a}}")
+    cache.parse("{{b}}")
+    cache.parse("{{a}}")
+    cache.parse("{{c}}")
+    assert 2 == len(cache)
+    cache.parse("{{a}}")
+    assert 2 == cache.hits
+    cache.parse("{{b}}")
+    assert 4 == cache.misses
+
+    cache.parse("{{a}}" * 10)
+    assert 2 == len(cache)
+    cache.clear()
+    assert 0 == len(cache)
+
+
+def test_directory(tmp_path):
+    """test that trees saved to disk are shared between caches"""
+    first = ParseCache(directory=tmp_path)
+    first.parse(TEXT)
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert 1 == len(files) and files[0].endswith(".mwph")
+
+    second = ParseCache(directory=tmp_path)
+    assert TEXT == second.parse(TEXT)
+    assert (1, 0, 1) == (second.hits, second.misses, len(second))
+
+
+def test_directory_corrupt(tmp_path):
+    """test that unreadable files in the directory are treated as misses"""
+    cache = ParseCache(directory=tmp_path)
+    cache.parse(TEXT)
+    for root, _, names in os.walk(tmp_path):
+        for name in names:
+            with open(os.path.join(root, name), "wb") as fp:
+                fp.write(b"garbage")
+
+    other = ParseCache(directory=tmp_path)
+    assert TEXT == other.parse(TEXT)
+    assert (0, 1) == (other.hits, other.misses)
+    assert TEXT == ParseCache(directory=tmp_path).parse(TEXT)
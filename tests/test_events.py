@@ -0,0 +1,222 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the events module, which turns tokens into parsing events.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+import mwparserfromhell
+from mwparserfromhell.nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    Heading,
+    HTMLEntity,
+    Tag,
+    Template,
+    Text,
+    Wikilink,
+)
+from mwparserfromhell.parser import ParserError, features, tokens
+from mwparserfromhell.parser.events import iterevents
+
+
+def _part(name, code):
+    """Yield the events expected for one part of a node."""
+    yield ("start", name)
+    yield from _walk(code)
+    yield ("end", name)
+
+
+def _walk(code):
+    """Yield the events expected for a Wikicode object, by walking its tree."""
+    for node in code.nodes:
+        if isinstance(node, Text):
+            yield ("text", node.value)
+        elif isinstance(node, Template):
+            yield ("start", "template")
+            yield from _part("name", node.name)
+            for param in node.params:
+                yield ("start", "parameter")
+                if param.showkey:
+                    yield from _part("name", param.name)
+                yield from _part("value", param.value)
+                yield ("end", "parameter")
+            yield ("end", "template")
+        elif isinstance(node, Argument):
+            yield ("start", "argument")
+            yield from _part("name", node.name)
+            if node.default is not None:
+                yield from _part("default", node.default)
+            yield ("end", "argument")
+        elif isinstance(node, Wikilink):
+            yield ("start", "wikilink")
+            yield from _part("title", node.title)
+            if node.text is not None:
+                yield from _part("text", node.text)
+            yield ("end", "wikilink")
+        elif isinstance(node, ExternalLink):
+            yield ("start", "external_link")
+            yield from _part("url", node.url)
+            if node.title is not None:
+                yield from _part("title", node.title)
+            yield ("end", "external_link")
+        elif isinstance(node, Heading):
+            yield ("start", "heading")
+            yield from _part("title", node.title)
+            yield ("end", "heading")
+        elif isinstance(node, Comment):
+            yield ("start", "comment")
+            if node.contents:
+                yield ("text", node.contents)
+            yield ("end", "comment")
+        elif isinstance(node, HTMLEntity):
+            yield ("start", "html_entity")
+            yield ("text", node.value)
+            yield ("end", "html_entity")
+        elif isinstance(node, Tag):
+            yield ("start", "tag")
+            yield from _part("name", node.tag)
+            for attr in node.attributes:
+                yield ("start", "attribute")
+                yield from _part("name", attr.name)
+                if attr.value is not None:
+                    yield from _part("value", attr.value)
+                yield ("end", "attribute")
+            if not node.self_closing:
+                yield from _part("contents", node.contents)
+            yield ("end", "tag")
+        else:
+            raise TypeError(node)
+
+
+def test_iterparse():
+    """test a simple example of mwparserfromhell.iterparse()"""
+    text = "a{{b|c=<ref name=d>e</ref>|f}}[[g|h]]&#x6b;"
+    expected = [
+        ("text", "a"),
+        ("start", "template"),
+        ("start", "name"),
+        ("text", "b"),
+        ("end", "name"),
+        ("start", "parameter"),
+        ("start", "name"),
+        ("text", "c"),
+        ("end", "name"),
+        ("start", "value"),
+        ("start", "tag"),
+        ("start", "name"),
+        ("text", "ref"),
+        ("end", "name"),
+        ("start", "attribute"),
+        ("start", "name"),
+        ("text", "name"),
+        ("end", "name"),
+        ("start", "value"),
+        ("text", "d"),
+        ("end", "value"),
+        ("end", "attribute"),
+        ("start", "contents"),
+        ("text", "e"),
+        ("end", "contents"),
+        ("end", "tag"),
+        ("end", "value"),
+        ("end", "parameter"),
+        ("start", "parameter"),
+        ("start", "value"),
+        ("text", "f"),
+        ("end", "value"),
+        ("end", "parameter"),
+        ("end", "template"),
+        ("start", "wikilink"),
+        ("start", "title"),
+        ("text", "g"),
+        ("end", "title"),
+        ("start", "text"),
+        ("text", "h"),
+        ("end", "text"),
+        ("end", "wikilink"),
+        ("start", "html_entity"),
+        ("text", "6b"),
+        ("end", "html_entity"),
+    ]
+    assert expected == list(mwparserfromhell.iterparse(text))
+    assert expected == list(mwparserfromhell.iterparse(text.encode("utf8")))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "foo bar",
+        "{{a|b|c=d|{{e|f=g}}=h|}}",
+        "{{{a|{{{b}}}}}}",
+        "[[a]] [[a|b [[c]]]] [[a|]]",
+        "[http://a] [http://a b] http://a/{{b}}/c",
+        "== a {{b}} ==\n=== c ===",
+        "<!-- a --><!---->",
+        "&nbsp; &#107; &#x6B; &#X6b;",
+        "<ref>a</ref><br/><b c='d' e f=>g<i>h</i></b></br>",
+        "<ref>a</{{b|<i>c</i>}}>",
+        "''a '''b''' c''\n* d\n#: e\n; f : g\n----",
+        "{| class=a\n|+ b\n|-\n! c !! d\n|-\n| e || f\n|}",
+    ],
+)
+def test_events_match_tree(text):
+    """make sure the events agree with the node tree built for the same text"""
+    expected = list(_walk(mwparserfromhell.parse(text)))
+    assert expected == list(mwparserfromhell.iterparse(text))
+
+
+def test_iterparse_pieces(monkeypatch):
+    """make sure text tokenized a piece at a time gives the same events"""
+    text = (
+        "a\xe9\u4e2d {{b|c=\n<ref name=d>e\n</ref>|f}}\n[[g|h]]\n"
+        "{| class=i\n| j\n|}\n== k ==\n<b>l\nm</b>&#x6b;\n"
+    ) * 20
+    expected = list(
+        iterevents(mwparserfromhell.parser.Parser()._tokenizer.tokenize(text))
+    )
+    monkeypatch.setattr(mwparserfromhell.parser, "_PIECE_SIZE", 7)
+    assert expected == list(mwparserfromhell.iterparse(text))
+    assert expected == list(mwparserfromhell.iterparse(text.encode("utf8")))
+
+
+def test_features():
+    """make sure features and other arguments are passed through"""
+    text = "<b>a</b>&amp;"
+    mask = features.ALL & ~features.TAGS
+    events = list(mwparserfromhell.iterparse(text, features=mask))
+    assert ("start", "tag") not in events
+    assert ("start", "html_entity") in events
+
+
+def test_bad_input():
+    """make sure bad input is rejected"""
+    with pytest.raises(TypeError):
+        mwparserfromhell.iterparse(123)  # type: ignore[arg-type]
+    with pytest.raises(ParserError, match="unmatched token"):
+        list(iterevents([tokens.TemplateClose()]))
+    with pytest.raises(ParserError, match="missed a close token"):
+        list(iterevents([tokens.TemplateOpen(), tokens.Text(text="a")]))
@@ -28,7 +28,7 @@ import pytest
 
 from mwparserfromhell.nodes import ExternalLink, Text
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def test_str():
@@ -92,6 +92,21 @@ def test_showtree():
     assert valid == output
 
 
+def test_render():
+    """test ExternalLink.__render__()"""
+    assert_render_equal(ExternalLink(wraptext("http://example.com/"), brackets=False))
+    assert_render_equal(ExternalLink(wraptext("http://example.com/")))
+    assert_render_equal(ExternalLink(wraptext("http://example.com/"), wrap([])))
+    assert_render_equal(
+        ExternalLink(wraptext("http://example.com/"), wraptext("Example Web Page"))
+    )
+    assert_render_equal(
+        ExternalLink(
+            wraptext("http://example.com/"), wraptext("Example"), suppress_space=True
+        )
+    )
+
+
 def test_url():
     """test getter/setter for the url attribute"""
     url = wraptext("http://example.com/")
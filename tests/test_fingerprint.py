@@ -0,0 +1,231 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the fingerprint module.
+"""
+
+from __future__ import annotations
+
+import pickle
+from copy import deepcopy
+
+import pytest
+
+from mwparserfromhell import parse
+from mwparserfromhell.nodes import Template, Text
+from mwparserfromhell.nodes.extras import Attribute, Parameter
+from mwparserfromhell.wikicode import Wikicode
+
+TEXT = (
+    'Foo {{bar|baz=[[qux|a&amp;b]]|1}} <ref name="x">[http://example.com e]</ref>'
+    "\n== Head ==\n''it'' <!-- c --> {{{arg|def}}}"
+)
+
+
+def test_equal():
+    """test that equal trees have equal fingerprints, and others don't"""
+    code1, code2 = parse(TEXT), parse(TEXT)
+    assert code1.fingerprint() == code2.fingerprint()
+    assert 16 == len(code1.fingerprint())
+    nodes1, nodes2 = list(code1.ifilter()), list(code2.ifilter())
+    assert [n.fingerprint() for n in nodes1] == [n.fingerprint() for n in nodes2]
+
+    fingerprints = {node.fingerprint() for node in nodes1}
+    assert len(fingerprints) == len({str(node) for node in nodes1})
+
+
+@pytest.mark.parametrize(
+    "text1,text2",
+    [
+        ("{{a}}", "{{b}}"),
+        ("{{a|b}}", "{{a|b=}}"),
+        ("{{a|b=c}}", "{{a|b|c}}"),
+        ("[[a|b]]", "[[a|b|]]"),
+        ("<b>x</b>", "'''x'''"),
+        ("&amp;", "&#38;"),
+        ("a{{b}}", "{{b}}a"),
+        ("", "<nowiki></nowiki>"),
+    ],
+)
+def test_different(text1, text2):
+    """test that trees with different structures have different fingerprints"""
+    assert parse(text1).fingerprint() != parse(text2).fingerprint()
+
+
+def test_structure():
+    """test that fingerprints depend on structure, not only on text"""
+    code1 = parse("{{a}}")
+    code2 = parse("")
+    code2.append(Text("{{a}}"))
+    assert code1 == code2
+    assert code1.fingerprint() != code2.fingerprint()
+
+
+def test_stable():
+    """test that fingerprints don't change between runs or versions"""
+    assert "3592270940772a5b37e9a4369d653110" == parse(TEXT).fingerprint().hex()
+
+
+def test_cached(monkeypatch):
+    """test that fingerprints are cached until something changes"""
+    code = parse(TEXT)
+    first = code.fingerprint()
+    template = parse("{{bar|baz=[[qux|a&amp;b]]|1}}").get(0).fingerprint()
+    monkeypatch.setattr(Template, "__render__", None)
+    assert first == code.fingerprint()
+    assert template == code.get(1).fingerprint()
+    code.get(1).get("baz").value.append("!")
+    with pytest.raises(TypeError):
+        code.fingerprint()
+
+
+def test_touched(monkeypatch):
+    """test that building new trees keeps cached fingerprints"""
+    code = parse(TEXT)
+    first = code.fingerprint()
+    monkeypatch.setattr(Template, "__render__", None)
+    parse(TEXT).get(1).name = "other"
+    parse(["x", "{{y}}"])
+    Template("z").add("k", "v")
+    assert first == code.fingerprint()
+    # Only what contains the tag changes; the template keeps its fingerprint:
+    code.filter_tags()[0].tag = "span"
+    assert first != code.fingerprint()
+
+
+def test_other_trees(monkeypatch):
+    """test that changing one tree keeps the fingerprints of others"""
+    code1, code2 = parse(TEXT), parse(TEXT)
+    first = code1.fingerprint()
+    code2.fingerprint()
+    monkeypatch.setattr(Template, "__render__", None)
+    code2.get(1).name = "other"
+    code2.filter_text()[0].value = "Bar "
+    code2.append("{{new}}")
+    assert first == code1.fingerprint()
+    with pytest.raises(TypeError):
+        code2.fingerprint()
+
+
+def test_ancestors(monkeypatch):
+    """test that a change only loses the fingerprints of what contains it"""
+    code = parse("{{a|{{b|[[c]]}}}}{{d|{{e}}}}")
+    code.fingerprint()
+    b, d = code.get(0).params[0].value.get(0), code.get(1)
+    d_print, e_print = d.fingerprint(), d.get(1).value.get(0).fingerprint()
+    monkeypatch.setattr(Template, "__render__", None)
+    code.filter_wikilinks()[0].title = "f"
+    assert d_print == d.fingerprint()
+    assert e_print == d.get(1).value.get(0).fingerprint()
+    for obj in (code, code.get(0), b):
+        with pytest.raises(TypeError):
+            obj.fingerprint()
+
+
+def test_moved():
+    """test that a node in a new place is noticed in both"""
+    code1, code2 = parse("{{a}}x"), parse("y")
+    template = code1.get(0)
+    code1.fingerprint(), code2.fingerprint()
+    code2.append(template)
+    assert parse("y{{a}}").fingerprint() == code2.fingerprint()
+    # The same node is now in both trees, and both notice changes to it:
+    assert parse("{{a}}x").fingerprint() == code1.fingerprint()
+    template.name = "b"
+    assert parse("{{b}}x").fingerprint() == code1.fingerprint()
+    assert parse("y{{b}}").fingerprint() == code2.fingerprint()
+    code1.remove(template)
+    template.name = "c"
+    assert parse("x").fingerprint() == code1.fingerprint()
+    assert parse("y{{c}}").fingerprint() == code2.fingerprint()
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda code: code.get(1).add("new", "value"),
+        lambda code: code.get(1).remove("baz"),
+        lambda code: setattr(code.get(1), "name", "other"),
+        lambda code: setattr(code.get(1).params[1], "value", "2"),
+        lambda code: code.get(1).params[0].name.nodes.__setitem__(0, Text("q")),
+        lambda code: code.filter_wikilinks()[0].text.nodes.pop(),
+        lambda code: code.filter_html_entities()[0].__setattr__("value", "lt"),
+        lambda code: setattr(code.filter_tags()[0], "self_closing", True),
+        lambda code: code.filter_tags()[0].add("group", "y"),
+        lambda code: setattr(code.filter_tags()[0].attributes[0], "quotes", "'"),
+        lambda code: setattr(code.filter_text()[0], "value", "Bar "),
+        lambda code: code.filter_external_links()[0].title.append("!"),
+        lambda code: setattr(code.filter_headings()[0], "level", 3),
+        lambda code: setattr(code.filter_comments()[0], "contents", " d "),
+        lambda code: setattr(code.filter_arguments()[0], "default", None),
+        lambda code: code.nodes.reverse(),
+        lambda code: code.nodes.clear(),
+        lambda code: code.remove(code.get(1)),
+        lambda code: setattr(code, "nodes", "x"),
+        lambda code: code.get(1).params.append(Parameter(parse("b"), parse("x"))),
+        lambda code: code.get(1).params.pop(),
+        lambda code: code.get(1).params.reverse(),
+        lambda code: code.get(1).params.__setitem__(
+            1, Parameter(parse("1"), parse("2"), showkey=False)
+        ),
+        lambda code: code.filter_tags()[0].attributes.append(
+            Attribute(parse("group"), parse("y"))
+        ),
+        lambda code: code.filter_tags()[0].attributes.clear(),
+    ],
+)
+def test_invalidated(edit):
+    """test that changing a tree changes its fingerprint"""
+    code = parse(TEXT)
+    before = code.fingerprint()
+    edit(code)
+    assert before != code.fingerprint()
+
+
+def test_plain_list():
+    """test that changes to a plain list of nodes change the fingerprint"""
+    nodes = [Text("a"), Template(parse("b"))]
+    code = Wikicode(nodes)
+    before = code.fingerprint()
+    nodes.append(Text("c"))
+    after = code.fingerprint()
+    assert before != after
+    nodes[1] = Template(parse("d"))
+    assert after != code.fingerprint()
+
+    params = [Parameter(parse("1"), parse("x"), showkey=False)]
+    code = parse("a")
+    code.append(Template(parse("b"), params))
+    before = code.fingerprint()
+    params.append(Parameter(parse("2"), parse("y"), showkey=False))
+    assert before != code.fingerprint()
+
+
+def test_copy():
+    """test that cached fingerprints aren't copied or pickled"""
+    code = parse(TEXT)
+    code.fingerprint()
+    assert "_fingerprint" in vars(code) and "_fingerprint" in vars(code.get(1))
+    for copy in (pickle.loads(pickle.dumps(code)), deepcopy(code)):
+        assert "_fingerprint" not in vars(copy)
+        assert "_fingerprint" not in vars(copy.get(1))
+        assert copy.get(1).params._owner is None
+        assert code.fingerprint() == copy.fingerprint()
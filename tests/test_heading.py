@@ -28,7 +28,7 @@ import pytest
 
 from mwparserfromhell.nodes import Heading, Text
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def test_str():
@@ -70,6 +70,12 @@ def test_showtree():
     assert valid == output
 
 
+def test_render():
+    """test Heading.__render__()"""
+    assert_render_equal(Heading(wraptext("foobar"), 2))
+    assert_render_equal(Heading(wraptext(" zzz "), 5))
+
+
 def test_title():
     """test getter/setter for the title attribute"""
     title = wraptext("foobar")
@@ -0,0 +1,98 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the IncrementalTokenizer, which tokenizes text that arrives in chunks.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from mwparserfromhell import parser
+from mwparserfromhell.parser import IncrementalTokenizer, features, tokens
+from mwparserfromhell.parser.tokenizer import Tokenizer
+
+
+@pytest.fixture(params=[False, True], ids=["PyTokenizer", "CTokenizer"])
+def use_c(request):
+    """run each test with both tokenizers, if the C one is available"""
+    if request.param and not parser.use_c:
+        pytest.skip("CTokenizer not available")
+    restore = parser.use_c
+    parser.use_c = request.param
+    yield request.param
+    parser.use_c = restore
+
+
+def _feed_all(tokenizer, chunks):
+    """Feed every chunk to *tokenizer*, returning the tokens from each call."""
+    results = [tokenizer.feed(chunk) for chunk in chunks]
+    results.append(tokenizer.close())
+    return results
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "foo\nbar\n",
+        "{{foo|\nbar}}\nbaz\n[[a|\nb]]\n",
+        "== a ==\n* b\n** c\n; d : e\n{|\n| f\n|}\n",
+        "<ref>a\n\nb</ref>\n{{unclosed\n''c''\n&amp;\nhttp://example.com/\n",
+        "{{a\n{{b}}\nc}}\n<!-- d\ne -->",
+    ],
+)
+@pytest.mark.parametrize("size", [1, 3, 8, 1000])
+def test_matches_tokenize(use_c, text, size):
+    """make sure chunked tokenizing gives the same tokens as tokenizing at once"""
+    chunks = [text[i : i + size] for i in range(0, len(text), size)]
+    results = _feed_all(IncrementalTokenizer(), chunks)
+    assert Tokenizer().tokenize(text) == [tok for result in results for tok in result]
+
+
+def test_emits_early(use_c):
+    """make sure tokens are returned as soon as they are known to be final"""
+    line = "== a ==\n{{b|c}} [[d]] ''e'' <ref>f</ref> &amp; [http://g h]\n"
+    tokenizer = IncrementalTokenizer()
+    results = _feed_all(tokenizer, [line] * 500)
+    assert all(results[1:-2])
+    assert tokenizer._size == 0
+    expected = Tokenizer().tokenize(line * 500)
+    assert expected == [tok for result in results for tok in result]
+
+
+def test_waits_for_open_constructs(use_c):
+    """make sure text that may still be backtracked over is not emitted"""
+    tokenizer = IncrementalTokenizer()
+    assert [] == tokenizer.feed("a\n{{b|\nc\n")
+    assert [] == tokenizer.feed("d\n")
+    result = tokenizer.feed("}}\ne\nf")
+    assert [tokens.Text(text="a\n"), tokens.TemplateOpen()] == result[:2]
+    assert [tokens.Text(text="\ne\nf")] == tokenizer.close()
+
+
+def test_arguments(use_c):
+    """make sure skip_style_tags and features are passed to the tokenizer"""
+    text = "''a'' <b>c</b>\n"
+    mask = features.ALL & ~features.TAGS
+    tokenizer = IncrementalTokenizer(skip_style_tags=True, features=mask)
+    result = tokenizer.feed(text) + tokenizer.close()
+    assert [tokens.Text(text=text)] == result
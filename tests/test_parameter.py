@@ -28,7 +28,7 @@ import pytest
 
 from mwparserfromhell.nodes.extras import Parameter
 
-from .conftest import assert_wikicode_equal, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wraptext
 
 
 def test_str():
@@ -39,6 +39,14 @@ def test_str():
     assert "foo=bar" == str(node2)
 
 
+def test_render():
+    """test Parameter.__render__()"""
+    node = Parameter(wraptext("1"), wraptext("foo"), showkey=False)
+    assert_render_equal(node, [node.value])
+    node2 = Parameter(wraptext("foo"), wraptext("bar"))
+    assert_render_equal(node2, [node2.name, node2.value])
+
+
 def test_name():
     """test getter/setter for the name attribute"""
     name1 = wraptext("1")
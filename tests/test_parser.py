@@ -27,8 +27,9 @@ from __future__ import annotations
 import pytest
 
 from mwparserfromhell import parser
-from mwparserfromhell.nodes import Tag, Template, Text, Wikilink
+from mwparserfromhell.nodes import HTMLEntity, Tag, Template, Text, Wikilink
 from mwparserfromhell.nodes.extras import Parameter
+from mwparserfromhell.parser import builder
 
 from .conftest import assert_wikicode_equal, wrap, wraptext
 
@@ -102,3 +103,168 @@ def test_skip_style_tags(pyparser):
     without_style = parser.Parser().parse(text, skip_style_tags=True)
     assert_wikicode_equal(a, with_style)
     assert_wikicode_equal(b, without_style)
+
+
+def test_features(pyparser):
+    """test Parser.parse(features=...)"""
+    text = "<b>{{foo}}</b> &amp; [[bar]]"
+    a = wrap(
+        [
+            Tag(wraptext("b"), wrap([Template(wraptext("foo"))])),
+            Text(" "),
+            HTMLEntity("amp"),
+            Text(" "),
+            Wikilink(wraptext("bar")),
+        ]
+    )
+    b = wrap(
+        [
+            Text("<b>"),
+            Template(wraptext("foo")),
+            Text("</b> &amp; "),
+            Wikilink(wraptext("bar")),
+        ]
+    )
+    mask = parser.features.ALL & ~(parser.features.TAGS | parser.features.ENTITIES)
+
+    with_all = parser.Parser().parse(text)
+    without_some = parser.Parser().parse(text, features=mask)
+    assert_wikicode_equal(a, with_all)
+    assert_wikicode_equal(b, without_some)
+
+
+@pytest.mark.parametrize("use_c", [False, True])
+def test_interned_names(monkeypatch, use_c):
+    """test that short names are shared between trees"""
+    if use_c and not parser.CTokenizer:
+        pytest.skip("CTokenizer not available")
+    monkeypatch.setattr(parser, "use_c", use_c)
+    long = "x" * 40
+    text = f"{{{{cite web|url=foo|bar}}}} <ref name=baz>ham</ref> {{{{{long}}}}}"
+    first, second = (parser.Parser().parse(text) for _ in range(2))
+
+    def names(code):
+        cite, other = code.filter_templates()
+        ref = code.filter_tags()[0]
+        return [
+            cite.name,
+            cite.params[0].name,
+            cite.params[1].name,
+            ref.tag,
+            ref.closing_tag,
+            ref.attributes[0].name,
+            other.name,
+        ]
+
+    values = [[code.get(0).value for code in names(tree)] for tree in (first, second)]
+    assert ["cite web", "url", "1", "ref", "ref", "name", long] == values[0]
+    assert [a is b for a, b in zip(*values)] == [True] * 6 + [False]
+
+    def value_codes(code):
+        cite = code.filter_templates()[0]
+        ref = code.filter_tags()[0]
+        return [cite.params[0].value, cite.params[1].value, ref.attributes[0].value]
+
+    # Values are not names, even if they look like them, so aren't shared:
+    pairs = zip(value_codes(first), value_codes(second))
+    assert [a.get(0).value is not b.get(0).value for a, b in pairs] == [True] * 3
+
+
+def test_interned_names_evicted(monkeypatch):
+    """test that the table of shared names doesn't grow past its limit"""
+    monkeypatch.setattr(builder, "_NAMES", {})
+    monkeypatch.setattr(builder, "_MAX_NAMES", 3)
+    code = parser.Parser().parse("{{aa}}{{bb}}{{cc}}{{dd}}{{aa}}")
+    assert ["cc", "dd", "aa"] == list(builder._NAMES)
+    assert code.get(0).name.get(0).value is not code.get(4).name.get(0).value
+
+
+@pytest.mark.parametrize("use_c", [False, True])
+def test_parallel(monkeypatch, use_c):
+    """test Parser.parse(parallel=...)"""
+    if use_c and not parser.CTokenizer:
+        pytest.skip("CTokenizer not available")
+    monkeypatch.setattr(parser, "use_c", use_c)
+    monkeypatch.setattr(parser, "_MIN_CHUNK_SIZE", 200)
+    monkeypatch.setattr(parser, "_gil_enabled", lambda: False)
+    chunks = []
+    parse_chunk = parser.Parser._parse_chunk
+
+    def spy(self, chunk, *args):
+        code = parse_chunk(self, chunk, *args)
+        chunks.append((chunk, code is not None))
+        return code
+
+    monkeypatch.setattr(parser.Parser, "_parse_chunk", spy)
+    section = (
+        "== a{0} ==\n{{{{b|c={0}}}}} [[d]] ''e''\n* f\n{{|\n| g\n|}}\n<ref>h</ref>\n"
+    )
+    page = "i\n" + "".join(section.format(n) for n in range(50))
+    no_headings = parser.features.ALL & ~parser.features.HEADINGS
+    for text, mask, safe in [
+        (page, parser.features.ALL, True),
+        (page, no_headings, True),
+        ("{{j|\n" + page + "}}", parser.features.ALL, False),
+    ]:
+        chunks.clear()
+        expected = parser.Parser().parse(text, features=mask)
+        actual = parser.Parser().parse(text, features=mask, parallel=4)
+        assert_wikicode_equal(expected, actual)
+        assert len(chunks) > 4
+        assert len(text) == sum(len(chunk) for chunk, _ in chunks)
+        assert 1 == sum(not chunk.startswith("== a") for chunk, _ in chunks)
+        assert safe == all(ok for _, ok in chunks)
+
+    chunks.clear()
+    parser.Parser().parse(page[:150], parallel=4)
+    assert not chunks
+
+    # Threads would only take turns with the GIL, so don't use any:
+    monkeypatch.setattr(parser, "_gil_enabled", lambda: True)
+    assert_wikicode_equal(
+        parser.Parser().parse(page), parser.Parser().parse(page, parallel=4)
+    )
+    assert not chunks
+
+
+@pytest.mark.parametrize("use_c", [False, True])
+@pytest.mark.parametrize("share", [False, True])
+def test_revision_parser(monkeypatch, use_c, share):
+    """test RevisionParser"""
+    if use_c and not parser.CTokenizer:
+        pytest.skip("CTokenizer not available")
+    monkeypatch.setattr(parser, "use_c", use_c)
+    section = "== a{0} ==\n{{{{b|c={0}}}}} [[d]] ''e''\n\n* f\n<ref>h</ref>\n\n\n"
+    page = "i\n\n" + "".join(section.format(n) for n in range(20))
+    revisions = [
+        page,
+        page.replace("c=5", "c=five"),
+        page.replace("== a7 ==", "{{j|\n\n== a7 =="),
+        page + "k\n\n",
+        page.replace("c=5", "c=4"),
+        "",
+        page,
+    ]
+    revparser = parser.RevisionParser(share=share)
+    counts = []
+    last = parser.Parser().parse("")
+    for text in revisions:
+        reused, parsed = revparser.reused, revparser.parsed
+        code = revparser.parse(text)
+        assert_wikicode_equal(parser.Parser().parse(text), code)
+        assert text == str(code)
+        counts.append((revparser.reused - reused, revparser.parsed - parsed))
+
+        ids = [id(node) for node in code.ifilter()]
+        assert len(ids) == len(set(ids))
+        old = {id(node) for node in last.ifilter()}
+        shared = any(id(node) in old for node in code.ifilter())
+        assert shared == (share and counts[-1][0] > 0)
+        last = code
+
+    # Repeated chunks are parsed once if not sharing, or every time if sharing:
+    assert ((0, 41) if share else (18, 23)) == counts[0] == counts[6]
+    assert [(40, 1), (14, 2)] == counts[1:3]
+    assert (39, 2) == counts[4]
+    assert (0, 0) == counts[5]
+    assert "a\n\nb" == str(revparser.parse(b"a\n\nb"))
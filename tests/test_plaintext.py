@@ -0,0 +1,134 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the plaintext module, which strips code straight from tokens.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+import mwparserfromhell
+from mwparserfromhell.parser import ParserError, features, tokens
+from mwparserfromhell.parser.builder import Builder
+from mwparserfromhell.parser.plaintext import strip_tokens
+
+from .test_tokenizer import CTokenizer, PyTokenizer, build
+
+OPTIONS = list(itertools.product([False, True], repeat=3))
+
+TOKENIZERS = pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+
+
+def _assert_strips_like_tree(tokenizer, text):
+    """Assert that text strips the same from tokens as from its tree."""
+    code = Builder().build(tokenizer().tokenize(text))
+    tokenlist = tokenizer().tokenize(text)
+    for options in OPTIONS:
+        assert code.strip_code(*options) == strip_tokens(tokenlist, *options)
+
+
+def test_strip():
+    """test a simple example of mwparserfromhell.strip()"""
+    text = "a{{b|c=<ref name=d>e</ref>|f}} [[g|h]]&#x6b;<!--i-->\n\n\n\n''j''"
+    assert "a hk\n\nj" == mwparserfromhell.strip(text)
+    assert "a hk\n\nj" == mwparserfromhell.strip(text.encode("utf8"))
+    assert "ae f h&#x6b;\n\n\n\nj" == mwparserfromhell.strip(
+        text, normalize=False, collapse=False, keep_template_params=True
+    )
+
+
+@TOKENIZERS
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
+def test_strip_matches_tree(tokenizer, test_case):
+    """make sure every tokenizer test strips the same as its node tree"""
+    _assert_strips_like_tree(tokenizer, test_case.input)
+
+
+@TOKENIZERS
+def test_strip_random(tokenizer):
+    """make sure random snippets of markup strip the same as their trees"""
+    pieces = [
+        "{{",
+        "}}",
+        "{{{",
+        "}}}",
+        "|",
+        "=",
+        "[[",
+        "]]",
+        "<ref>",
+        "</ref>",
+        "<b>",
+        "</b>",
+        "<br>",
+        "<ref/>",
+        "<nowiki>",
+        "</nowiki>",
+        "<!--e-->",
+        "&amp;",
+        "&#x41;",
+        "&#65;",
+        "''",
+        "'''",
+        "==",
+        "{|",
+        "|-",
+        "|}",
+        "f",
+        "[http://a b]",
+        "http://c ",
+        "\n",
+        "\n\n\n",
+        "* ",
+        " ",
+    ]
+    rand = random.Random(0)
+    for _ in range(300):
+        text = "".join(rand.choice(pieces) for _ in range(rand.randint(1, 30)))
+        _assert_strips_like_tree(tokenizer, text)
+
+
+def test_features():
+    """make sure features and other arguments are passed through"""
+    text = "<b>a</b>&amp;''b''"
+    mask = features.ALL & ~features.ENTITIES
+    assert "a&amp;b" == mwparserfromhell.strip(text, features=mask)
+    assert "a&''b''" == mwparserfromhell.strip(text, skip_style_tags=True)
+
+
+def test_bad_input():
+    """make sure bad input is rejected"""
+    with pytest.raises(TypeError):
+        mwparserfromhell.strip(123)  # type: ignore[arg-type]
+    with pytest.raises(ParserError, match="unexpected TemplateClose"):
+        strip_tokens([tokens.TemplateClose()])
+    with pytest.raises(ParserError, match="missed a close token"):
+        strip_tokens([tokens.TemplateOpen(), tokens.Text(text="a")])
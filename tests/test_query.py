@@ -0,0 +1,226 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the query module, which finds nodes in a tree with selectors.
+"""
+
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+import mwparserfromhell
+from mwparserfromhell.nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    Heading,
+    HTMLEntity,
+    Tag,
+    Template,
+    Text,
+    Wikilink,
+)
+from mwparserfromhell.nodes.extras import Attribute, Parameter
+from mwparserfromhell.query import Query, compile_query
+from mwparserfromhell.wikicode import Wikicode
+
+TEXT = (
+    "{{cite web|url=http://a|title=[[B|c]]}} <ref name=d>{{Cite_web |url = "
+    "http://e}} {{f|url=g|{{cite web|url=h}}}}</ref>\n== i [[j]] ==\n"
+    "<REF Name='k'>[[l]]&amp;<!-- m --></REF> {{{n|o}}} [http://p q]"
+)
+
+
+def _select(code, query):
+    return [str(obj) for obj in code.select(query)]
+
+
+def test_select():
+    """test a few simple examples of Wikicode.select()"""
+    code = mwparserfromhell.parse(TEXT)
+    query = 'tag[name=ref] template[name="cite web"] > parameter[name=url]'
+    assert ["url = http://e", "url=h"] == _select(code, query)
+    assert [
+        "{{cite web|url=http://a|title=[[B|c]]}}",
+        "{{Cite_web |url = http://e}}",
+        "{{cite web|url=h}}",
+    ] == _select(code, "template[name=cite web]")
+    assert ["== i [[j]] =="] == _select(code, "heading")
+    assert ["{{{n|o}}}"] == _select(code, "argument[default]")
+    assert ["[http://p q]"] == _select(code, "external_link[title=q]")
+    assert ["&amp;"] == _select(code, "html_entity[value=amp]")
+    assert ["<!-- m -->"] == _select(code, "comment[contents=m]")
+    assert [] == _select(code, "wikilink[title=nothing]")
+
+
+@pytest.mark.parametrize(
+    "kind,cls",
+    [
+        ("argument", Argument),
+        ("comment", Comment),
+        ("external_link", ExternalLink),
+        ("heading", Heading),
+        ("html_entity", HTMLEntity),
+        ("tag", Tag),
+        ("template", Template),
+        ("text", Text),
+        ("wikilink", Wikilink),
+    ],
+)
+def test_kinds_match_filter(kind, cls):
+    """make sure each kind finds the same nodes as filter()"""
+    code = mwparserfromhell.parse(TEXT)
+    assert code.filter(forcetype=cls) == code.select(kind)
+    assert code.filter(recursive=False, forcetype=cls) == code.select("> " + kind)
+
+
+def test_combinators():
+    """test selectors with several steps, and several selectors at once"""
+    code = mwparserfromhell.parse(TEXT)
+    assert ["[[B|c]]", "[[j]]", "[[l]]"] == _select(code, "wikilink")
+    assert ["[[B|c]]"] == _select(code, "template wikilink")
+    assert [] == _select(code, "template > wikilink")
+    assert ["[[B|c]]"] == _select(code, "template > parameter > wikilink")
+    assert ["[[l]]"] == _select(code, "tag > wikilink")
+    assert ["[[j]]"] == _select(code, "heading > wikilink")
+    assert ["{{f|url=g|{{cite web|url=h}}}}"] == _select(code, "tag > template[name=f]")
+    assert ["{{cite web|url=h}}"] == _select(code, "template template")
+    assert ["{{cite web|url=h}}"] == _select(code, "template>parameter>template")
+    assert 2 == len(code.select("> template, > argument"))
+    assert 3 == len(code.select("> tag, template > * > template"))
+
+    # Matches come in the order they appear, and only once each:
+    assert ["[[B|c]]", "== i [[j]] ==", "[[j]]", "[[l]]"] == _select(
+        code, "wikilink, heading, heading wikilink"
+    )
+    assert ["[[B|c]]"] == _select(code, "template wikilink, * template wikilink")
+
+
+def test_conditions():
+    """test each kind of condition and how values are compared"""
+    code = mwparserfromhell.parse(TEXT)
+    assert ["{{f|url=g|{{cite web|url=h}}}}"] == _select(
+        code, "tag template[name!=cite web]"
+    )
+    assert ["{{Cite_web |url = http://e}}"] == _select(
+        code, r"template[name~='^[A-Z]\w+_']"
+    )
+    assert 2 == len(code.select("tag[name=ref]"))
+    assert 2 == len(code.select("tag[name=REF]"))
+    assert [" name=d", " Name='k'"] == _select(code, "attribute[name=NAME]")
+    assert [" Name='k'"] == _select(code, "attribute[value=k]")
+    assert ["[[B|c]]"] == _select(code, "wikilink[text]")
+    assert ["[[j]]", "[[l]]"] == _select(code, "wikilink[text!=c]")
+    assert ["title=[[B|c]]"] == _select(code, 'parameter[value="[[B|c]]"]')
+    assert ["{{{n|o}}}"] == _select(code, r"argument[default~='\'?o\\b']")
+    assert ["== i [[j]] =="] == _select(code, "heading[level=2][title~=j]")
+    assert ["== i [[j]] =="] == _select(code, "*[level=2]")
+    assert ["{{{n|o}}}"] == _select(code, "[default]")
+    assert 3 == len(code.select("[name~=^cite]"))
+    assert 2 == len(code.select("* [name~=^cite]"))
+
+
+def test_compile():
+    """test that queries are compiled once and can be reused"""
+    query = compile_query("template > parameter")
+    assert query is compile_query("template > parameter")
+    assert "Query('template > parameter')" == repr(query)
+    code = mwparserfromhell.parse(TEXT)
+    assert code.select(query) == query.select(code) == code.select(query.pattern)
+    assert 6 == len(Query(" template  >parameter ").select(code))
+
+
+def test_index():
+    """make sure changes to a tree are seen by later queries"""
+    code = mwparserfromhell.parse("a <b>c [[d]]</b> {{e|f}} ''g''")
+    assert [] == code.select("template template")
+    assert [] == code.select("tag comment")
+    code.get(1).contents.append("{{h}}")
+    assert ["{{h}}"] == _select(code, "tag template")
+    code.get(3).get(1).value = "{{i}}<!-- j -->"
+    assert ["{{i}}"] == _select(code, "template template")
+    code.get(1).contents.get(1).text = "<!-- k -->"
+    assert ["<!-- k -->"] == _select(code, "tag comment")
+    code.get(1).contents = "l"
+    assert ["<!-- j -->"] == _select(code, "comment")
+    code.get(3).add("m", "[[n]]")
+    assert ["[[n]]"] == _select(code, "template > parameter[name=m] > wikilink")
+    code.get(5).contents.nodes[0] = mwparserfromhell.parse("{{o}}").get(0)
+    assert ["{{o}}"] == _select(code, "tag > template")
+    code.nodes = mwparserfromhell.parse("p").nodes
+    assert [] == code.select("template")
+
+    copy = pickle.loads(pickle.dumps(mwparserfromhell.parse("<b>{{q}}</b>")))
+    assert ["{{q}}"] == _select(copy, "tag template")
+
+    parse = mwparserfromhell.parse
+    code = parse("<ref>{{t|a=1}}</ref>")
+    assert [] == code.select("tag wikilink")
+    code.filter_templates()[0].params.append(Parameter(parse("b"), parse("[[x]]")))
+    assert ["[[x]]"] == _select(code, "tag wikilink")
+    assert [] == code.select("attribute template")
+    code.get(0).attributes.append(Attribute(parse("name"), parse("{{y}}")))
+    assert ["{{y}}"] == _select(code, "attribute template")
+
+    # Other trees keep what they found:
+    other = parse("<ref>{{z}}</ref>")
+    assert [] == other.select("wikilink")
+    kinds = other._kinds  # pylint: disable=protected-access
+    code.get(0).contents.append("[[w]]")
+    assert kinds is not None
+    assert kinds == other._kinds  # pylint: disable=protected-access
+
+
+def test_index_plain_list():
+    """make sure changes to plain lists of nodes are seen by later queries"""
+    nodes = [Text("a")]
+    code = mwparserfromhell.parse("<b></b>")
+    code.get(0).contents = Wikicode(nodes)
+    assert [] == code.select("tag template")
+    nodes.append(Template(mwparserfromhell.parse("c")))
+    assert ["{{c}}"] == _select(code, "tag template")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        " ",
+        "node",
+        "template[",
+        "template[url]",
+        "[foo=bar]",
+        "template,",
+        ", template",
+        "> > template",
+        "template > > parameter",
+        "template >",
+        "template[name]parameter",
+        "template[name~=(]",
+        "template(name)",
+    ],
+)
+def test_bad_queries(query):
+    """make sure invalid selectors are rejected"""
+    with pytest.raises(ValueError):
+        compile_query(query)
@@ -0,0 +1,184 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the revisions module.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from mwparserfromhell import diff, parse
+from mwparserfromhell.nodes import Tag, Template, Text
+from mwparserfromhell.nodes.extras import Attribute, Parameter
+from mwparserfromhell.revisions import Change
+
+
+def changes(old, new):
+    """Return the changes between two strings as (kind, old, new) tuples."""
+    return [
+        (change.kind, change.old and str(change.old), change.new and str(change.new))
+        for change in diff(old, new)
+    ]
+
+
+def test_same():
+    """test that identical trees have no differences"""
+    text = "foo {{bar|baz=[[qux]]}} <ref>x</ref>\n== h ==\n"
+    assert [] == diff(parse(text), parse(text))
+    assert [] == diff("", "")
+
+
+def test_text():
+    """test that changes to plain text are found"""
+    assert [("change", "foo", "bar")] == changes("foo", "bar")
+    assert [("insert", None, "bar")] == changes("", "bar")
+    assert [("delete", "foo ", None), ("delete", "{{a}}", None)] == changes(
+        "foo {{a}}", ""
+    )
+    assert [("delete", "{{a}}", None)] == changes("foo {{a}}", "foo ")
+    assert [("insert", None, "{{b}}")] == changes("{{a}} x", "{{a}}{{b}} x")
+
+
+def test_template_params():
+    """test that template parameters are compared by name"""
+    old = "{{cite web|url=x|date=2020|access-date=1}}"
+    new = "{{cite web|access-date=1|url=x|date=2021|title=t}}"
+    result = diff(old, new)
+    assert [
+        ("change", "date=2020", "date=2021"),
+        ("insert", None, "title=t"),
+    ] == changes(old, new)
+    assert isinstance(result[0].old, Parameter)
+    assert isinstance(result[0].new, Parameter)
+    assert 1 == len(result[0].parents)
+    assert isinstance(result[0].parents[0], Template)
+    assert "parameter 'date' of template 'cite web' changed" == str(result[0])
+    assert "parameter 'title' of template 'cite web' inserted" == str(result[1])
+
+    assert [("delete", "b", None)] == changes("{{a|a|b}}", "{{a|a}}")
+    assert [("change", "x=1", " x = 1 ")] == changes("{{a|x=1}}", "{{a| x = 1 }}")
+    assert [("insert", None, "x=2")] == changes("{{a|x=1}}", "{{a|x=1|x=2}}")
+    assert [("change", "{{t|a=1|b=2}}", "{{t|b=2|a=1}}")] == changes(
+        "{{t|a=1|b=2}}", "{{t|b=2|a=1}}"
+    )
+
+
+def test_template_names():
+    """test that templates with different names aren't compared"""
+    assert [("delete", "{{a|x}}", None), ("insert", None, "{{b|x}}")] == changes(
+        "{{a|x}}", "{{b|x}}"
+    )
+    assert [("change", "{{a|x}}", "{{ a |x}}")] == changes("{{a|x}}", "{{ a |x}}")
+
+
+def test_tags():
+    """test that tag attributes and contents are compared"""
+    old = '<ref name="a">{{x|1}} t</ref>'
+    new = '<ref name="b" group=g>{{x|2}} t</ref>'
+    result = diff(old, new)
+    assert [
+        ("change", ' name="a"', ' name="b"'),
+        ("insert", None, " group=g"),
+        ("change", "1", "2"),
+    ] == changes(old, new)
+    assert isinstance(result[0].new, Attribute)
+    assert "attribute 'name' of tag 'ref' changed" == str(result[0])
+    assert isinstance(result[2].parents[0], Tag)
+    assert "parameter '1' of template 'x' in tag 'ref' changed" == str(result[2])
+
+    assert [("delete", "<b>x</b>", None), ("insert", None, "<i>x</i>")] == changes(
+        "<b>x</b>", "<i>x</i>"
+    )
+    assert [("change", "<br>", "<br/>")] == changes("<br>", "<br/>")
+    assert [
+        ("change", "<ref name=x group=y>z</ref>", "<ref group=y name=x>z</ref>")
+    ] == changes("<ref name=x group=y>z</ref>", "<ref group=y name=x>z</ref>")
+    assert [("change", "x", "y")] == changes("''x''", "''y''")
+
+
+def test_other_nodes():
+    """test that other nodes are compared by their children"""
+    result = diff("[[a|b]]", "[[a|c]]")
+    assert [("change", "b", "c")] == changes("[[a|b]]", "[[a|c]]")
+    assert "text of wikilink 'a' changed" == str(result[0])
+    assert [("delete", "[[a]]", None), ("insert", None, "[[b]]")] == changes(
+        "[[a]]", "[[b]]"
+    )
+    assert [("change", " x ", " y ")] == changes("== x ==", "== y ==")
+    assert [("change", "== x ==", "=== x ===")] == changes("== x ==", "=== x ===")
+    assert [("change", "&amp;", "&lt;")] == changes("&amp;", "&lt;")
+    assert [("change", "<!-- a -->", "<!-- b -->")] == changes(
+        "<!-- a -->", "<!-- b -->"
+    )
+    assert [("change", "b", "c")] == changes("{{{a|b}}}", "{{{a|c}}}")
+
+
+def test_nested():
+    """test that changes are found at any depth"""
+    old = "{{a|1={{b|x=<ref>[[c|d]]</ref>}}}}"
+    new = "{{a|1={{b|x=<ref>[[c|e]]</ref>}}}}"
+    result = diff(old, new)
+    assert 1 == len(result)
+    assert "{{b|x=<ref>[[c|e]]</ref>}}" == str(result[0].new.value)
+    assert "parameter '1' of template 'a' changed" == str(result[0])
+
+
+def test_skips_same(monkeypatch):
+    """test that parts of the trees with the same fingerprint aren't examined"""
+    text = "{{a|{{b|c}}}} <ref>{{d}}</ref> " * 50
+    old, new = parse(text + "x"), parse(text + "y")
+    old.fingerprint()
+    new.fingerprint()
+    monkeypatch.setattr(Template, "__render__", None)
+    monkeypatch.setattr(Tag, "__render__", None)
+    assert [("change", " x", " y")] == [
+        (change.kind, str(change.old), str(change.new)) for change in diff(old, new)
+    ]
+
+
+def test_change():
+    """test the Change class"""
+    change = Change("insert", None, Text("foo"))
+    assert "Change('insert', None, 'foo')" == repr(change)
+    assert "text inserted" == str(change)
+    assert () == change.parents
+    change = Change("delete", Text("foo"), None, (Template("a"), Tag("b")))
+    assert "text of tag 'b' in template 'a' deleted" == str(change)
+
+
+@pytest.mark.parametrize(
+    "old,new",
+    [
+        ("a {{b}} c", "a {{b}} c {{d}}"),
+        ("{{a|1|2|3}}", "{{a|1|3}}"),
+        ("x <ref>y</ref> z", "x <ref>y</ref> z <ref>w</ref>"),
+        ("== A ==\nfoo\n== B ==\nbar", "== A ==\nfoo\n== C ==\nbar\nbaz"),
+    ],
+)
+def test_reverse(old, new):
+    """test that diffing backwards swaps insertions and deletions"""
+    forward = [(c.kind, c.old, c.new) for c in diff(old, new)]
+    backward = [(c.kind, c.new, c.old) for c in diff(new, old)]
+    swap = {"insert": "delete", "delete": "insert", "change": "change"}
+    assert [(swap[kind], str(a), str(b)) for kind, a, b in backward] == [
+        (kind, str(a), str(b)) for kind, a, b in forward
+    ]
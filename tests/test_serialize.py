@@ -0,0 +1,151 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Tests for the serialize module, which provides Wikicode.dumps() and loads().
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from mwparserfromhell import parse
+from mwparserfromhell.nodes import (
+    Argument,
+    Comment,
+    ExternalLink,
+    HTMLEntity,
+    Node,
+    Tag,
+    Template,
+    Text,
+)
+from mwparserfromhell.nodes.extras import Attribute, Parameter
+from mwparserfromhell.serialize import FORMAT_VERSION, dumps, loads
+from mwparserfromhell.wikicode import Wikicode
+
+from .conftest import assert_wikicode_equal, wrap, wraptext
+from .test_tokenizer import build
+
+TEXTS = sorted({test_case.input for test_case in build()})
+
+
+def _attrs(node):
+    """Return the instance attributes of a node and its extras, in order."""
+    extras = getattr(node, "params", None) or getattr(node, "attributes", [])
+    return [list(vars(node))] + [list(vars(extra)) for extra in extras]
+
+
+@pytest.mark.parametrize("text", TEXTS, ids=range(len(TEXTS)))
+def test_round_trip_corpus(text):
+    """test that every tree in the tokenizer corpus survives a round trip"""
+    code = parse(text)
+    loaded = Wikicode.loads(code.dumps())
+    assert_wikicode_equal(code, loaded)
+    assert text == str(loaded)
+    assert code.get_tree() == loaded.get_tree()
+    for expected, actual in zip(
+        code.filter(recursive=True), loaded.filter(recursive=True)
+    ):
+        assert _attrs(expected) == _attrs(actual)
+
+
+def test_round_trip_nodes():
+    """test that unusual node fields are kept through a round trip"""
+    code = wrap(
+        [
+            Text("föö 💩"),
+            Template(wraptext("t"), [Parameter(wraptext("1"), wraptext(""), False)]),
+            Argument(wraptext("a")),
+            Argument(wraptext("b"), wraptext("")),
+            ExternalLink(wraptext("http://x"), brackets=False),
+            ExternalLink(wraptext("http://y"), wraptext("y"), suppress_space=True),
+            HTMLEntity("6b", named=False, hexadecimal=True, hex_char="X"),
+            HTMLEntity("nbsp"),
+            Comment(" c "),
+            Tag(
+                wraptext("ref"),
+                wraptext("foo"),
+                [
+                    Attribute(wraptext("name"), wraptext("x"), None, "  ", " ", ""),
+                    Attribute(wraptext("group")),
+                ],
+                self_closing=False,
+                padding=" ",
+                closing_tag=wraptext("REF"),
+            ),
+            Tag(wraptext("b"), wraptext("bold"), wiki_markup="'''"),
+            Tag(wraptext("br"), self_closing=True, implicit=True, invalid=True),
+        ]
+    )
+    loaded = loads(dumps(code))
+    assert_wikicode_equal(code, loaded)
+    assert str(code) == str(loaded)
+    assert loaded.get(3).default is not None
+    assert loaded.get(9).closing_tag == "REF"
+    bold = loaded.get(10)
+    assert bold.tag is bold.closing_tag
+
+
+def test_interned_strings():
+    """test that repeated strings are only stored once"""
+    data = dumps(parse("{{template name|value}}" * 50))
+    assert 1 == data.count(b"template name")
+    assert 1 == data.count(b"value")
+
+
+def test_unknown_node():
+    """test that nodes of unknown types can't be serialized"""
+
+    class Custom(Node):
+        def __str__(self):
+            return "custom"
+
+    with pytest.raises(TypeError):
+        dumps(wrap([Custom()]))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"not serialized",
+        b"MWPH",
+        b"MWPH" + bytes([FORMAT_VERSION + 1]) + b"\x00\x00\x00",
+        b"MWPH" + bytes([FORMAT_VERSION]),
+        b"MWPH" + bytes([FORMAT_VERSION]) + b"\x00\x00",
+        b"MWPH" + bytes([FORMAT_VERSION]) + b"\x00\x00\x80",
+        b"MWPH" + bytes([FORMAT_VERSION]) + b"\x00\x00\x01\x09",
+        b"MWPH" + bytes([FORMAT_VERSION]) + b"\x01\xff\x01\x01\x00",
+        dumps(parse("{{foo}}"))[:-1],
+        dumps(parse("{{foo}}")) + b"\x00",
+    ],
+)
+def test_invalid(data):
+    """test that loading bad data raises ValueError"""
+    with pytest.raises(ValueError):
+        loads(data)
+
+
+def test_buffers():
+    """test that any bytes-like object can be loaded"""
+    data = dumps(parse("[[foo|bar]]"))
+    assert "[[foo|bar]]" == loads(bytearray(data))
+    assert "[[foo|bar]]" == loads(memoryview(data))
@@ -438,6 +438,26 @@ def test_influence():
     assert 0 == len(parent._children)
 
 
+def test_delete_overlapping():
+    """make sure deleting a slice shrinks children that overlap it"""
+    parent = SmartList(list(range(12)))
+    child1 = parent[3:]
+    child2 = parent[6:10]
+    child3 = parent[9:11]
+    child4 = parent[1:5]
+    del parent[8:11]
+    assert [3, 4, 5, 6, 7, 11] == child1
+    assert [6, 7] == child2
+    assert [] == child3
+    assert [1, 2, 3, 4] == child4
+
+    del parent[-4:2:-2]
+    assert [0, 1, 2, 4, 6, 7, 11] == parent
+    assert [4, 6, 7, 11] == child1
+    assert [6, 7] == child2
+    assert [1, 2, 4] == child4
+
+
 @pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
 def test_pickling(protocol: int):
     """test SmartList objects behave properly when pickling"""
@@ -29,7 +29,7 @@ import pytest
 from mwparserfromhell.nodes import Tag, Template, Text
 from mwparserfromhell.nodes.extras import Attribute
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def agen(name, value):
@@ -169,6 +169,35 @@ def test_showtree():
     assert valid == output
 
 
+def test_render():
+    """test Tag.__render__()"""
+    nodes = [
+        Tag(wraptext("ref")),
+        Tag(wraptext("span"), wraptext("foo"), [agen("style", "color: red;")]),
+        Tag(
+            wraptext("ref"),
+            attrs=[agennq("name", "foo"), agenpnv("some_attr", "   ", "", "")],
+            self_closing=True,
+        ),
+        Tag(wraptext("br"), self_closing=True, padding=" "),
+        Tag(wraptext("br"), self_closing=True, implicit=True),
+        Tag(wraptext("br"), self_closing=True, invalid=True, implicit=True),
+        Tag(wraptext("br"), self_closing=True, invalid=True, padding=" "),
+        Tag(wraptext("hr"), wiki_markup="----", self_closing=True),
+        Tag(wraptext("i"), wraptext("italics!"), wiki_markup="''"),
+        Tag(
+            wraptext("td"),
+            wraptext("foo"),
+            [agen("bar", "baz")],
+            wiki_markup="|",
+            padding=" ",
+            wiki_style_separator="|",
+        ),
+    ]
+    for node in nodes:
+        assert_render_equal(node)
+
+
 def test_tag():
     """test getter/setter for the tag attribute"""
     tag = wraptext("ref")
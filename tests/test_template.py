@@ -32,7 +32,7 @@ from mwparserfromhell import parse
 from mwparserfromhell.nodes import HTMLEntity, Template, Text
 from mwparserfromhell.nodes.extras import Parameter
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def pgens(k, v):
@@ -133,6 +133,14 @@ def test_showtree():
     assert valid == output
 
 
+def test_render():
+    """test Template.__render__()"""
+    assert_render_equal(Template(wraptext("foobar")))
+    assert_render_equal(
+        Template(wraptext("foo"), [pgenh("1", "bar"), pgens("abc", "def")])
+    )
+
+
 def test_name():
     """test getter/setter for the name attribute"""
     name = wraptext("foobar")
@@ -0,0 +1,201 @@
+# Copyright (C) 2012-2025 Ben Kurtovic <ben.kurtovic@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Stress tests for parsing from many threads at once.
+"""
+
+from __future__ import annotations
+
+import importlib
+import subprocess
+import sys
+import sysconfig
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import mwparserfromhell
+from mwparserfromhell import parser
+
+from .test_tokenizer import CTokenizer, PyTokenizer, build
+
+THREADS = 8
+TEXTS = [test_case.input for test_case in build()]
+
+
+def _run_threads(target, *args):
+    """Run *target* in many threads at once, re-raising any of their errors."""
+    barrier = threading.Barrier(THREADS)
+
+    def run(index):
+        barrier.wait()
+        target(index, *args)
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        futures = [executor.submit(run, i) for i in range(THREADS)]
+    for future in futures:
+        future.result()
+
+
+@pytest.mark.parametrize("use_c", [False, True])
+def test_parse(monkeypatch, use_c):
+    """make sure separate parses in many threads don't affect each other"""
+    if use_c and not CTokenizer:
+        pytest.skip("CTokenizer not available")
+    monkeypatch.setattr(parser, "use_c", use_c)
+    expected = [mwparserfromhell.parse(text).get_tree() for text in TEXTS]
+
+    def target(index):
+        # Each thread starts at a different place so the texts are mixed up:
+        for i in range(len(TEXTS)):
+            i = (i + index * len(TEXTS) // THREADS) % len(TEXTS)
+            assert expected[i] == mwparserfromhell.parse(TEXTS[i]).get_tree()
+
+    _run_threads(target)
+
+
+def test_fingerprint():
+    """make sure trees edited and fingerprinted in many threads don't mix"""
+    text = "{{a|b={{c|[[d]]}}}}<ref>e</ref>" * 20
+
+    def target(index):
+        code = mwparserfromhell.parse(text)
+        for i in range(200):
+            code.filter_wikilinks()[i % 20].title = f"{index}.{i}"
+            assert mwparserfromhell.parse(str(code)).fingerprint() == code.fingerprint()
+
+    _run_threads(target)
+
+
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+def test_tokenizer_per_thread(tokenizer):
+    """make sure tokenizer instances used in different threads are independent"""
+    expected = [tokenizer().tokenize(text) for text in TEXTS]
+
+    def target(index):
+        instance = tokenizer()
+        for i in range(len(TEXTS)):
+            i = (i + index * len(TEXTS) // THREADS) % len(TEXTS)
+            assert expected[i] == instance.tokenize(TEXTS[i])
+
+    _run_threads(target)
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+def test_shared_c_tokenizer():
+    """make sure threads sharing a C tokenizer take turns using it"""
+    assert CTokenizer is not None
+    shared = CTokenizer()
+    expected = [shared.tokenize(text) for text in TEXTS]
+    partial = [shared.tokenize_partial(text) for text in TEXTS]
+
+    def target(index):
+        for i in range(len(TEXTS)):
+            i = (i + index * len(TEXTS) // THREADS) % len(TEXTS)
+            assert expected[i] == shared.tokenize(TEXTS[i])
+            assert partial[i] == shared.tokenize_partial(TEXTS[i])
+
+    _run_threads(target)
+
+
+def _subinterpreters():
+    """Return functions to create, run code in, and destroy subinterpreters."""
+    try:
+        interpreters = importlib.import_module("concurrent.interpreters")
+    except ImportError:
+        pass
+    else:
+        return (
+            interpreters.create,
+            lambda interp, code: interp.exec(code),
+            lambda interp: interp.close(),
+        )
+    for name in ("_interpreters", "_xxsubinterpreters"):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+
+        def run(interp, code, module=module):
+            # Older versions raise on failure; newer ones return the error:
+            assert module.run_string(interp, code) is None
+
+        return module.create, run, module.destroy
+    return None
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+@pytest.mark.skipif(_subinterpreters() is None, reason="needs subinterpreters")
+def test_subinterpreters():
+    """make sure the C tokenizer works from many subinterpreters at once"""
+    create, run, destroy = _subinterpreters()
+    expected = [mwparserfromhell.parse(text).get_tree() for text in TEXTS]
+    program = textwrap.dedent(
+        f"""
+        import sys
+        sys.path[:] = {sys.path!r}
+        import mwparserfromhell
+        from mwparserfromhell import parser
+        assert parser.use_c and parser.CTokenizer.USES_C
+        for text, tree in zip({TEXTS!r}, {expected!r}):
+            code = mwparserfromhell.parse(text)
+            assert str(code) == text
+            assert code.get_tree() == tree
+        """
+    )
+
+    def target(index):
+        interp = create()
+        try:
+            run(interp, program)
+        finally:
+            destroy(interp)
+
+    _run_threads(target)
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+@pytest.mark.skipif(
+    not sysconfig.get_config_var("Py_GIL_DISABLED"),
+    reason="needs a free-threaded build of Python",
+)
+def test_gil_stays_disabled():
+    """make sure importing the C tokenizer doesn't turn the GIL back on"""
+    program = textwrap.dedent(
+        """
+        import sys
+        from mwparserfromhell.parser._tokenizer import CTokenizer
+        assert not sys._is_gil_enabled()
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", program],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
@@ -20,6 +20,8 @@
 
 from __future__ import annotations
 
+import html.entities
+import mmap
 import os
 import subprocess
 import sys
@@ -29,9 +31,11 @@ from dataclasses import dataclass
 
 import pytest
 
-from mwparserfromhell.parser import contexts, tokens
+from mwparserfromhell import definitions
+from mwparserfromhell.parser import ParserError, contexts, features, tokens
 from mwparserfromhell.parser.builder import Builder
 from mwparserfromhell.parser.tokenizer import Tokenizer as PyTokenizer
+from mwparserfromhell.parser.tokenizer import _build_spans
 
 try:
     from mwparserfromhell.parser._tokenizer import CTokenizer
@@ -121,16 +125,125 @@ def build():
 
 @pytest.mark.parametrize(
     "tokenizer",
-    filter(None, (CTokenizer, PyTokenizer)),
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
     ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
 )
-@pytest.mark.parametrize("test_case", build(), ids=lambda test_case: test_case.name)
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
 def test_tokenizer(tokenizer, test_case: _TestCase):
     actual = tokenizer().tokenize(test_case.input)
     assert test_case.output == actual
 
 
-@pytest.mark.parametrize("test_case", build(), ids=lambda test_case: test_case.name)
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
+def test_tokenize_spans(tokenizer, test_case: _TestCase):
+    kinds, starts, ends, depths = tokenizer().tokenize_spans(test_case.input)
+    assert [tokens.__all__[kind] for kind in kinds] == [
+        type(token).__name__ for token in test_case.output
+    ]
+    assert list(starts) == ([0] + list(ends))[: len(starts)]
+    assert (ends[-1] if ends else 0) == len(test_case.input)
+    assert min(depths, default=0) >= 0
+    for token, start, end in zip(test_case.output, starts, ends):
+        if isinstance(token, tokens.Text) and end > start:
+            assert test_case.input[start:end] == token.text
+
+
+def _has_feature_markup(feature, token):
+    """Return whether *token* can only be produced with *feature* enabled."""
+    markup = token.get("wiki_markup")
+    if feature == features.EXT_LINKS:
+        return isinstance(token, tokens.ExternalLinkOpen)
+    if feature == features.TAGS:
+        return isinstance(token, tokens.TagOpenOpen) and markup is None
+    if feature == features.TABLES:
+        return isinstance(token, tokens.TagOpenOpen) and markup == "{|"
+    if feature == features.ENTITIES:
+        return isinstance(token, tokens.HTMLEntityStart)
+    if feature == features.HEADINGS:
+        return isinstance(token, tokens.HeadingStart)
+    if feature == features.LISTS:
+        return isinstance(token, tokens.TagOpenOpen) and markup in tuple("#*;:")
+    raise ValueError(feature)
+
+
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
+def test_tokenize_features(tokenizer, test_case: _TestCase):
+    for feature in (
+        features.EXT_LINKS,
+        features.TAGS,
+        features.TABLES,
+        features.ENTITIES,
+        features.HEADINGS,
+        features.LISTS,
+    ):
+        mask = features.ALL & ~feature
+        actual = tokenizer().tokenize(test_case.input, 0, False, mask)
+        assert not any(_has_feature_markup(feature, token) for token in actual)
+        assert test_case.input == str(Builder().build(actual))
+    actual = tokenizer().tokenize(test_case.input, 0, False, features.ALL)
+    assert test_case.output == actual
+
+
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
+def test_tokenize_partial(tokenizer, test_case: _TestCase):
+    def merge_text(tokenlist):
+        merged = []
+        for token in tokenlist:
+            last = merged[-1] if merged else None
+            if isinstance(last, tokens.Text) and isinstance(token, tokens.Text):
+                merged[-1] = tokens.Text(text=merged[-1].text + token.text)
+            else:
+                merged.append(token)
+        return merged
+
+    text = test_case.input
+    for end in sorted({text.find("\n") + 1, len(text) // 2, len(text)}):
+        final, length = tokenizer().tokenize_partial(text[:end])
+        assert length == 0 or text[length - 1] == "\n"
+        rest = tokenizer().tokenize(text[length:])
+        assert test_case.output == merge_text(final + rest)
+
+
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
+def test_tokenize_utf8(tokenizer, test_case: _TestCase):
+    encoded = test_case.input.encode("utf8")
+    assert test_case.output == tokenizer().tokenize(encoded)
+    assert test_case.output == tokenizer().tokenize(memoryview(encoded))
+
+
+@pytest.mark.parametrize(
+    "test_case", list(build()), ids=lambda test_case: test_case.name
+)
 def test_roundtrip(test_case: _TestCase):
     actual = str(Builder().build(test_case.output[:]))
     assert test_case.input == actual
@@ -144,6 +257,92 @@ def test_c_tokenizer_uses_c():
     assert CTokenizer().USES_C is True
 
 
+def test_tokenize_spans_depths():
+    """make sure nested nodes get the right depths in tokenize_spans()"""
+    text = "a{{b|[[c]]}}<i>d</i>"
+    expected = [
+        ("Text", "a", 0),
+        ("TemplateOpen", "{{", 0),
+        ("Text", "b", 1),
+        ("TemplateParamSeparator", "|", 0),
+        ("WikilinkOpen", "[[", 1),
+        ("Text", "c", 2),
+        ("WikilinkClose", "]]", 1),
+        ("TemplateClose", "}}", 0),
+        ("TagOpenOpen", "<", 0),
+        ("Text", "i", 1),
+        ("TagCloseOpen", ">", 0),
+        ("Text", "d", 1),
+        ("TagOpenClose", "</", 0),
+        ("Text", "i", 1),
+        ("TagCloseClose", ">", 0),
+    ]
+    for tokenizer in [tok for tok in (CTokenizer, PyTokenizer) if tok]:
+        kinds, starts, ends, depths = tokenizer().tokenize_spans(text)
+        actual = [
+            (tokens.__all__[kind], text[start:end], depth)
+            for kind, start, end, depth in zip(kinds, starts, ends, depths)
+        ]
+        assert expected == actual
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+@pytest.mark.parametrize("mask", range(features.ALL + 1))
+def test_c_features_match_python(mask):
+    """make sure both tokenizers agree on every combination of features"""
+    assert CTokenizer is not None
+    text = (
+        "== a ==\n* b [http://c d] http://e &amp; <b>f</b> </br>\n{|\n| g\n|}\n"
+        "[[http://h]] {{i|j=<i>k</i>&lt;}}\n;l:m\n<ref name=n&amp;>o</ref>\n"
+    )
+    expected = PyTokenizer().tokenize(text, 0, False, mask)
+    assert expected == CTokenizer().tokenize(text, 0, False, mask)
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+def test_c_spans_match_python():
+    """make sure both tokenizers find the same spans without making tokens"""
+    assert CTokenizer is not None
+    text = (
+        "== a ==\n* b [http://c d] &amp; <b>f</b> </br> <br> <p class='x' />\n"
+        "{|\n| g\n|}\n[[h]] {{i|j=<i>k</i>&#x6c;}} ''m'''n'''''\n<ref name=o>p\n"
+    )
+    expected = PyTokenizer().tokenize_spans(text)
+    assert expected == CTokenizer().tokenize_spans(text)
+    with pytest.raises(ParserError):
+        _build_spans([tokens.HeadingEnd()])
+
+
+@pytest.mark.parametrize(
+    "tokenizer",
+    [tok for tok in (CTokenizer, PyTokenizer) if tok],
+    ids=lambda t: "CTokenizer" if t.USES_C else "PyTokenizer",
+)
+def test_tokenize_buffers(tokenizer, tmp_path):
+    """make sure any UTF-8 buffer can be tokenized, including an mmap"""
+    text = (
+        "a\xe9\u4e2d\U0001d518 {{b\u4e2d|c=\U0001d518}} [[d\xe9|e]]\n"
+        "<span title=f\xa0\xe9>\u2003g</span> &eacute; [http://h\u4e2d i]\n"
+    ) * 50
+    expected = tokenizer().tokenize(text)
+    encoded = text.encode("utf8")
+    assert expected == tokenizer().tokenize(bytearray(encoded))
+    assert expected == tokenizer().tokenize(memoryview(encoded))
+    path = tmp_path / "page.txt"
+    path.write_bytes(encoded)
+    with (
+        path.open("rb") as fp,
+        mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        assert expected == tokenizer().tokenize(mm)
+    with pytest.raises(UnicodeDecodeError):
+        tokenizer().tokenize(b"{{a|\xe9}}")
+    with pytest.raises(UnicodeDecodeError):
+        tokenizer().tokenize(b"{{a|\xed\xa0\x80}}")  # surrogate
+    with pytest.raises(TypeError):
+        tokenizer().tokenize(42)
+
+
 def test_describe_context():
     assert "" == contexts.describe(0)
     ctx = contexts.describe(contexts.TEMPLATE_PARAM_KEY | contexts.HAS_TEXT)
@@ -176,3 +375,22 @@ def test_entity_does_not_corrupt_heap():
         "C tokenizer triggered allocator mismatch under PYTHONMALLOC=debug:\n"
         f"stdout:\n{result.stdout}\nstderr:\n{result.stderr}"
     )
+
+
+@pytest.mark.skipif(CTokenizer is None, reason="CTokenizer not available")
+@pytest.mark.parametrize(
+    "text",
+    [
+        *(f"<{tag}>x</{tag}>" for tag in definitions.PARSER_BLACKLIST),
+        *(f"<{tag.upper()}>x" for tag in definitions.SINGLE),
+        *(f"[{scheme}://x y] {scheme}:x" for scheme in definitions.URI_SCHEMES),
+        *(f"[{scheme.upper()}:x y]" for scheme in definitions.URI_SCHEMES),
+        *(f"&{name};" for name in html.entities.entitydefs),
+        "<KBD>x</kbd> <lİ>x <BR/>",
+        "&AMP; &ampx; &zwnj &zzzz;",
+    ],
+)
+def test_c_name_handling_matches_python(text):
+    """make sure the C tokenizer handles tag, scheme, and entity names like Python"""
+    assert CTokenizer is not None
+    assert PyTokenizer().tokenize(text) == CTokenizer().tokenize(text)
@@ -39,6 +39,8 @@ from .conftest import assert_wikicode_equal, wrap, wraptext
         (Template(wraptext("spam")), wrap([Template(wraptext("spam"))])),
         ("fóóbar", wraptext("fóóbar")),
         (b"foob\xc3\xa1r", wraptext("foobár")),
+        (bytearray(b"foob\xc3\xa1r"), wraptext("foobár")),
+        (memoryview(b"foob\xc3\xa1r"), wraptext("foobár")),
         (123, wraptext("123")),
         (True, wraptext("True")),
         (None, wrap([])),
@@ -24,8 +24,11 @@ Tests for the Wikicode class, which manages a list of nodes.
 
 from __future__ import annotations
 
+import io
 import pickle
+import random
 import re
+from copy import deepcopy
 from functools import partial
 from types import GeneratorType
 from typing import cast
@@ -33,7 +36,7 @@ from typing import cast
 import pytest
 
 from mwparserfromhell import parse
-from mwparserfromhell.nodes import Argument, Heading, Template, Text
+from mwparserfromhell.nodes import Argument, Heading, Node, Template, Text
 from mwparserfromhell.smart_list import SmartList
 from mwparserfromhell.wikicode import Wikicode
 
@@ -48,6 +51,47 @@ def test_str():
     assert "Have a {{template}} and a [[page|link]]" == str(code2)
 
 
+def test_render_into_write():
+    """test Wikicode.render_into() and Wikicode.write()"""
+    text = "a{{b|c=[[d|<ref name=e>f</ref>]]}}g&nbsp;<!-- h -->\n== i ==\n"
+    code = parse(text * 5000)
+    pieces = []
+    code.render_into(pieces)
+    assert text * 5000 == "".join(pieces)
+    assert len(pieces) > 4096
+    assert all(type(piece) is str for piece in pieces)
+
+    buffer = io.StringIO()
+    code.render_into(buffer)
+    assert text * 5000 == buffer.getvalue()
+    buffer = io.StringIO()
+    code.write(buffer)
+    assert text * 5000 == buffer.getvalue()
+    buffer = io.StringIO()
+    parse("").write(buffer)
+    assert "" == buffer.getvalue()
+
+
+def test_render_custom_str():
+    """test that node subclasses overriding __str__() render that way"""
+
+    class Custom(Template):
+        def __str__(self):
+            return "<custom>"
+
+    class Shouted(Text):
+        def __str__(self):
+            return self.value.upper()
+
+    code = parse("a{{x}}y")
+    code.nodes[1] = Custom(wraptext("foo"))
+    code.nodes[2] = Shouted("xx")
+    assert "a<custom>XX" == str(code)
+    buffer = io.StringIO()
+    code.write(buffer)
+    assert "a<custom>XX" == buffer.getvalue()
+
+
 def test_nodes():
     """test getter/setter for the nodes attribute"""
     code = parse("Have a {{template}}")
@@ -376,6 +420,235 @@ def test_remove():
     _test_search(meth, expected)
 
 
+def test_search_renders_once(monkeypatch):
+    """test that string searches don't render any subtree more than once"""
+    code = parse("{{a|" * 30 + "{{b}}" + "}}" * 30 + "{{b}}")
+    calls = []
+    render = Template.__render__
+
+    def counted(self, write, get):
+        calls.append(self)
+        render(self, write, get)
+
+    monkeypatch.setattr(Template, "__render__", counted)
+    code.remove("{{b}}")
+    assert 33 == len(calls)  # Each template in the tree, plus the needle
+    assert len(calls) == len(set(map(id, calls)))
+    assert "{{a|" * 30 + "}}" * 30 == code
+
+
+def test_search_custom_node():
+    """test string searches inside nodes that only define __str__()"""
+
+    class Box(Node):
+        def __init__(self, contents):
+            super().__init__()
+            self.contents = parse(contents)
+
+        def __str__(self):
+            return "<<" + str(self.contents) + ">>"
+
+        def __children__(self):
+            yield self.contents
+
+    code = parse("{{a}}")
+    code.append(Box("x{{a}}y"))
+    code.replace("{{a}}", "{{b}}")
+    assert "{{b}}<<x{{b}}y>>" == code
+    code.get(1).contents.append(Box("{{b}}"))
+    code.remove("{{b}}")
+    assert "<<xy<<>>>>" == code
+    assert code.contains("xy")
+
+
+@pytest.mark.parametrize(
+    "test",
+    [
+        test_set,
+        test_contains,
+        test_index,
+        test_get_ancestors_parent,
+        test_insert,
+        test_insert_before,
+        test_insert_after,
+        test_replace,
+        test_append,
+        test_remove,
+    ],
+    ids=lambda test: test.__name__,
+)
+def test_track_parents(monkeypatch, test):
+    """test that tracking parents doesn't change what any method does"""
+    original = parse
+
+    def tracked(*args, **kwargs):
+        code = original(*args, **kwargs)
+        code.track_parents()
+        return code
+
+    monkeypatch.setitem(globals(), "parse", tracked)
+    test()
+
+
+def test_track_parents_links(monkeypatch):
+    """test that searches follow parent links instead of walking the tree"""
+    code = parse("{{a|{{b|x={{c|[[d|{{e}}]]}}}}}}{{f}}" * 3)
+    code.track_parents()
+    e = code.filter_templates(matches=lambda n: n.name == "e")[1]
+    ancestors = code.get_ancestors(e)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("searched the whole tree")
+
+    monkeypatch.setattr(Wikicode, "_get_children", fail)
+    assert ["a", "b", "c"] == [n.name for n in ancestors[:3]]
+    assert ancestors == code.get_ancestors(e)
+    assert ancestors[-1] is code.get_parent(e)
+    assert code.contains(e) and code.contains(ancestors[-1].title)
+    assert 2 == code.index(e, recursive=True)
+
+    # Links made stale by editing the tree are noticed and fixed:
+    code.nodes.pop(0)
+    ancestors[1].name = "{{g|{{e}}}}"
+    g = ancestors[1].name.get(0)
+    assert 1 == code.index(e, recursive=True)
+    assert ancestors[:2] == code.get_ancestors(g)
+    code.replace(e, "{{h}}")
+    h = ancestors[-1].text.get(0)
+    assert "h" == h.name
+    assert ancestors == code.get_ancestors(h)
+    code.remove(h)
+    assert not code.contains(h)
+    code.insert_after(g, "{{i}}")
+    assert "{{g|{{e}}}}{{i}}" == ancestors[1].name
+
+
+def test_track_parents_copy():
+    """test that parent links are not copied or pickled"""
+    code = parse("{{a|{{b}}}}")
+    code.track_parents()
+    b = code.get(0).params[0].value
+    assert b._parent_node is code.get(0)
+    for copy in (pickle.loads(pickle.dumps(b)), deepcopy(b)):
+        assert "_parent_node" not in vars(copy)
+        assert "_parent_code" not in vars(copy.get(0))
+    assert "{{b}}" == deepcopy(b.get(0))
+
+
+def test_batch():
+    """test Wikicode.batch()"""
+    code = parse("x{{a}}y{{b|{{c}}|[[d]]}}z")
+    a, b, c = code.filter_templates()
+    d = code.filter_wikilinks()[0]
+    with code.batch() as batch:
+        batch.insert_before(a, "1")
+        batch.insert_before(a, "2")
+        batch.insert_after(a, "3")
+        batch.insert_after(a, "4")
+        batch.remove(code.get(2))
+        batch.replace(c, "{{e}}")
+        batch.insert_after(d, "!")
+        batch.remove(d)
+        assert 4 == len(batch)
+        assert "x{{a}}y{{b|{{c}}|[[d]]}}z" == code
+    assert "x12{{a}}43{{b|{{e}}|!}}z" == code
+
+    with code.batch() as batch:
+        batch.remove(a)
+        batch.remove(code.get(2))
+        batch.remove(code.get(4))
+    assert "x13{{b|{{e}}|!}}z" == code
+
+    with pytest.raises(ValueError), code.batch() as batch:
+        batch.remove(b)
+        batch.remove(a)
+    assert "x13{{b|{{e}}|!}}z" == code
+    with pytest.raises(ZeroDivisionError), code.batch() as batch:
+        batch.remove(b)
+        raise ZeroDivisionError()
+    assert "x13{{b|{{e}}|!}}z" == code
+    with code.batch() as batch:
+        batch.remove(b)
+        pytest.raises(ValueError, batch.remove, b)
+        pytest.raises(ValueError, batch.replace, b, "foo")
+        pytest.raises(TypeError, batch.remove, "x")
+    assert "x13z" == code
+
+
+@pytest.mark.parametrize("track", [False, True])
+def test_batch_nested(track):
+    """test that Wikicode.batch() rejects edits inside removed nodes"""
+    code = parse("{{a|{{b|[[c]]}}}}{{d}}")
+    if track:
+        code.track_parents()
+    a, b, d = code.filter_templates()
+    c = code.filter_wikilinks()[0]
+    for outer, inner in ((a, b), (a, c), (b, c)):
+        for method in ("remove", "replace"):
+            for edit in ("remove", "insert_before", "insert_after"):
+                with pytest.raises(ValueError), code.batch() as batch:
+                    batch.insert_after(d, "x")
+                    getattr(batch, method)(
+                        outer, *(("y",) if method == "replace" else ())
+                    )
+                    getattr(batch, edit)(inner, *(() if edit == "remove" else ("z",)))
+                assert "{{a|{{b|[[c]]}}}}{{d}}" == code
+    with code.batch() as batch:
+        batch.insert_before(a, "x")
+        batch.insert_after(b, "z")
+        batch.replace(c, "y")
+    assert "x{{a|{{b|y}}z}}{{d}}" == code
+
+
+def test_batch_sections():
+    """test that Wikicode.batch() keeps sections in sync with the tree"""
+    code = parse("{{a}}\n== 1 ==\n{{b}}{{c}}\n== 2 ==\n{{d}}{{e}}\n")
+    first, second = code.get_sections(levels=[2])
+    a, b, c, d, e = code.filter_templates()
+    with code.batch() as batch:
+        batch.remove(a)
+        batch.remove(b)
+        batch.remove(c)
+        batch.insert_before(d, "{{f}}")
+        batch.replace(e, "{{g}}")
+    assert "\n== 1 ==\n\n== 2 ==\n{{f}}{{d}}{{g}}\n" == code
+    assert "== 1 ==\n\n" == first
+    assert "== 2 ==\n{{f}}{{d}}{{g}}\n" == second
+
+
+@pytest.mark.parametrize("track", [False, True])
+def test_batch_random(track):
+    """test that batches match making the same edits one at a time"""
+    rand = random.Random(42)
+    text = "{{a|b={{c|[[d|e{{f}}]]}}|g}}h<ref>{{i|j}}</ref>''k''\n" * 20
+    for _ in range(10):
+        code1, code2 = parse(text), parse(text)
+        if track:
+            code1.track_parents()
+        nodes1, nodes2 = list(code1.ifilter()), list(code2.ifilter())
+        inserts, replaces = [], []
+        for i in rand.sample(range(len(nodes1)), 60):
+            value = f"{{{{x{i}}}}}"
+            op = rand.choice(["insert_before", "insert_after", "replace", "remove"])
+            if op.startswith("insert"):
+                inserts.append((op, i, (value,)))
+            else:
+                replaces.append((op, i, (value,) if op == "replace" else ()))
+        # Nodes inside one being removed or replaced can't be edited as well:
+        gone = {id(nodes2[i]) for _, i, _ in replaces}
+        edits = [
+            (op, i, args)
+            for op, i, args in inserts + replaces
+            if not any(id(node) in gone for node in code2.get_ancestors(nodes2[i]))
+        ]
+        with code1.batch() as batch:
+            for op, i, args in edits:
+                getattr(batch, op)(nodes1[i], *args)
+        for op, i, args in edits:
+            getattr(code2, op)(nodes2[i], *args)
+        assert code2 == code1
+
+
 def test_matches():
     """test Wikicode.matches()"""
     code1 = parse("Cleanup")
@@ -630,6 +903,31 @@ def test_strip_code():
     )
 
 
+def test_strip_code_nested():
+    """test that Wikicode.strip_code() strips nested objects on their own"""
+    code = parse("\n\n\n\nA<b>\n\nB\n\n\n\nC\n</b>{{d||e\n\n\n|\n|<i>\nf</i>}}\n\n\n")
+    assert "AB\n\nCe f" == code.strip_code(keep_template_params=True)
+    assert "\n\n\n\nA\n\nB\n\n\n\nC\n\n\n\n" == code.strip_code(collapse=False)
+    assert "A\n\nx" == parse("A" + "\n" * 10000 + "x").strip_code()
+
+
+def test_strip_code_custom():
+    """test that Wikicode.strip_code() uses __strip__ of node subclasses"""
+
+    class Shouting(Template):
+        def __strip__(self, **kwargs):
+            return str(self.name).upper()
+
+    class Quiet(Shouting):
+        pass
+
+    code = parse("a ")
+    code.append(Shouting("b"))
+    code.append(Quiet("c"))
+    assert "a BC" == code.strip_code()
+    assert "a BC" == code.strip_code(keep_template_params=True)
+
+
 def test_get_tree():
     """test Wikicode.get_tree()"""
     # Since individual nodes have test cases for their __showtree___
@@ -28,7 +28,7 @@ import pytest
 
 from mwparserfromhell.nodes import Text, Wikilink
 
-from .conftest import assert_wikicode_equal, wrap, wraptext
+from .conftest import assert_render_equal, assert_wikicode_equal, wrap, wraptext
 
 
 def test_str():
@@ -91,6 +91,12 @@ def test_showtree():
     assert valid == output
 
 
+def test_render():
+    """test Wikilink.__render__()"""
+    assert_render_equal(Wikilink(wraptext("foobar")))
+    assert_render_equal(Wikilink(wraptext("foo"), wraptext("bar")))
+
+
 def test_title():
     """test getter/setter for the title attribute"""
     title = wraptext("foobar")